@@ -0,0 +1,466 @@
+# balance_sim.py
+# Headless Monte Carlo balance simulator for Stellar Virtue.
+#
+# Encodes the rules from game.js (enemyTurn, checkBases, spawnEnemies,
+# sectorDistance/findPathToward/findPathAway tables from board_model, the
+# cardinal and theological virtue bonuses, Sunday rest) as NumPy arrays with
+# one row per game, so thousands of games advance in lockstep. Players follow
+# the same aggressive policy as test-game.js: pray at Lauds, draw a Catholic
+# Action at Prime, attack at Terce/Vespers (or close in on the nearest
+# enemy), repair or charge at Sext, heal or pray at None, rest at Compline.
+#
+# Usage: python balance_sim.py --games 10000 --bonus-effects
+
+import argparse
+import json
+
+from board_model import BoardModel
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ===== Rules (matching game.js) =====
+
+BOARD = BoardModel()
+TOTAL_SECTORS = BOARD.sectors
+PLAYER_BASES = BOARD.bases
+ENEMY_SPAWNS = BOARD.spawns
+ADJACENCY = BOARD.adjacency
+MAX_DAYS = 9
+TURNS = ['Lauds', 'Prime', 'Terce', 'Sext', 'None', 'Vespers', 'Compline']
+PLAYER_SHIPS = 12
+ENEMY_SHIPS = 24
+STARTING_ENEMIES = 6
+BASE_HEALTH = 3
+ENEMY_ACTIONS = ['Advance', 'Assault', 'Flank', 'Regroup', 'Ambush', 'Reinforce']
+CATHOLIC_EFFECTS = ['virtue2', 'healSector', 'removeEnemy', 'virtue3', 'healAll', 'virtue1draw']
+
+CARDINAL_VIRTUES = ['prudence', 'justice', 'fortitude', 'temperance']
+SUB_VIRTUE_COUNTS = [8, 13, 6, 8]
+THEOLOGICAL_VIRTUES = ['faith', 'hope', 'charity']
+VIRTUE_BONUSES = CARDINAL_VIRTUES + THEOLOGICAL_VIRTUES
+
+# Player behaviour (as in test-game.js)
+P_CORRECT_ANSWER = 0.5
+P_GREATER_GOOD = 0.7
+
+
+def _tables():
+    """BOARD's lookup tables, 0-based, so moves vectorize as fancy indexing."""
+    n = TOTAL_SECTORS
+    adjacent = np.zeros((n, n), dtype=bool)
+    for a, neighbours in ADJACENCY.items():
+        adjacent[a - 1, np.array(neighbours) - 1] = True
+    toward = np.array(BOARD.toward, dtype=np.int8) - 1
+    away = np.array(BOARD.away, dtype=np.int8) - 1
+    dist = np.array(BOARD.distance, dtype=np.int8)
+    nearest = np.array(BOARD.nearest_base, dtype=np.int8) - 1
+    return toward, away, dist, adjacent, nearest
+
+
+# ===== Batched game state =====
+
+class BatchState:
+    """State of many games as arrays; axis 0 is the game index. Sectors are 0-based."""
+
+    def __init__(self, games, rng, bonuses):
+        g = games
+        self.rng = rng
+        self.bonuses = set(bonuses)
+        self.games = g
+        bases = np.array(PLAYER_BASES) - 1
+        spawns = np.array(ENEMY_SPAWNS) - 1
+
+        self.ship_health = np.full((g, PLAYER_SHIPS), 3, dtype=np.int16)
+        self.ship_max_health = np.full((g, PLAYER_SHIPS), 3, dtype=np.int16)
+        self.ship_charge = np.ones((g, PLAYER_SHIPS), dtype=np.int16)
+        self.ship_max_charge = np.full((g, PLAYER_SHIPS), 3, dtype=np.int16)
+        self.ship_sector = np.tile(bases[np.arange(PLAYER_SHIPS) % len(bases)], (g, 1)).astype(np.int8)
+        self.ship_alive = np.ones((g, PLAYER_SHIPS), dtype=bool)
+
+        self.enemy_health = np.full((g, ENEMY_SHIPS), 2, dtype=np.int16)
+        self.enemy_sector = np.tile(spawns[np.arange(ENEMY_SHIPS) % len(spawns)], (g, 1)).astype(np.int8)
+        self.enemy_deployed = np.tile(np.arange(ENEMY_SHIPS) < STARTING_ENEMIES, (g, 1))
+        self.enemy_alive = np.ones((g, ENEMY_SHIPS), dtype=bool)
+        self.enemies_defeated = np.zeros(g, dtype=np.int16)
+
+        self.base_health = np.full((g, len(PLAYER_BASES)), BASE_HEALTH, dtype=np.int16)
+        self.base_intact = np.ones((g, len(PLAYER_BASES)), dtype=bool)
+        self.base_lost_day = np.zeros((g, len(PLAYER_BASES)), dtype=np.int8)
+
+        self.virtue_points = np.zeros(g, dtype=np.int32)
+        self.sub_progress = np.zeros((g, sum(SUB_VIRTUE_COUNTS)), dtype=np.int8)
+        self.cardinal_mastered = np.zeros((g, len(CARDINAL_VIRTUES)), dtype=bool)
+        self.cardinal_mastered_day = np.zeros((g, len(CARDINAL_VIRTUES)), dtype=np.int8)
+        self.theological = np.zeros((g, len(THEOLOGICAL_VIRTUES)), dtype=np.int8)
+
+        self.lost = np.zeros(g, dtype=bool)
+        self.lost_day = np.zeros(g, dtype=np.int8)
+
+    def has(self, virtue):
+        """(G,) mask of games where a virtue's bonus is active."""
+        if virtue not in self.bonuses:
+            return np.zeros(self.games, dtype=bool)
+        if virtue in CARDINAL_VIRTUES:
+            return self.cardinal_mastered[:, CARDINAL_VIRTUES.index(virtue)]
+        return self.theological[:, THEOLOGICAL_VIRTUES.index(virtue)] >= 3
+
+    @property
+    def active_enemies(self):
+        return self.enemy_deployed & self.enemy_alive
+
+
+class BalanceSimulator:
+    """Runs batches of games under the game.js rules with the test-game.js player policy."""
+
+    def __init__(self, seed=None, p_correct=P_CORRECT_ANSWER, p_greater_good=P_GREATER_GOOD,
+                 bonuses=VIRTUE_BONUSES, days=MAX_DAYS):
+        if np is None:
+            raise RuntimeError("balance_sim requires NumPy (pip install numpy)")
+        self.rng = np.random.default_rng(seed)
+        self.p_correct = p_correct
+        self.p_greater_good = p_greater_good
+        self.bonuses = tuple(bonuses)
+        self.days = days
+        self.toward, self.away, self.dist, self.adjacent, self.nearest = _tables()
+        self.base_sectors = np.array(PLAYER_BASES) - 1
+        self.sub_to_virtue = np.repeat(np.arange(len(CARDINAL_VIRTUES)), SUB_VIRTUE_COUNTS)
+
+    # ----- helpers -----
+
+    def _intact_mask(self, st):
+        return (st.base_intact * (1 << np.arange(len(PLAYER_BASES)))).sum(axis=1)
+
+    def _random_choice(self, st, candidates):
+        """Pick one True column per row uniformly at random; returns (index, any)."""
+        found = candidates.any(axis=1)
+        pick = np.zeros(len(candidates), dtype=np.intp)
+        rows = np.nonzero(found)[0]
+        if rows.size:
+            sub = candidates[rows]
+            pick[rows] = np.where(sub, st.rng.random(sub.shape), -1.0).argmax(axis=1)
+        return pick, found
+
+    def _spawn(self, st, count, games):
+        waiting = ~st.enemy_deployed & st.enemy_alive
+        rank = np.cumsum(waiting, axis=1)
+        st.enemy_deployed |= waiting & (rank <= count) & games[:, None]
+
+    def _update_mastery(self, st, day):
+        for v in range(len(CARDINAL_VIRTUES)):
+            subs = self.sub_to_virtue == v
+            now = (st.sub_progress[:, subs] >= 2).all(axis=1)
+            newly = now & ~st.cardinal_mastered[:, v]
+            st.cardinal_mastered_day[newly, v] = day
+            st.cardinal_mastered[:, v] = now
+        if 'faith' in st.bonuses:
+            st.ship_max_charge[st.theological[:, 0] >= 3] = 4
+        if 'hope' in st.bonuses:
+            hope = (st.theological[:, 1] >= 3)[:, None] & st.ship_alive
+            st.ship_max_health[hope] = 4
+
+    def _grow_virtue(self, st, games):
+        """Progress a random cardinal sub-virtue (capped at 2) in the given games."""
+        sub = st.rng.integers(0, st.sub_progress.shape[1], size=st.games)
+        rows = np.nonzero(games)[0]
+        cols = sub[rows]
+        st.sub_progress[rows, cols] = np.minimum(2, st.sub_progress[rows, cols] + 1)
+
+    def _heal(self, st, mask, amount):
+        st.ship_health = np.where(mask & st.ship_alive,
+                                  np.minimum(st.ship_max_health, st.ship_health + amount),
+                                  st.ship_health)
+
+    def _damage(self, st, dmg):
+        st.ship_health -= dmg.astype(st.ship_health.dtype)
+        dead = st.ship_alive & (st.ship_health <= 0)
+        st.ship_health[dead] = 0
+        st.ship_alive &= ~dead
+
+    # ----- player actions -----
+
+    def _pray(self, st, ship, games, day):
+        correct = games & (st.rng.random(st.games) < self.p_correct)
+        self._grow_virtue(st, correct)
+        st.virtue_points += (games & ~correct)
+        charity = correct & st.has('charity')
+        if charity.any():
+            near = self.adjacent[st.ship_sector[:, ship][:, None], st.ship_sector]
+            self._heal(st, charity[:, None] & near, 1)
+        self._update_mastery(st, day)
+
+    def _catholic_card(self, st, ship, games):
+        pending = games.copy()
+        while pending.any():
+            effect = st.rng.integers(0, len(CATHOLIC_EFFECTS), size=st.games)
+            st.virtue_points += np.where(pending & (effect == 0), 2, 0)
+            st.virtue_points += np.where(pending & (effect == 3), 3, 0)
+            st.virtue_points += np.where(pending & (effect == 5), 1, 0)
+            same = st.ship_sector == st.ship_sector[:, ship][:, None]
+            self._heal(st, (pending & (effect == 1))[:, None] & same, 1)
+            self._heal(st, (pending & (effect == 4))[:, None], 1)
+            remove = pending & (effect == 2)
+            target, found = self._random_choice(st, st.active_enemies & remove[:, None])
+            rows = np.nonzero(found)[0]
+            st.enemy_alive[rows, target[rows]] = False
+            st.enemies_defeated += found
+            # Lectio Divina draws another card
+            pending &= effect == 5
+
+    def _combat(self, st, ship, games, preview, day):
+        sector = st.ship_sector[:, ship]
+        here = st.active_enemies & (st.enemy_sector == sector[:, None])
+        attack = games & here.any(axis=1)
+
+        # Attack the first enemy in the sector, after a moral choice
+        target = here.argmax(axis=1)
+        greater = attack & (st.rng.random(st.games) < self.p_greater_good)
+        self._grow_virtue(st, greater)
+        self._update_mastery(st, day)
+        charge = st.ship_charge[:, ship]
+        dmg = np.maximum(1, charge) + greater + st.has('justice')
+        rows = np.nonzero(attack)[0]
+        st.enemy_health[rows, target[rows]] -= dmg[rows].astype(st.enemy_health.dtype)
+        killed = attack & (st.enemy_health[np.arange(st.games), target] <= 0)
+        st.enemy_alive[np.nonzero(killed)[0], target[killed]] = False
+        st.enemies_defeated += killed
+        kept = np.where(st.has('temperance'), np.minimum(1, charge), 0)
+        st.ship_charge[:, ship] = np.where(attack, kept, charge)
+
+        # Otherwise close in on the nearest enemy
+        move = games & ~attack & st.active_enemies.any(axis=1)
+        dist = np.where(st.active_enemies, self.dist[sector[:, None], st.enemy_sector], 99)
+        goal = st.enemy_sector[np.arange(st.games), dist.argmin(axis=1)]
+        step = self.toward[sector, goal]
+        # Prudence foresight: don't fly into an enemy sector right before an Ambush
+        if preview is not None:
+            occupied = (st.active_enemies & (st.enemy_sector == step[:, None])).any(axis=1)
+            move &= ~(st.has('prudence') & (preview == ENEMY_ACTIONS.index('Ambush')) & occupied)
+        st.ship_sector[:, ship] = np.where(move, step, sector)
+
+    def _player_turn(self, st, turn, preview, day):
+        playing = ~st.lost
+        for ship in range(PLAYER_SHIPS):
+            games = playing & st.ship_alive[:, ship]
+            if not games.any():
+                continue
+            if turn == 'Lauds':
+                self._pray(st, ship, games, day)
+            elif turn == 'Prime':
+                self._catholic_card(st, ship, games)
+            elif turn in ('Terce', 'Vespers'):
+                self._combat(st, ship, games, preview, day)
+            elif turn == 'Sext':
+                repair = games & (st.ship_health[:, ship] < st.ship_max_health[:, ship])
+                charge = games & ~repair & (st.ship_charge[:, ship] < st.ship_max_charge[:, ship])
+                st.ship_health[:, ship] += repair
+                st.ship_charge[:, ship] += charge
+            elif turn == 'None':
+                heal = games & (st.ship_health[:, ship] <= 1) & (st.virtue_points >= 2)
+                st.virtue_points -= 2 * heal
+                st.ship_health[:, ship] = np.where(
+                    heal, np.minimum(st.ship_max_health[:, ship], st.ship_health[:, ship] + 2),
+                    st.ship_health[:, ship])
+                self._pray(st, ship, games & ~heal, day)
+            elif turn == 'Compline':
+                mask = np.zeros_like(st.ship_alive)
+                mask[:, ship] = games
+                self._heal(st, mask, 1)
+
+    # ----- enemy turn -----
+
+    def _enemy_turn(self, st, action, day):
+        playing = ~st.lost
+        active = st.active_enemies & playing[:, None]
+        nearest = self.nearest[self._intact_mask(st)[:, None], st.enemy_sector]
+        fortitude = st.has('fortitude')
+
+        advance = active & (action == 0)[:, None]
+        st.enemy_sector = np.where(advance, self.toward[st.enemy_sector, nearest], st.enemy_sector)
+
+        # Flank: the first half (rounded up) of active enemies move two sectors
+        rank = np.cumsum(active, axis=1)
+        half = -(-active.sum(axis=1) // 2)
+        flank = active & (action == 2)[:, None] & (rank <= half[:, None])
+        two = self.toward[self.toward[st.enemy_sector, nearest], nearest]
+        st.enemy_sector = np.where(flank, two, st.enemy_sector)
+
+        regroup = active & (action == 3)[:, None]
+        st.enemy_sector = np.where(regroup, self.away[st.enemy_sector, nearest], st.enemy_sector)
+
+        assault = playing & (action == 1)
+        if assault.any():
+            # Enemies strike one after another, so resolve them in order on the assaulted games only
+            rows = np.nonzero(assault)[0]
+            health = st.ship_health[rows]
+            alive = st.ship_alive[rows]
+            ship_sector = st.ship_sector[rows]
+            dmg = np.where(fortitude[rows], 0, 1)
+            for e in range(ENEMY_SHIPS):
+                attacking = active[rows, e]
+                targets = alive & (ship_sector == st.enemy_sector[rows, e][:, None]) & attacking[:, None]
+                pick, found = self._random_choice(st, targets)
+                hit = np.nonzero(found)[0]
+                health[hit, pick[hit]] -= dmg[hit].astype(health.dtype)
+                alive &= health > 0
+            st.ship_health[rows] = np.maximum(health, 0)
+            st.ship_alive[rows] = alive
+            self._spawn(st, 1, assault)
+
+        ambush = playing & (action == 4)
+        if ambush.any():
+            counts = (active[:, None, :] & (st.enemy_sector[:, None, :] == st.ship_sector[:, :, None])).sum(axis=2)
+            dmg = np.where(fortitude, 1, 2)[:, None] * counts
+            self._damage(st, np.where(ambush[:, None] & st.ship_alive, dmg, 0))
+
+        self._spawn(st, 2, playing & (action == 5))
+        self._check_bases(st, day)
+
+    def _check_bases(self, st, day):
+        active = st.active_enemies
+        for b, sector in enumerate(self.base_sectors):
+            enemies = (active & (st.enemy_sector == sector)).sum(axis=1)
+            defenders = (st.ship_alive & (st.ship_sector == sector)).any(axis=1)
+            hit = ~st.lost & st.base_intact[:, b] & (enemies > 0) & ~defenders
+            st.base_health[:, b] -= np.where(hit, enemies, 0).astype(st.base_health.dtype)
+            fallen = hit & (st.base_health[:, b] <= 0)
+            st.base_intact[fallen, b] = False
+            st.base_lost_day[fallen, b] = day
+        newly_lost = ~st.lost & ~st.base_intact.any(axis=1)
+        st.lost |= newly_lost
+        st.lost_day[newly_lost] = day
+
+    def _sunday(self, st, day):
+        playing = ~st.lost
+        self._heal(st, playing[:, None], 2)
+        # Theological virtues grow in rotation; fidelity stays high because ships always pray
+        which = (day - 1) % len(THEOLOGICAL_VIRTUES)
+        st.theological[playing, which] = np.minimum(3, st.theological[playing, which] + 1)
+        self._update_mastery(st, day)
+
+    # ----- driver -----
+
+    def run(self, games):
+        """Simulate a batch of games and return a SimulationResult."""
+        st = BatchState(games, self.rng, self.bonuses)
+        for day in range(1, self.days + 1):
+            if day % 7 == 0:
+                self._sunday(st, day)
+                continue
+            for turn in TURNS:
+                enemy_phase = turn not in ('Lauds', 'Compline')
+                action = st.rng.integers(0, len(ENEMY_ACTIONS), size=games) if enemy_phase else None
+                # With Prudence the enemy action is drawn (and revealed) before players act
+                self._player_turn(st, turn, action, day)
+                if enemy_phase:
+                    self._enemy_turn(st, action, day)
+                if st.lost.all():
+                    return SimulationResult(st, self.days)
+        return SimulationResult(st, self.days)
+
+
+class SimulationResult:
+    """Aggregate statistics for one simulated batch."""
+
+    def __init__(self, st, days):
+        self.days = days
+        self.games = st.games
+        self.won = ~st.lost
+        self.lost_day = st.lost_day
+        self.base_lost_day = st.base_lost_day
+        self.enemies_defeated = st.enemies_defeated
+        self.total_victory = self.won & ~st.enemy_alive.any(axis=1)
+        self.ships_alive = st.ship_alive.sum(axis=1)
+        self.bases_left = st.base_intact.sum(axis=1)
+        self.cardinal_mastered = st.cardinal_mastered
+        self.theological = st.theological
+
+    def _histogram(self, days):
+        counts = np.bincount(days[days > 0], minlength=self.days + 1)[1:]
+        return {day + 1: int(n) for day, n in enumerate(counts)}
+
+    def summary(self):
+        lost_days = np.where(self.base_lost_day > 0, self.base_lost_day, 127)
+        first_loss = lost_days.min(axis=1)
+        first_loss = np.where(first_loss == 127, 0, first_loss)
+        return {
+            "games": int(self.games),
+            "win_rate": float(self.won.mean()),
+            "total_victory_rate": float(self.total_victory.mean()),
+            "avg_enemies_defeated": float(self.enemies_defeated.mean()),
+            "avg_ships_alive": float(self.ships_alive.mean()),
+            "avg_bases_left": float(self.bases_left.mean()),
+            "defeat_day": self._histogram(self.lost_day),
+            "first_base_lost_day": self._histogram(first_loss),
+            "base_lost_day": {base: self._histogram(self.base_lost_day[:, b])
+                              for b, base in enumerate(PLAYER_BASES)},
+            "cardinal_mastery_rate": {v: float(self.cardinal_mastered[:, i].mean())
+                                      for i, v in enumerate(CARDINAL_VIRTUES)},
+            "theological_received_rate": {v: float((self.theological[:, i] >= 3).mean())
+                                          for i, v in enumerate(THEOLOGICAL_VIRTUES)},
+        }
+
+
+def simulate(games=10000, seed=None, **options):
+    """Run a batch with default rules and return its summary dict."""
+    return BalanceSimulator(seed=seed, **options).run(games).summary()
+
+
+def virtue_bonus_effects(games=10000, seed=None, **options):
+    """Win-rate change from each virtue bonus, measured by disabling it (same seed per run)."""
+    baseline = simulate(games, seed, **options)
+    effects = {}
+    for bonus in VIRTUE_BONUSES:
+        without = [b for b in VIRTUE_BONUSES if b != bonus]
+        result = simulate(games, seed, bonuses=without, **options)
+        effects[bonus] = {
+            "win_rate_without": result["win_rate"],
+            "win_rate_delta": baseline["win_rate"] - result["win_rate"],
+            "enemies_defeated_delta": baseline["avg_enemies_defeated"] - result["avg_enemies_defeated"],
+        }
+    none = simulate(games, seed, bonuses=(), **options)
+    effects["all"] = {
+        "win_rate_without": none["win_rate"],
+        "win_rate_delta": baseline["win_rate"] - none["win_rate"],
+        "enemies_defeated_delta": baseline["avg_enemies_defeated"] - none["avg_enemies_defeated"],
+    }
+    return baseline, effects
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo balance simulation of the Stellar Virtue rules.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--p-correct", type=float, default=P_CORRECT_ANSWER,
+                        help="chance a player answers a virtue question correctly")
+    parser.add_argument("--p-greater-good", type=float, default=P_GREATER_GOOD,
+                        help="chance a player picks the greater good in a moral choice")
+    parser.add_argument("--bonus-effects", action="store_true",
+                        help="also rerun with each virtue bonus disabled and report its effect")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    options = {"p_correct": args.p_correct, "p_greater_good": args.p_greater_good}
+    if args.bonus_effects:
+        summary, effects = virtue_bonus_effects(args.games, args.seed, **options)
+    else:
+        summary, effects = simulate(args.games, args.seed, **options), None
+
+    if args.json:
+        print(json.dumps({"summary": summary, "bonus_effects": effects}, indent=2))
+    else:
+        print(f"=== Stellar Virtue balance: {summary['games']} games ===")
+        print(f"Win rate: {summary['win_rate']:.1%} (total victory {summary['total_victory_rate']:.1%})")
+        print(f"Avg enemies defeated: {summary['avg_enemies_defeated']:.1f}/{ENEMY_SHIPS}")
+        print(f"Avg ships alive: {summary['avg_ships_alive']:.1f}/{PLAYER_SHIPS}, "
+              f"bases left: {summary['avg_bases_left']:.2f}/{len(PLAYER_BASES)}")
+        print(f"Defeat day: {summary['defeat_day']}")
+        print(f"First base lost on day: {summary['first_base_lost_day']}")
+        print("Cardinal mastery: " + ", ".join(f"{v} {r:.1%}" for v, r in summary['cardinal_mastery_rate'].items()))
+        if effects:
+            print("Virtue bonus effects (win rate with vs. without):")
+            for bonus, e in effects.items():
+                print(f"  {bonus:<11} {e['win_rate_delta']:+.1%} win rate, "
+                      f"{e['enemies_defeated_delta']:+.2f} enemies defeated")
@@ -0,0 +1,186 @@
+# benchmark.py
+# Scaling benchmarks for the print generator.
+#
+# Builds synthetic decks of 12, 100, 1,000 and 10,000 cards from the shapes of
+# PRINT_VIRTUE_QUESTIONS and PRINT_MORAL_CHOICES (half of each), then times
+# the whole pipeline (write_pdf, merged and streamed) and every document
+# section on its own. Each case runs in a fresh process so peak RSS is its
+# own. Results are compared to a baseline recorded on this machine
+# (.cache/bench_baseline.json, never committed: timings from another machine
+# mean nothing here); anything slower, bigger or hungrier than the threshold
+# allows is reported and fails the run. A baseline from another host only
+# gates on PDF size, which does not depend on the machine.
+#
+# Usage: python benchmark.py [--sizes 12 100] [--save-baseline] [--threshold 0.25]
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+from virtue_data import CACHE_DIR
+
+BASELINE = os.path.join(CACHE_DIR, "bench_baseline.json")
+SIZES = [12, 100, 1000, 10000]
+THRESHOLD = 0.25
+# Timings under this many seconds are too noisy to flag
+MIN_SECONDS = 0.2
+
+
+def synthetic_deck(cards):
+    """A full-deck print dict whose question and moral choice decks hold cards cards in total."""
+    import stellar_virtue_boardgame as svb
+
+    deck = svb.build_deck(svb.normalize_variant({"deck": "curated"}))
+    questions = svb.PRINT_VIRTUE_QUESTIONS
+    choices = svb.PRINT_MORAL_CHOICES
+    # Number each copy so text differs card to card, as a real bank would
+    deck["virtue_questions"] = [
+        (header, f"{question} (#{i + 1})", answers, correct, explanation)
+        for i, (header, question, answers, correct, explanation)
+        in ((i, questions[i % len(questions)]) for i in range(cards // 2))
+    ]
+    deck["moral_choices"] = [
+        (f"{scenario} (#{i + 1})", lesser, greater, virtue)
+        for i, (scenario, lesser, greater, virtue)
+        in ((i, choices[i % len(choices)]) for i in range(cards - cards // 2))
+    ]
+    return deck
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(case, cards, repeat):
+    """Run one benchmark case in this process; returns its measurements."""
+    import pdf_merge
+    import stellar_virtue_boardgame as svb
+    from text_layout import clear_layout_caches
+
+    deck = synthetic_deck(cards)
+    start_rss = _peak_rss_mb()
+    best = None
+    size = 0
+    for _ in range(repeat):
+        clear_layout_caches()
+        start = time.perf_counter()
+        if case == "write_pdf":
+            out = io.BytesIO()
+            svb.write_pdf(deck, out)
+            size = out.tell()
+        elif case == "write_pdf_stream":
+            out = io.BytesIO()
+            svb.write_pdf(deck, out, stream=True)
+            size = out.tell()
+        else:
+            size = len(svb.render_section(case, deck))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = _peak_rss_mb()
+    return {
+        "seconds": best,
+        "ms_per_card": best * 1000 / cards,
+        "bytes": size,
+        "bytes_per_card": size / cards,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - start_rss,
+        "merged": case != "write_pdf" or pdf_merge.available(),
+    }
+
+
+def cases():
+    import stellar_virtue_boardgame as svb
+    return ["write_pdf", "write_pdf_stream"] + [name for name, _, _ in svb.SECTIONS]
+
+
+def run(sizes=SIZES, only=None, repeat=3):
+    """Run every case at every size, each in a fresh process. Returns {"case@cards": result}."""
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for cards in sizes:
+        for case in cases():
+            if only and case not in only:
+                continue
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_case, (case, cards, repeat if cards < 10000 else 1))
+            results[f"{case}@{cards}"] = result
+            print(f"{case:<18}{cards:>7} cards {result['seconds']:>9.3f}s {result['ms_per_card']:>8.3f} ms/card "
+                  f"{result['bytes_per_card']:>8.0f} B/card {result['peak_rss_mb']:>7.1f} MB peak", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD, metrics=("seconds", "bytes", "peak_rss_mb")):
+    """Return regression messages: metrics more than threshold worse than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in metrics:
+            if metric == "seconds" and result[metric] < MIN_SECONDS:
+                continue
+            if base[metric] and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{key} {metric}: {result[metric]:.4g} vs baseline {base[metric]:.4g} "
+                                   f"({result[metric] / base[metric] - 1:+.0%})")
+    return regressions
+
+
+def host():
+    """What timings and memory depend on: the machine and the interpreter."""
+    return {"node": platform.node(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "python": platform.python_version()}
+
+
+def load_baseline(path=BASELINE):
+    """(results, host) of a saved baseline; ({}, None) if there is none."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        return saved["results"], saved.get("host")
+    except (OSError, ValueError, KeyError):
+        return {}, None
+
+
+def save_baseline(results, path=BASELINE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"host": host(), "results": results}, f, indent=1, sort_keys=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF generation across deck sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="deck sizes in cards")
+    parser.add_argument("--only", nargs="+", help="cases to run (write_pdf, write_pdf_stream or section names)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best time is kept")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown/growth over the baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.only, args.repeat)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+    baseline, baseline_host = load_baseline(args.baseline)
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        sys.exit(0)
+    metrics = ("seconds", "bytes", "peak_rss_mb")
+    if baseline_host != host():
+        print(f"{args.baseline} was recorded on another host; comparing PDF sizes only. "
+              "Run with --save-baseline to record timings here.")
+        metrics = ("bytes",)
+    regressions = compare(results, baseline, args.threshold, metrics)
+    for message in regressions:
+        print("REGRESSION", message)
+    print(f"{len(regressions)} regressions over {args.threshold:.0%} against {args.baseline}")
+    sys.exit(1 if regressions else 0)
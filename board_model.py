@@ -0,0 +1,175 @@
+# board_model.py
+# Parametric game board: sector count, base and spawn placement, adjacency.
+#
+# game.js moves enemies by scanning ADJACENCY and calling sectorDistance for
+# every neighbour on every move. BoardModel computes the same answers for
+# every pair of sectors once: distance, the neighbour to step to when moving
+# toward a sector (findPathToward) or away from it (findPathAway), and the
+# nearest intact base for every set of intact bases (findNearestBase). The
+# tables are exported as board.json, which game.js loads at startup, and the
+# print generator lays out boards of any size from the same model.
+#
+# Usage: python board_model.py [--sectors 16] [--bases 4] [--output board.json]
+
+import argparse
+import json
+import os
+from collections import deque
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BOARD_JSON = os.path.join(HERE, "board.json")
+
+DEFAULT_SECTORS = 12
+DEFAULT_BASES = 3
+DISTANCES = ("ring", "hops")
+# nearestBase has a row per subset of intact bases
+MAX_BASES = 12
+
+
+def ring_adjacency(sectors, opposite=True):
+    """Adjacency in game.js order: ring neighbours, then (with opposite) the sector across Earth."""
+    adjacency = {}
+    for i in range(1, sectors + 1):
+        neighbours = []
+        if i > 1:
+            neighbours.append(i - 1)
+        if i < sectors:
+            neighbours.append(i + 1)
+        if i == 1:
+            neighbours.append(sectors)
+        if i == sectors:
+            neighbours.append(1)
+        if opposite:
+            neighbours.append((i - 1 + sectors // 2) % sectors + 1)
+        adjacency[i] = [n for n in dict.fromkeys(neighbours) if n != i]
+    return adjacency
+
+
+def spaced_sectors(sectors, count):
+    """Evenly spaced (bases, spawns): bases at the start of each arc, spawns at its end (1/5/9, 4/8/12 on 12)."""
+    step = sectors // count
+    return [1 + i * step for i in range(count)], [(i + 1) * step for i in range(count)]
+
+
+class BoardModel:
+    """A board of sectors numbered 1..sectors, with lookup tables for enemy movement.
+
+    distance is "ring" (steps around the ring ignoring shortcuts, exactly
+    game.js's sectorDistance) or "hops" (shortest path over the adjacency).
+    Tables are lists indexed by sector - 1 and hold sector numbers.
+    Raises ValueError for inconsistent layouts.
+    """
+
+    def __init__(self, sectors=DEFAULT_SECTORS, bases=None, spawns=None, adjacency=None, distance="ring"):
+        if sectors < 3:
+            raise ValueError(f"a board needs at least 3 sectors, got {sectors}")
+        if bases is None or spawns is None:
+            default_bases, default_spawns = spaced_sectors(sectors, DEFAULT_BASES)
+            bases = default_bases if bases is None else bases
+            spawns = default_spawns if spawns is None else spawns
+        adjacency = ring_adjacency(sectors) if adjacency is None else adjacency
+        adjacency = {int(k): [int(n) for n in v] for k, v in adjacency.items()}
+        sector_range = range(1, sectors + 1)
+        bad = [s for s in list(bases) + list(spawns) if s not in sector_range]
+        if bad:
+            raise ValueError(f"sectors out of range 1-{sectors}: {bad}")
+        if set(bases) & set(spawns):
+            raise ValueError(f"sectors cannot be both base and spawn: {sorted(set(bases) & set(spawns))}")
+        if not 1 <= len(bases) <= MAX_BASES:
+            raise ValueError(f"a board needs 1-{MAX_BASES} bases, got {len(bases)}")
+        if set(adjacency) != set(sector_range) or any(n not in sector_range for v in adjacency.values() for n in v):
+            raise ValueError(f"adjacency must list neighbours in 1-{sectors} for every sector")
+        if distance not in DISTANCES:
+            raise ValueError(f"distance must be one of {', '.join(DISTANCES)}, got {distance!r}")
+        self.sectors = sectors
+        self.bases = list(bases)
+        self.spawns = list(spawns)
+        self.adjacency = adjacency
+        self.distance_metric = distance
+        self.distance = self._ring_distances() if distance == "ring" else self._hop_distances()
+        self.toward = [[self._step(a, b, closer=True) for b in sector_range] for a in sector_range]
+        self.away = [[self._step(a, b, closer=False) for b in sector_range] for a in sector_range]
+        self.nearest_base = [[self._nearest_base(s, mask) for s in sector_range]
+                             for mask in range(1 << len(self.bases))]
+
+    @classmethod
+    def from_dict(cls, spec):
+        """Build from a dict of constructor arguments (e.g. a batch manifest "board" entry or board.json)."""
+        spec = spec or {}
+        return cls(spec.get("sectors", DEFAULT_SECTORS), spec.get("bases"), spec.get("spawns"),
+                   spec.get("adjacency"), spec.get("distance", "ring"))
+
+    def _ring_distances(self):
+        n = self.sectors
+        return [[min(abs(a - b), n - abs(a - b)) for b in range(1, n + 1)] for a in range(1, n + 1)]
+
+    def _hop_distances(self):
+        n = self.sectors
+        unreachable = n  # longer than any real path
+        table = []
+        for start in range(1, n + 1):
+            row = [unreachable] * n
+            row[start - 1] = 0
+            queue = deque([start])
+            while queue:
+                s = queue.popleft()
+                for t in self.adjacency[s]:
+                    if row[t - 1] == unreachable:
+                        row[t - 1] = row[s - 1] + 1
+                        queue.append(t)
+            table.append(row)
+        return table
+
+    def _step(self, start, target, closer):
+        """Neighbour of start that is strictly closest to (or farthest from) target, else start."""
+        if closer and start == target:
+            return start
+        best, best_dist = start, self.distance[start - 1][target - 1]
+        for s in self.adjacency[start]:
+            d = self.distance[s - 1][target - 1]
+            if (d < best_dist) if closer else (d > best_dist):
+                best, best_dist = s, d
+        return best
+
+    def _nearest_base(self, sector, intact_mask):
+        """Nearest base whose bit is set in intact_mask (bit i = bases[i]); bases[0] if none."""
+        best, best_dist = None, None
+        for bit, base in enumerate(self.bases):
+            if intact_mask & (1 << bit):
+                d = self.distance[sector - 1][base - 1]
+                if best_dist is None or d < best_dist:
+                    best, best_dist = base, d
+        return best or self.bases[0]
+
+    def spec(self):
+        """The constructor arguments, for manifests and cache keys."""
+        return {"sectors": self.sectors, "bases": self.bases, "spawns": self.spawns,
+                "adjacency": {str(k): v for k, v in self.adjacency.items()},
+                "distance": self.distance_metric}
+
+    def to_dict(self):
+        """spec() plus the movement tables, as loaded by game.js."""
+        return dict(self.spec(), distances=self.distance, toward=self.toward, away=self.away,
+                    nearestBase=self.nearest_base)
+
+    def write_json(self, path=BOARD_JSON):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate board.json movement tables for game.js.")
+    parser.add_argument("--sectors", type=int, default=DEFAULT_SECTORS)
+    parser.add_argument("--bases", type=int, default=DEFAULT_BASES,
+                        help="number of evenly spaced bases (each with a spawn sector)")
+    parser.add_argument("--no-opposite", action="store_true",
+                        help="ring only, without the links across Earth")
+    parser.add_argument("--distance", choices=DISTANCES, default="ring",
+                        help="ring steps (as game.js always used) or shortest path over the links")
+    parser.add_argument("--output", default=BOARD_JSON)
+    args = parser.parse_args()
+    bases, spawns = spaced_sectors(args.sectors, args.bases)
+    board = BoardModel(args.sectors, bases, spawns, ring_adjacency(args.sectors, not args.no_opposite), args.distance)
+    board.write_json(args.output)
+    print(f"{args.output}: {board.sectors} sectors, bases {board.bases}, spawns {board.spawns}")
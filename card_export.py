@@ -0,0 +1,183 @@
+# card_export.py
+# Exports every distinct card as its own PNG and/or SVG for the web app.
+#
+# Each card is drawn with the same functions as the printed deck (draw_card,
+# draw_virtue_question_card, draw_moral_choice_card) onto a card-sized PDF
+# page, which PyMuPDF rasterizes (PNG) or converts (SVG). Filenames carry a
+# hash of the card's content and the drawing code, so unchanged cards are not
+# re-rendered and sw.js only has to fetch cards whose names are new. The
+# manifest (cards/manifest.json) lists the current file of every card.
+# PyMuPDF is optional: without it, export prints a message and does nothing.
+
+import hashlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from reportlab.pdfgen import canvas
+
+import stellar_virtue_boardgame as svb
+from render_cache import code_fingerprint
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+EXPORT_DIR = os.path.join(svb.virtue_data.HERE, "cards")
+FORMATS = ("png", "svg")
+DEFAULT_DPI = 150
+PADDING = 2  # room for the 2pt card border
+BATCH_CARDS = 16  # cards per worker task
+EXPORT_SOURCES = svb.DRAWING_SOURCES + [os.path.abspath(__file__)]
+CARD_FILE = re.compile(r"^[a-z_]+-[0-9a-f]{16}\.(png|svg)$")
+
+
+def available():
+    """True if PyMuPDF is installed."""
+    return pymupdf is not None
+
+
+# ===== Cards =====
+# kind -> draw(c, record, autofit), drawing one card with its corner at (0, 0)
+
+def _draw_saint_ship(c, name, autofit):
+    svb.draw_card(c, 0, 0, name, svb.SAINT_SHIP_TEXT, autofit=autofit)
+
+
+def _draw_enemy_ship(c, number, autofit):
+    svb.draw_card(c, 0, 0, f"Enemy Ship {number}", svb.ENEMY_SHIP_TEXT, svb.dark_red, autofit)
+
+
+def _draw_catholic_action(c, text, autofit):
+    svb.draw_card(c, 0, 0, "Catholic Action", text, autofit=autofit)
+
+
+def _draw_enemy_action(c, text, autofit):
+    svb.draw_card(c, 0, 0, "Enemy Action", text, svb.dark_red, autofit)
+
+
+def _draw_virtue_question(c, question, autofit):
+    svb.draw_card_frame(c, 0, 0)
+    svb.draw_virtue_question_card(c, 0, 0, *question, autofit=autofit)
+
+
+def _draw_moral_choice(c, choice, autofit):
+    svb.draw_moral_choice_frame(c, 0, 0)
+    svb.draw_moral_choice_card(c, 0, 0, *choice, autofit=autofit)
+
+
+CARD_KINDS = {
+    "saint_ship": _draw_saint_ship,
+    "enemy_ship": _draw_enemy_ship,
+    "catholic_action": _draw_catholic_action,
+    "enemy_action": _draw_enemy_action,
+    "virtue_question": _draw_virtue_question,
+    "moral_choice": _draw_moral_choice,
+}
+
+
+def deck_cards(deck):
+    """Yield (kind, number, record) for every distinct card of deck, in print order."""
+    for number, name in enumerate(deck["saints"], 1):
+        yield "saint_ship", number, name
+    for number in range(1, svb.ENEMY_SHIP_COUNT + 1):
+        yield "enemy_ship", number, number
+    for number, text in enumerate(svb.CATHOLIC_ACTIONS, 1):
+        yield "catholic_action", number, text
+    for number, text in enumerate(svb.ENEMY_ACTIONS, 1):
+        yield "enemy_action", number, text
+    for number, question in enumerate(deck["virtue_questions"], 1):
+        yield "virtue_question", number, tuple(question)
+    for number, choice in enumerate(deck["moral_choices"], 1):
+        yield "moral_choice", number, tuple(choice)
+
+
+def card_filename(kind, record, autofit, fmt, dpi):
+    """Content-hashed file name for one card in one format."""
+    inputs = [kind, record, autofit, svb.font_resolver.font_signature(svb.use_fonts()), fmt,
+              dpi if fmt == "png" else None, code_fingerprint(EXPORT_SOURCES)]
+    digest = hashlib.sha256(json.dumps(inputs, default=repr).encode("utf-8")).hexdigest()
+    return f"{kind}-{digest[:16]}.{fmt}"
+
+
+def render_card_pdf(kind, record, autofit):
+    """One card as a single-page PDF, the card's size plus PADDING on each side."""
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(svb.CARD_WIDTH + 2 * PADDING, svb.CARD_HEIGHT + 2 * PADDING))
+    c.translate(PADDING, PADDING)
+    CARD_KINDS[kind](c, record, autofit)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def export_batch(cards, out_dir, formats, dpi, autofit):
+    """Render the cards (kind, record, filenames) whose files are missing; returns how many were drawn."""
+    svb.use_fonts()
+    drawn = 0
+    for kind, record, filenames in cards:
+        missing = [(fmt, name) for fmt, name in filenames.items()
+                   if not os.path.exists(os.path.join(out_dir, name))]
+        if not missing:
+            continue
+        page = pymupdf.open("pdf", render_card_pdf(kind, record, autofit))[0]
+        for fmt, name in missing:
+            if fmt == "png":
+                data = page.get_pixmap(dpi=dpi).tobytes("png")
+            else:
+                data = page.get_svg_image().encode("utf-8")
+            _write(os.path.join(out_dir, name), data)
+        drawn += 1
+    return drawn
+
+
+def export_cards(deck, out_dir=EXPORT_DIR, formats=FORMATS, dpi=DEFAULT_DPI, jobs=1, prune=True):
+    """Write every card of deck to out_dir as PNG/SVG files plus manifest.json.
+
+    Cards whose hashed files already exist are skipped; the rest are drawn
+    in batches of BATCH_CARDS, across jobs worker processes when jobs > 1.
+    With prune=True card files no longer in the manifest are deleted.
+    Returns (cards in manifest, cards drawn), or None without PyMuPDF.
+    """
+    if not available():
+        print("PyMuPDF is not installed (pip install pymupdf); card export needs it to rasterize cards.")
+        return None
+    bad = set(formats) - set(FORMATS)
+    if bad:
+        raise ValueError(f"unknown card formats: {', '.join(sorted(bad))}")
+    os.makedirs(out_dir, exist_ok=True)
+    autofit = deck["autofit"]
+    entries, cards = [], []
+    for kind, number, record in deck_cards(deck):
+        filenames = {fmt: card_filename(kind, record, autofit, fmt, dpi) for fmt in formats}
+        cards.append((kind, record, filenames))
+        entries.append(dict({"id": f"{kind}-{number}", "kind": kind}, **filenames))
+
+    batches = [cards[i:i + BATCH_CARDS] for i in range(0, len(cards), BATCH_CARDS)]
+    export = partial(export_batch, out_dir=out_dir, formats=formats, dpi=dpi, autofit=autofit)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            drawn = sum(pool.map(export, batches))
+    else:
+        drawn = sum(map(export, batches))
+
+    manifest = {"version": svb.VERSION, "dpi": dpi, "width": svb.CARD_WIDTH + 2 * PADDING,
+                "height": svb.CARD_HEIGHT + 2 * PADDING, "cards": entries}
+    _write(os.path.join(out_dir, "manifest.json"), json.dumps(manifest, indent=1).encode("utf-8"))
+    if prune:
+        current = {name for _, _, filenames in cards for name in filenames.values()}
+        for name in os.listdir(out_dir):
+            if CARD_FILE.match(name) and name not in current:
+                os.remove(os.path.join(out_dir, name))
+    return len(entries), drawn
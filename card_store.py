@@ -0,0 +1,410 @@
+# card_store.py
+# Compiled, memory-mapped columnar store of the question and moral choice banks.
+#
+# virtue_data.py parses virtues.js into one Python object per question, per
+# answer and per string, in every process that loads it. This module compiles
+# the parsed bank once into a binary file (.cache/cards-v1-<digest>.bin) and
+# reads it through mmap, so every process maps the same pages:
+#   - every distinct string is stored once (interned) in a string table and
+#     referenced by number;
+#   - each record field is a column of fixed-width integers (uint32 string
+#     numbers, uint8 levels), addressed by record number without parsing;
+#   - indexes list question numbers per (topic, subtopic, level) and moral
+#     choice numbers per (virtue, sub-virtue).
+# Columns are exposed as memoryviews over the map (no copies); strings are
+# decoded only when a card is actually drawn.
+#
+# QuestionCards and MoralChoiceCards are read-only sequences of the print
+# tuples load_print_deck used to build as lists. They pickle as the store
+# path plus a selection, so render workers re-map the file instead of
+# receiving copies of the text, and their repr names the store digest, which
+# is what the section cache hashes.
+#
+# Usage: python card_store.py [--synthetic 10000]
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+import virtue_data
+
+STORE_VERSION = 1
+MAGIC = b"SVCS"
+HEADER = struct.Struct("<4sIII")      # magic, version, byte order flag, section count
+SECTION = struct.Struct("<16sII")     # name, offset, length
+NO_STRING = 0xFFFFFFFF
+ALIGN = 8
+
+_stores = {}  # path -> CardStore, per process
+
+
+def store_path(digest):
+    return os.path.join(virtue_data.CACHE_DIR, f"cards-v{STORE_VERSION}-{digest[:16]}.bin")
+
+
+# ===== Compiling =====
+
+class _Strings:
+    """Interns strings to consecutive numbers."""
+
+    def __init__(self):
+        self.numbers = {}
+        self.offsets = array("I", [0])
+        self.data = bytearray()
+
+    def __call__(self, text):
+        if text is None:
+            return NO_STRING
+        number = self.numbers.get(text)
+        if number is None:
+            number = self.numbers[text] = len(self.numbers)
+            self.data += text.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return number
+
+
+def _index(keys):
+    """(key rows, items): items grouped by key, each key row being key + (start, count)."""
+    groups = {}
+    for item, key in enumerate(keys):
+        groups.setdefault(key, []).append(item)
+    rows, items = array("I"), array("I")
+    for key in sorted(groups):
+        rows.extend(key + (len(items), len(groups[key])))
+        items.extend(groups[key])
+    return rows, items
+
+
+def compile_store(data, path, digest=""):
+    """Write VirtueData data to path in the store format."""
+    s = _Strings()
+    s(digest)  # string 0 identifies the source
+    columns = {}
+
+    questions = [q for bank in (data.virtue_questions, data.gift_questions, data.fruit_questions) for q in bank]
+    categories = virtue_data.QUESTION_CATEGORIES
+    columns["q_category"] = array("B", (categories.index(q.category) for q in questions))
+    columns["q_level"] = array("B", (q.level for q in questions))
+    columns["q_correct"] = array("B", (q.correct for q in questions))
+    for field in ("topic", "subtopic", "q", "explanation"):
+        columns[f"q_{field}"] = array("I", (s(getattr(q, field)) for q in questions))
+    columns["q_header"] = array("I", (s(virtue_data.topic_label(data, q)) for q in questions))
+    starts, answers = array("I", [0]), array("I")
+    for q in questions:
+        answers.extend(s(a) for a in q.answers)
+        starts.append(len(answers))
+    columns["q_answer_start"], columns["q_answers"] = starts, answers
+    columns["qi_keys"], columns["qi_items"] = _index(
+        [(columns["q_category"][i], columns["q_topic"][i], columns["q_subtopic"][i], q.level)
+         for i, q in enumerate(questions)])
+
+    choices = data.moral_choices
+    for field in ("scenario", "lesser_good", "greater_good", "virtue", "sub", "explanation"):
+        columns[f"m_{field}"] = array("I", (s(getattr(m, field)) for m in choices))
+    columns["m_label"] = array("I", (s(virtue_data.sub_virtue_label(data, m.virtue, m.sub)) for m in choices))
+    columns["mi_keys"], columns["mi_items"] = _index(
+        [(columns["m_virtue"][i], columns["m_sub"][i]) for i in range(len(choices))])
+
+    columns["gifts"] = array("I", (s(v) for row in virtue_data.gift_rows(data) for v in row))
+    columns["fruits"] = array("I", (s(v) for row in virtue_data.fruit_rows(data) for v in row))
+    names = virtue_data.cardinal_virtue_names(data)
+    columns["v_names"] = array("I", (s(name) for name in names))
+    columns["v_sub_start"] = array("I", [0])
+    columns["v_subs"] = array("I")
+    for subs in names.values():
+        columns["v_subs"].extend(s(sub) for sub in subs)
+        columns["v_sub_start"].append(len(columns["v_subs"]))
+
+    columns["str_offsets"] = s.offsets
+    columns["str_data"] = s.data
+
+    directory, blobs = [], []
+    offset = HEADER.size + SECTION.size * len(columns)
+    for name, column in columns.items():
+        blob = bytes(column)
+        offset += -offset % ALIGN
+        directory.append(SECTION.pack(name.encode("ascii"), offset, len(blob)))
+        blobs.append((offset, blob))
+        offset += len(blob)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, STORE_VERSION, sys.byteorder == "little", len(columns)))
+        f.write(b"".join(directory))
+        for start, blob in blobs:
+            f.write(b"\0" * (start - f.tell()))
+            f.write(blob)
+    os.replace(tmp, path)
+
+
+# ===== Reading =====
+
+class CardStore:
+    """A compiled store mapped read-only; columns are memoryviews into the map."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, version, little, count = HEADER.unpack_from(view)
+        if magic != MAGIC or version != STORE_VERSION or bool(little) != (sys.byteorder == "little"):
+            raise ValueError(f"{path} is not a version {STORE_VERSION} card store for this machine")
+        self.columns = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            name = name.rstrip(b"\0").decode("ascii")
+            column = view[offset:offset + length]
+            self.columns[name] = column if name == "str_data" else column.cast(
+                "B" if name in ("q_category", "q_level", "q_correct") else "I")
+        for name, column in self.columns.items():
+            setattr(self, name, column)
+        self.digest = self.string(0)
+        self._strings = {}
+
+    def __len__(self):
+        return len(self.q_topic)
+
+    def raw_string(self, number):
+        """String number as a memoryview of its UTF-8 bytes (no copy)."""
+        return self.str_data[self.str_offsets[number]:self.str_offsets[number + 1]]
+
+    def string(self, number):
+        if number == NO_STRING:
+            return None
+        return str(self.raw_string(number), "utf-8")
+
+    def label(self, number):
+        """Like string(), memoized; for the few strings used as keys (topics, virtues)."""
+        text = self._strings.get(number)
+        if text is None and number != NO_STRING:
+            text = self._strings[number] = self.string(number)
+        return text
+
+    # ===== Records =====
+
+    def question(self, i):
+        """Question i as a virtue_data.Question."""
+        answers = tuple(self.string(n) for n in self.q_answers[self.q_answer_start[i]:self.q_answer_start[i + 1]])
+        return virtue_data.Question(virtue_data.QUESTION_CATEGORIES[self.q_category[i]],
+                                    self.label(self.q_topic[i]), self.label(self.q_subtopic[i]),
+                                    self.q_level[i], self.string(self.q_q[i]), answers,
+                                    self.q_correct[i], self.string(self.q_explanation[i]))
+
+    def question_card(self, i, rotation=0):
+        """Print tuple for question i, as virtue_data.question_card."""
+        answers = self.q_answers[self.q_answer_start[i]:self.q_answer_start[i + 1]]
+        shift = rotation % len(answers)
+        order = list(range(shift, len(answers))) + list(range(shift))
+        lines = "\n".join(f"{virtue_data.LETTERS[k]}) {self.string(answers[j])}" for k, j in enumerate(order))
+        correct = virtue_data.LETTERS[order.index(self.q_correct[i])]
+        return (self.string(self.q_header[i]), self.string(self.q_q[i]), lines, correct,
+                self.string(self.q_explanation[i]))
+
+    def moral_choice_card(self, i):
+        """(scenario, lesser, greater, virtue label) for moral choice i."""
+        return (self.string(self.m_scenario[i]), self.string(self.m_lesser_good[i]),
+                self.string(self.m_greater_good[i]), self.string(self.m_label[i]))
+
+    def question_keys(self, i):
+        """(category, topic, subtopic, level) of question i."""
+        return (virtue_data.QUESTION_CATEGORIES[self.q_category[i]], self.label(self.q_topic[i]),
+                self.label(self.q_subtopic[i]), self.q_level[i])
+
+    def question_ids(self):
+        """The web app's globalId ("category:index") of every question, by question number."""
+        ids = [None] * len(self)
+        local = [0] * len(virtue_data.QUESTION_CATEGORIES)
+        for i, category in enumerate(self.q_category):
+            ids[i] = f"{virtue_data.QUESTION_CATEGORIES[category]}:{local[category]}"
+            local[category] += 1
+        return ids
+
+    # ===== Indexes =====
+
+    def questions_for(self, category=None, topic=None, subtopic=None, level=None):
+        """Question numbers matching every given field, in bank order."""
+        items = []
+        keys = self.qi_keys
+        for row in range(0, len(keys), 6):
+            cat, top, sub, lvl, start, count = keys[row:row + 6]
+            if ((category is None or virtue_data.QUESTION_CATEGORIES[cat] == category)
+                    and (topic is None or self.label(top) == topic)
+                    and (subtopic is None or self.label(sub) == subtopic)
+                    and (level is None or lvl == level)):
+                items.extend(self.qi_items[start:start + count])
+        return sorted(items)
+
+    def moral_choices_for(self, virtue=None, sub=None):
+        """Moral choice numbers for a virtue (and sub-virtue), in bank order."""
+        items = []
+        keys = self.mi_keys
+        for row in range(0, len(keys), 4):
+            vir, s, start, count = keys[row:row + 4]
+            if (virtue is None or self.label(vir) == virtue) and (sub is None or self.label(s) == sub):
+                items.extend(self.mi_items[start:start + count])
+        return sorted(items)
+
+    def question_selection(self, categories=virtue_data.QUESTION_CATEGORIES, max_level=None):
+        """Question numbers printed for categories/max_level, in iter_question_cards order."""
+        wanted = [virtue_data.QUESTION_CATEGORIES.index(c) for c in categories]
+        return array("I", (i for cat in wanted for i in range(len(self))
+                           if self.q_category[i] == cat and (max_level is None or self.q_level[i] <= max_level)))
+
+    # ===== Print rows =====
+
+    def gift_rows(self):
+        g = self.gifts
+        return [tuple(self.string(n) for n in g[i:i + 3]) for i in range(0, len(g), 3)]
+
+    def fruit_rows(self):
+        f = self.fruits
+        return [tuple(self.string(n) for n in f[i:i + 2]) for i in range(0, len(f), 2)]
+
+    def cardinal_virtue_names(self):
+        return {self.string(name): [self.string(n) for n in
+                                    self.v_subs[self.v_sub_start[i]:self.v_sub_start[i + 1]]]
+                for i, name in enumerate(self.v_names)}
+
+
+def open_store(path=virtue_data.VIRTUES_JS):
+    """Return the CardStore for virtues.js at path, compiling it on first use.
+
+    Raises OSError or ValueError if virtues.js cannot be read or parsed.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    target = store_path(digest)
+    store = _stores.get(target)
+    if store is None:
+        try:
+            store = CardStore(target)
+        except (OSError, ValueError):
+            compile_store(virtue_data.load_virtue_data(path), target, digest)
+            store = CardStore(target)
+        _stores[target] = store
+    return store
+
+
+def _reopen(kind, path, items, rotation):
+    store = _stores.get(path) or _stores.setdefault(path, CardStore(path))
+    return kind(store, items, rotation)
+
+
+# ===== Print sequences =====
+
+class _Cards(Sequence):
+    """Read-only sequence of print tuples for selected records of a store."""
+
+    def __init__(self, store, items, rotation=0):
+        self.store = store
+        self.items = items
+        self.rotation = rotation  # position of items[0] in the whole printed deck
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, _, step = index.indices(len(self.items))
+            if step != 1:
+                return [self[i] for i in range(*index.indices(len(self.items)))]
+            return type(self)(self.store, self.items[index], self.rotation + start)
+        if index < 0:
+            index += len(self.items)
+        return self._card(self.items[index], self.rotation + index)
+
+    def __iter__(self):
+        for n, item in enumerate(self.items):
+            yield self._card(item, self.rotation + n)
+
+    def __reduce__(self):
+        return _reopen, (type(self), self.store.path, self.items, self.rotation)
+
+    def __repr__(self):
+        # Identifies the content exactly: the store digest names the source
+        # virtues.js, and the items and rotation name the cards.
+        items = hashlib.sha256(bytes(self.items)).hexdigest()[:16]
+        return f"{type(self).__name__}({self.store.digest[:16]}, {len(self.items)} items {items}, {self.rotation})"
+
+
+class QuestionCards(_Cards):
+    def _card(self, item, position):
+        return self.store.question_card(item, position)
+
+
+class QuestionRecords(_Cards):
+    """virtue_data.Question records rather than print tuples (for the question engine)."""
+
+    def _card(self, item, position):
+        return self.store.question(item)
+
+
+class MoralChoiceCards(_Cards):
+    def _card(self, item, position):
+        return self.store.moral_choice_card(item)
+
+
+def print_deck(store, categories=virtue_data.QUESTION_CATEGORIES, max_level=None):
+    """The full-bank print deck dict load_print_deck returns, backed by store."""
+    return {
+        "cardinal_virtues": store.cardinal_virtue_names(),
+        "gifts": store.gift_rows(),
+        "fruits": store.fruit_rows(),
+        "virtue_questions": QuestionCards(store, store.question_selection(categories, max_level)),
+        "moral_choices": MoralChoiceCards(store, array("I", range(len(store.m_scenario)))),
+    }
+
+
+def synthetic_data(items):
+    """virtues.js data with its question bank repeated to about items questions, for sizing."""
+    data = virtue_data.load_virtue_data()
+    questions = data.virtue_questions + data.gift_questions + data.fruit_questions
+    copies = []
+    for i in range(items):
+        q = questions[i % len(questions)]
+        copies.append(virtue_data.Question(q.category, q.topic, q.subtopic, q.level, f"{q.q} (#{i + 1})",
+                                           q.answers, q.correct, q.explanation))
+    fields = {name: getattr(data, name) for name in virtue_data.VirtueData.__slots__}
+    fields.update(virtue_questions=[q for q in copies if q.category == "cardinal"],
+                  gift_questions=[q for q in copies if q.category == "gift"],
+                  fruit_questions=[q for q in copies if q.category == "fruit"])
+    return virtue_data.VirtueData(*(fields[f] for f in virtue_data.VirtueData.__slots__))
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description="Compile the card store and compare it with parsed objects.")
+    parser.add_argument("--synthetic", type=int, help="size a bank of this many questions instead of virtues.js")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        data = synthetic_data(args.synthetic)
+        path = os.path.join(virtue_data.CACHE_DIR, f"cards-synthetic-{args.synthetic}.bin")
+        compile_store(data, path, f"synthetic-{args.synthetic}")
+    else:
+        path = open_store().path
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = CardStore(path)
+    opened = time.perf_counter() - start
+    deck = print_deck(store)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    objects = virtue_data.load_virtue_data() if not args.synthetic else synthetic_data(args.synthetic)
+    cards = list(virtue_data.iter_question_cards(objects)) + list(virtue_data.iter_moral_choice_cards(objects))
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{path}: {os.path.getsize(path):,} bytes mapped, {len(store):,} questions, "
+          f"{len(store.m_scenario):,} moral choices, {len(store.str_offsets) - 1:,} distinct strings")
+    print(f"opened in {opened * 1000:.2f} ms; per-process heap {store_bytes:,} bytes "
+          f"vs {object_bytes:,} bytes for parsed objects and card tuples")
@@ -0,0 +1,267 @@
+# font_resolver.py
+# Finds and registers the PDF body font on first use instead of at import.
+#
+# Fonts are looked up by file name in the directories listed in
+# STELLAR_VIRTUE_FONT_DIRS, the project's fonts/ folder, and the standard
+# Linux, Windows and macOS font directories. Parsing a TTF is the slow part of
+# registering it, so the parsed metrics (glyph widths, cmap, table directory
+# used for subsetting) are pickled to .cache/fonts/ keyed by the font file's
+# SHA-256; short-lived render workers load them instead of re-parsing.
+#
+# Characters the body font lacks (Polish letters in the Helvetica fallback,
+# Greek or Cyrillic anywhere) are drawn in the first font of their script's
+# fallback chain that has them. Coverage comes from a TrueType font's cmap,
+# or the WinAnsi code page for the built-in Type 1 fonts, and is looked up
+# once per (font, character) per process.
+
+import hashlib
+import json
+import os
+import pickle
+import unicodedata
+from weakref import WeakKeyDictionary
+
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTEncoding, TTFont, TTFontFace
+
+from virtue_data import CACHE_DIR, HERE
+
+FONT_CACHE_DIR = os.path.join(CACHE_DIR, "fonts")
+FALLBACK_FONT = "Helvetica"
+
+# Font name -> candidate file names, best first (matched case-insensitively)
+FONT_FILES = {
+    "CenturySchoolbook": ["CENSCBK.TTF", "C059-Roman.ttf", "texgyreschola-regular.ttf",
+                          "CenturySchoolbook.ttf"],
+    "DejaVuSerif": ["DejaVuSerif.ttf"],
+    "NotoSerif": ["NotoSerif-Regular.ttf"],
+    "LiberationSerif": ["LiberationSerif-Regular.ttf"],
+    "FreeSerif": ["FreeSerif.ttf"],
+    "DejaVuSans": ["DejaVuSans.ttf"],
+    "NotoSans": ["NotoSans-Regular.ttf"],
+    "Lato": ["Lato-Regular.ttf"],
+}
+
+# Unicode script (first word of a character's name) -> fallback fonts, best first
+FALLBACK_CHAINS = {
+    "LATIN": ["DejaVuSerif", "NotoSerif", "LiberationSerif", "FreeSerif", "DejaVuSans", "NotoSans", "Lato"],
+    "GREEK": ["DejaVuSerif", "NotoSerif", "FreeSerif", "DejaVuSans", "NotoSans"],
+    "CYRILLIC": ["DejaVuSerif", "NotoSerif", "LiberationSerif", "FreeSerif", "DejaVuSans", "NotoSans"],
+}
+DEFAULT_CHAIN = ["DejaVuSans", "NotoSans", "FreeSerif", "DejaVuSerif"]
+
+STANDARD_FONT_DIRS = [
+    os.path.join(HERE, "fonts"),
+    "~/.local/share/fonts",
+    "~/.fonts",
+    "/usr/local/share/fonts",
+    "/usr/share/fonts",
+    "C:/Windows/Fonts",
+    "~/Library/Fonts",
+    "/Library/Fonts",
+]
+
+# Bump when the cached metrics layout changes so stale caches are ignored.
+METRICS_VERSION = 1
+
+# name -> (registered font name, file digest or None), per process
+_resolved = {}
+# font -> {character: covered}, and (font, character) -> font to draw it in, per process
+_coverage = {}
+_fallbacks = {}
+_fallback_files = None
+
+
+def font_dirs():
+    """Directories searched for fonts: STELLAR_VIRTUE_FONT_DIRS first, then the standard ones."""
+    configured = os.environ.get("STELLAR_VIRTUE_FONT_DIRS", "")
+    dirs = [d for d in configured.split(os.pathsep) if d] + STANDARD_FONT_DIRS
+    return [os.path.expanduser(d) for d in dirs]
+
+
+def _index_path():
+    return os.path.join(FONT_CACHE_DIR, "index.json")
+
+
+def _write_atomic(path, data):
+    try:
+        os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _mtime(directory):
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+def find_font_file(name, dirs=None):
+    """Path of the first candidate file for font name in dirs, or None.
+
+    Lookups are remembered in .cache/fonts/index.json so later processes skip
+    the directory walk: a hit while the file still exists, a miss while no
+    directory searched has changed (adding a file or folder anywhere under
+    one changes the mtime of the directory it lands in).
+    """
+    dirs = font_dirs() if dirs is None else dirs
+    index_key = json.dumps([name, dirs])
+    try:
+        with open(_index_path()) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    entry = index.get(index_key)
+    if isinstance(entry, str) and os.path.isfile(entry):
+        return entry
+    if isinstance(entry, dict) and all(_mtime(d) == m for d, m in entry["missing"].items()):
+        return None
+
+    wanted = [candidate.lower() for candidate in FONT_FILES.get(name, [name + ".ttf"])]
+    best = None
+    searched = {}
+    for directory in dirs:
+        searched[directory] = _mtime(directory)
+        for root, _, files in os.walk(directory):
+            searched[root] = _mtime(root)
+            for filename in files:
+                rank = wanted.index(filename.lower()) if filename.lower() in wanted else None
+                if rank is not None and (best is None or rank < best[0]):
+                    best = (rank, os.path.join(root, filename))
+        if best is not None:
+            break
+    index[index_key] = {"missing": searched} if best is None else best[1]
+    _write_atomic(_index_path(), json.dumps(index, indent=1).encode("utf-8"))
+    return None if best is None else best[1]
+
+
+def _metrics_path(digest):
+    return os.path.join(FONT_CACHE_DIR, f"ttf-v{METRICS_VERSION}-{reportlab.Version}-{digest[:16]}.pickle")
+
+
+def _pdf_scale(units_per_em):
+    # Same mapping TTFontFile builds when parsing the head table
+    if units_per_em == 1000:
+        return lambda x: x
+    factor = 1000 / units_per_em
+    return lambda x: x * factor
+
+
+def load_ttf(name, path, use_cache=True):
+    """Return (TTFont, digest) for the TrueType file at path, from the metrics cache when possible."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_file = _metrics_path(digest)
+    if use_cache:
+        try:
+            with open(cache_file, "rb") as f:
+                font_state, face_state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            pass
+        else:
+            face = TTFontFace.__new__(TTFontFace)
+            face.__dict__.update(face_state, _ttf_data=raw, filename=path,
+                                 _pdfScale=_pdf_scale(face_state["unitsPerEm"]))
+            font = TTFont.__new__(TTFont)
+            font.__dict__.update(font_state, fontName=name, face=face, encoding=TTEncoding(),
+                                 state=WeakKeyDictionary())
+            return font, digest
+
+    font = TTFont(name, path)
+    if use_cache:
+        font_state = {k: v for k, v in vars(font).items() if k not in ("fontName", "face", "encoding", "state")}
+        face_state = {k: v for k, v in vars(font.face).items() if k not in ("_ttf_data", "_pdfScale", "filename")}
+        _write_atomic(cache_file, pickle.dumps((font_state, face_state), protocol=pickle.HIGHEST_PROTOCOL))
+    return font, digest
+
+
+def resolve_font(name, report=False):
+    """Register font name with reportlab and return the name to draw with.
+
+    Falls back to Helvetica when no file is found or it cannot be loaded;
+    with report=True that is printed. Resolved once per process.
+    """
+    if name not in _resolved:
+        path = find_font_file(name)
+        resolved = (FALLBACK_FONT, None)
+        reason = f"no {' / '.join(FONT_FILES.get(name, [name]))} in {os.pathsep.join(font_dirs())}"
+        if path:
+            try:
+                font, digest = load_ttf(name, path)
+                pdfmetrics.registerFont(font)
+                resolved = (name, digest)
+            except Exception as e:
+                reason = str(e)
+        _resolved[name] = resolved + (reason,)
+    font_name, _, reason = _resolved[name]
+    if report and font_name != name:
+        print(f"Font {name} unavailable ({reason}). Falling back to {FALLBACK_FONT}.")
+    return font_name
+
+
+def font_signature(name):
+    """Identifies a resolved font's exact file, for cache keys."""
+    for font_name, digest, _ in _resolved.values():
+        if font_name == name and digest:
+            return f"{name}:{digest[:16]}"
+    return name
+
+
+# ===== Fallback fonts =====
+
+def covers(font_name, char):
+    """True if the registered font font_name has a glyph for char."""
+    table = _coverage.get(font_name)
+    if table is None:
+        table = _coverage[font_name] = {}
+    covered = table.get(char)
+    if covered is None:
+        face = getattr(pdfmetrics.getFont(font_name), "face", None)
+        if hasattr(face, "charToGlyph"):
+            covered = ord(char) in face.charToGlyph
+        else:
+            try:
+                char.encode("cp1252")
+                covered = True
+            except UnicodeEncodeError:
+                covered = False
+        table[char] = covered
+    return covered
+
+
+def script(char):
+    """Unicode script of char as FALLBACK_CHAINS names it (e.g. "LATIN"), or None."""
+    return unicodedata.name(char, " ").split(" ")[0] or None
+
+
+def fallback_font(char, font_name):
+    """Font to draw char in: font_name if it has the glyph, else the first font of the
+    char's fallback chain that does (registered on first use). Falls back to font_name."""
+    key = (font_name, char)
+    found = _fallbacks.get(key)
+    if found is None:
+        found = font_name
+        if not covers(font_name, char):
+            for name in FALLBACK_CHAINS.get(script(char), DEFAULT_CHAIN):
+                if resolve_font(name) == name and covers(name, char):
+                    found = name
+                    break
+        _fallbacks[key] = found
+    return found
+
+
+def fallback_signature():
+    """The fallback font files present, for cache keys (looked up once per process)."""
+    global _fallback_files
+    if _fallback_files is None:
+        names = sorted({name for chain in [DEFAULT_CHAIN, *FALLBACK_CHAINS.values()] for name in chain})
+        paths = [(name, find_font_file(name)) for name in names]
+        _fallback_files = [(name, os.path.basename(path), os.path.getsize(path)) for name, path in paths if path]
+    return _fallback_files
@@ -39,13 +39,14 @@
     { name: 'Reinforce', text: 'Spawn 2 new enemy ships in a spawn sector.' }
   ];
 
-  const PLAYER_BASES = [1, 5, 9];
-  const ENEMY_SPAWNS = [4, 8, 12];
-  const TOTAL_SECTORS = 12;
+  // Board layout: the default 12-sector board until board.json (board_model.py) loads
+  let PLAYER_BASES = [1, 5, 9];
+  let ENEMY_SPAWNS = [4, 8, 12];
+  let TOTAL_SECTORS = 12;
   const MAX_DAYS = 9;
 
   // Sector adjacency (1-indexed, circular + connections)
-  const ADJACENCY = {};
+  let ADJACENCY = {};
   for (let i = 1; i <= 12; i++) {
     const adj = [];
     if (i > 1) adj.push(i - 1);
@@ -58,6 +59,30 @@
     ADJACENCY[i] = [...new Set(adj)];
   }
 
+  // Precomputed movement tables from board.json, indexed [from - 1][to - 1]
+  let BOARD_TABLES = null;
+
+  function applyBoard(board) {
+    PLAYER_BASES = board.bases;
+    ENEMY_SPAWNS = board.spawns;
+    TOTAL_SECTORS = board.sectors;
+    ADJACENCY = {};
+    Object.keys(board.adjacency).forEach(s => { ADJACENCY[s] = board.adjacency[s]; });
+    BOARD_TABLES = {
+      distances: board.distances,
+      toward: board.toward,
+      away: board.away,
+      nearestBase: board.nearestBase
+    };
+  }
+
+  function loadBoard() {
+    return fetch('board.json')
+      .then(r => (r.ok ? r.json() : null))
+      .then(board => { if (board) applyBoard(board); })
+      .catch(() => {}); // keep the built-in board
+  }
+
   // ===== Game State =====
   let state = null;
 
@@ -70,7 +95,7 @@
       maxHealth: 3,
       charge: 0,
       maxCharge: 3,
-      sector: PLAYER_BASES[i % 3],
+      sector: PLAYER_BASES[i % PLAYER_BASES.length],
       player: i % playerCount,
       acted: false,
       destroyed: false,
@@ -84,7 +109,7 @@
         name: `Enemy Ship ${i + 1}`,
         health: 2,
         maxHealth: 2,
-        sector: ENEMY_SPAWNS[i % 3],
+        sector: ENEMY_SPAWNS[i % ENEMY_SPAWNS.length],
         deployed: i < 6,
         destroyed: false
       });
@@ -97,6 +122,10 @@
       CARDINAL_VIRTUES[v].subVirtues.forEach(s => { cardinalProgress[v][s] = 0; });
     });
 
+    const basesIntact = {};
+    const baseHealth = {};
+    PLAYER_BASES.forEach(b => { basesIntact[b] = true; baseHealth[b] = 3; });
+
     return {
       playerCount,
       day: 1,
@@ -109,8 +138,8 @@
       totalEnemySpawned: 6,
       phase: 'play', // play, selectTarget, selectSector, virtueChallenge, moralChoice, gameOver
       message: null,
-      basesIntact: { 1: true, 5: true, 9: true },
-      baseHealth: { 1: 3, 5: 3, 9: 3 },
+      basesIntact,
+      baseHealth,
       sunday: false,
       // Cardinal virtues (acquired)
       cardinalProgress,
@@ -126,6 +155,7 @@
       fidelity: 1.0, // 0-1, maintained by praying regularly
       merit: 0,
       sentinelRoleId: (typeof SentinelAPI !== 'undefined' && SentinelAPI.getRoleId()) || null,
+      gameId: Date.now().toString(36) + Math.random().toString(36).slice(2, 8),
       prayedThisDay: false,
       // Teaching module progress (level-aware, category-agnostic)
       teachingProgress: (typeof TeachingModule !== 'undefined') ? TeachingModule.createProgressState() : null,
@@ -134,10 +164,65 @@
       answeredTeachingIds: [],       // new: globalId strings for TeachingModule
       currentQuestion: null,
       currentMoralChoice: null,
-      sundayReflectionIndex: 0
+      sundayReflectionIndex: 0,
+      // Every action and end of turn, as game_engine.py replays them
+      gameLog: []
     };
   }
 
+  // ===== Answer Log =====
+  // One JSON line per answered question and moral choice, kept in
+  // localStorage and downloaded from the game over screen for
+  // learner_analytics.py.
+  const LOG_KEY = 'stellar_virtue_log';
+  const LOG_MAX_LINES = 5000;
+
+  function logEvent(event) {
+    try {
+      const lines = (localStorage.getItem(LOG_KEY) || '').split('\n').filter(Boolean);
+      lines.push(JSON.stringify({ ...event, game: state.gameId, player: state.sentinelRoleId, day: state.day, t: Date.now() }));
+      localStorage.setItem(LOG_KEY, lines.slice(-LOG_MAX_LINES).join('\n'));
+    } catch { /* storage full or unavailable: the log is best effort */ }
+  }
+
+  function exportAnswerLog() {
+    const log = localStorage.getItem(LOG_KEY) || '';
+    if (!log) return;
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(new Blob([log + '\n'], { type: 'application/x-ndjson' }));
+    link.download = `stellar-virtue-log-${new Date().toISOString().slice(0, 10)}.jsonl`;
+    link.click();
+    URL.revokeObjectURL(link.href);
+  }
+
+  // ===== Game Log =====
+  // The whole game in game_engine.py's event format: one object per action
+  // and end of turn, with the random outcomes it drew (question, card,
+  // removed, choice, enemy, target, preview). Downloaded from the game over
+  // screen; `python game_engine.py audit` replays it and recomputes merit.
+  function recordAction(action, ship, fields) {
+    const event = { a: action };
+    if (ship) event.ship = ship.id;
+    Object.assign(event, fields);
+    state.gameLog.push(event);
+    return event;
+  }
+
+  function recordOutcome(event, key, value) {
+    (event[key] = event[key] || []).push(value);
+  }
+
+  function exportGameLog() {
+    if (!state || state.gameLog.length === 0) return;
+    const header = { game: state.gameId, players: state.playerCount };
+    const lines = [header, ...state.gameLog].map(e => JSON.stringify(e));
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(new Blob([lines.join('\n') + '\n'], { type: 'application/x-ndjson' }));
+    link.download = `stellar-virtue-game-${state.gameId}.jsonl`;
+    link.click();
+    URL.revokeObjectURL(link.href);
+  }
+
   // ===== Virtue Helpers =====
   function isSubVirtueMastered(virtue, sub) {
     return state.cardinalProgress[virtue] && state.cardinalProgress[virtue][sub] >= 2;
@@ -272,6 +357,13 @@
 
     const correct = answerIndex === q.correct;
     const ship = state.playerShips[state.selectedShip];
+    // Prayer questions come from the cardinal bank, whose globalIds are 'cardinal:<VIRTUE_QUESTIONS index>'
+    const qIndex = q.globalId ? Number(q.globalId.split(':')[1]) : q.index;
+    recordAction('pray', ship, { question: [qIndex], answer: answerIndex });
+    logEvent({
+      type: 'answer', question: q.globalId || `cardinal:${q.index}`, category: q.category || 'cardinal',
+      topic: q.topic || q.virtue, subtopic: q.subtopic || q.sub || null, level: q.level || 1, correct
+    });
 
     if (correct) {
       // Track via TeachingModule if available
@@ -326,8 +418,8 @@
 
   // ===== Moral Choice System (for attacks) =====
   function startMoralChoice(ship) {
-    const choice = MORAL_CHOICES[Math.floor(Math.random() * MORAL_CHOICES.length)];
-    state.currentMoralChoice = { ...choice, shipId: ship.id };
+    const index = Math.floor(Math.random() * MORAL_CHOICES.length);
+    state.currentMoralChoice = { ...MORAL_CHOICES[index], index, shipId: ship.id };
     state.phase = 'moralChoice';
     showMoralChoice(state.currentMoralChoice);
   }
@@ -337,9 +429,11 @@
     if (!mc) return;
     const ship = state.playerShips[mc.shipId];
     if (!ship) return;
+    logEvent({ type: 'moral_choice', choice: mc.index, virtue: mc.virtue, sub: mc.sub, greater_good: choseGreaterGood });
 
     const enemies = state.enemyShips.filter(e => e.sector === ship.sector && e.deployed && !e.destroyed);
     if (enemies.length === 0) { state.phase = 'play'; return; }
+    recordAction('attack', ship, { choice: [mc.index], greater_good: choseGreaterGood });
 
     let dmg = Math.max(1, ship.charge);
     // Justice bonus: +1 attack damage
@@ -379,6 +473,7 @@
 
   // ===== Sunday Rest System =====
   function doSundayRest() {
+    recordAction('sundayRest');
     // Auto-heal all ships +2
     state.playerShips.filter(s => !s.destroyed).forEach(s => {
       s.health = Math.min(s.maxHealth, s.health + 2);
@@ -426,15 +521,16 @@
     const cx = w / 2;
     const cy = h / 2;
     const radius = Math.min(w, h) * 0.38;
-    const sectorR = Math.min(w, h) * 0.07;
+    // 0.07 of the board on 12 sectors, smaller on larger boards so circles do not overlap
+    const sectorR = Math.min(w, h) * Math.min(0.07, 0.84 / TOTAL_SECTORS);
 
     boardLayout = [];
     // Earth at center
     boardLayout.push({ sector: 0, x: cx, y: cy, r: sectorR * 0.9, label: 'Earth' });
 
-    // 12 sectors in a circle
-    for (let i = 0; i < 12; i++) {
-      const angle = (i * Math.PI * 2) / 12 - Math.PI / 2;
+    // Sectors in a circle
+    for (let i = 0; i < TOTAL_SECTORS; i++) {
+      const angle = (i * Math.PI * 2) / TOTAL_SECTORS - Math.PI / 2;
       boardLayout.push({
         sector: i + 1,
         x: cx + Math.cos(angle) * radius,
@@ -454,25 +550,21 @@
     // Draw connections
     ctx.strokeStyle = '#1e2a3f';
     ctx.lineWidth = 1;
-    for (let i = 1; i <= 12; i++) {
+    for (let i = 1; i <= TOTAL_SECTORS; i++) {
       const a = boardLayout[i];
-      // Connection to next sector
-      const next = (i % 12) + 1;
-      const b = boardLayout[next];
-      ctx.beginPath();
-      ctx.moveTo(a.x, a.y);
-      ctx.lineTo(b.x, b.y);
-      ctx.stroke();
-      // Connection through Earth
-      const opp = ((i - 1 + 6) % 12) + 1;
-      if (opp > i) {
-        const c = boardLayout[opp];
+      ADJACENCY[i].forEach(j => {
+        if (j <= i) return;
+        const b = boardLayout[j];
         ctx.beginPath();
         ctx.moveTo(a.x, a.y);
-        ctx.lineTo(boardLayout[0].x, boardLayout[0].y);
-        ctx.lineTo(c.x, c.y);
+        const ringDist = Math.abs(i - j);
+        if (ringDist !== 1 && ringDist !== TOTAL_SECTORS - 1) {
+          // Connection through Earth
+          ctx.lineTo(boardLayout[0].x, boardLayout[0].y);
+        }
+        ctx.lineTo(b.x, b.y);
         ctx.stroke();
-      }
+      });
     }
 
     // Draw sectors
@@ -684,7 +776,7 @@
 
       case 'drawCard':
         ship.acted = true;
-        drawCatholicCard();
+        drawCatholicCard(recordAction('drawCard', ship));
         break;
 
       case 'move':
@@ -705,6 +797,7 @@
 
       case 'charge':
         if (ship.charge < ship.maxCharge) {
+          recordAction('charge', ship);
           ship.charge++;
           ship.acted = true;
           showMessage(`${ship.name} charges up! (${ship.charge}/${ship.maxCharge})`);
@@ -713,6 +806,7 @@
 
       case 'repair':
         if (ship.health < ship.maxHealth) {
+          recordAction('repair', ship);
           ship.health++;
           ship.acted = true;
           showMessage(`${ship.name} repairs. (${ship.health}/${ship.maxHealth} HP)`);
@@ -720,6 +814,7 @@
         break;
 
       case 'rest':
+        recordAction('rest', ship);
         if (ship.health < ship.maxHealth) ship.health++;
         ship.acted = true;
         showMessage(`${ship.name} rests. Healed to ${ship.health}/${ship.maxHealth} HP.`);
@@ -731,6 +826,7 @@
 
       case 'virtueHeal':
         if (state.virtuePoints >= 2) {
+          recordAction('virtueHeal', ship);
           state.virtuePoints -= 2;
           ship.health = Math.min(ship.maxHealth, ship.health + 2);
           ship.acted = true;
@@ -742,13 +838,14 @@
     updateUI();
   }
 
-  function drawCatholicCard() {
+  function drawCatholicCard(event) {
     const card = CATHOLIC_ACTIONS[Math.floor(Math.random() * CATHOLIC_ACTIONS.length)];
+    recordOutcome(event, 'card', card.effect);
     showCard('Catholic Action', `${card.name}: ${card.text}`);
-    applyCatholicCard(card);
+    applyCatholicCard(card, event);
   }
 
-  function applyCatholicCard(card) {
+  function applyCatholicCard(card, event) {
     switch (card.effect) {
       case 'virtue2':
         state.virtuePoints += 2;
@@ -766,6 +863,7 @@
         const deployed = state.enemyShips.filter(e => e.deployed && !e.destroyed);
         if (deployed.length > 0) {
           const target = deployed[Math.floor(Math.random() * deployed.length)];
+          recordOutcome(event, 'removed', target.id);
           target.destroyed = true;
           state.enemiesDefeated++;
         }
@@ -782,14 +880,15 @@
       case 'virtue1draw':
         state.virtuePoints += 1;
         // Draw another card after dismissing this one
-        setTimeout(() => drawCatholicCard(), 500);
+        setTimeout(() => drawCatholicCard(event), 500);
         break;
     }
   }
 
   // ===== Enemy Turn =====
-  function enemyTurn() {
+  function enemyTurn(event) {
     const card = state.prudencePreview || ENEMY_ACTIONS[Math.floor(Math.random() * ENEMY_ACTIONS.length)];
+    recordOutcome(event, 'enemy', card.name);
     state.prudencePreview = null;
     showCard('Enemy Action', `${card.name}: ${card.text}`);
 
@@ -810,6 +909,7 @@
           const targets = state.playerShips.filter(s => s.sector === e.sector && !s.destroyed);
           if (targets.length > 0) {
             const t = targets[Math.floor(Math.random() * targets.length)];
+            recordOutcome(event, 'target', t.id);
             let dmg = 1;
             // Fortitude bonus: reduce incoming damage by 1 (min 0)
             if (state.cardinalsMastered.includes('fortitude')) dmg = Math.max(0, dmg - 1);
@@ -861,6 +961,11 @@
   }
 
   function findNearestBase(sector) {
+    if (BOARD_TABLES) {
+      let mask = 0;
+      PLAYER_BASES.forEach((b, bit) => { if (state.basesIntact[b]) mask |= 1 << bit; });
+      return BOARD_TABLES.nearestBase[mask][sector - 1];
+    }
     let best = null;
     let bestDist = Infinity;
     PLAYER_BASES.forEach(b => {
@@ -872,11 +977,13 @@
   }
 
   function sectorDistance(a, b) {
+    if (BOARD_TABLES) return BOARD_TABLES.distances[a - 1][b - 1];
     const diff = Math.abs(a - b);
-    return Math.min(diff, 12 - diff);
+    return Math.min(diff, TOTAL_SECTORS - diff);
   }
 
   function findPathToward(from, to) {
+    if (BOARD_TABLES) return BOARD_TABLES.toward[from - 1][to - 1];
     if (from === to) return from;
     const adj = ADJACENCY[from];
     let best = from;
@@ -889,6 +996,7 @@
   }
 
   function findPathAway(from, to) {
+    if (BOARD_TABLES) return BOARD_TABLES.away[from - 1][to - 1];
     const adj = ADJACENCY[from];
     let best = from;
     let bestDist = sectorDistance(from, to);
@@ -958,9 +1066,13 @@
       return;
     }
 
+    // Sunday's end is part of its sundayRest event
+    const event = recordAction('endTurn');
+
     // Enemy phase (after player acts, except Lauds and Compline)
     if (turn !== 'Lauds' && turn !== 'Compline') {
-      enemyTurn();
+      enemyTurn(event);
+      if (state.phase === 'gameOver') return;
     }
 
     // Advance turn
@@ -982,6 +1094,7 @@
     if (state.cardinalsMastered.includes('prudence') && !state.sunday &&
         nextTurn !== 'Lauds' && nextTurn !== 'Compline') {
       const preview = ENEMY_ACTIONS[Math.floor(Math.random() * ENEMY_ACTIONS.length)];
+      recordOutcome(event, 'preview', preview.name);
       state.prudencePreview = preview;
       showCard('Prudence Foresight', `Enemy plans: ${preview.name} — ${preview.text}`);
     }
@@ -1012,6 +1125,7 @@
     meritEl.classList.add('hidden');
     if (state.sentinelRoleId && state.merit > 0 && typeof SentinelAPI !== 'undefined') {
       SentinelAPI.submitMerit(state.merit, {
+        game: state.gameId,
         won,
         day: Math.min(state.day, MAX_DAYS),
         enemies_defeated: state.enemiesDefeated,
@@ -1269,6 +1383,7 @@
     if (state.phase === 'selectSector') {
       const ship = state.playerShips[state.selectedShip];
       if (state.selectableSectors && state.selectableSectors.includes(sector)) {
+        recordAction('move', ship, { to: sector });
         ship.sector = sector;
         ship.acted = true;
         state.phase = 'play';
@@ -1281,6 +1396,8 @@
 
   // ===== Event Listeners =====
   function init() {
+    const boardReady = loadBoard();
+
     // Player count selection
     document.querySelectorAll('.player-btn').forEach(btn => {
       btn.addEventListener('click', () => {
@@ -1292,9 +1409,11 @@
     // Start game
     document.getElementById('start-btn').addEventListener('click', () => {
       const count = parseInt(document.querySelector('.player-btn.selected').dataset.count);
-      state = newState(count);
-      showScreen('game-screen');
-      updateUI();
+      boardReady.then(() => {
+        state = newState(count);
+        showScreen('game-screen');
+        updateUI();
+      });
     });
 
     // Rules
@@ -1372,6 +1491,8 @@
       state = null;
       showScreen('title-screen');
     });
+    document.getElementById('export-log-btn').addEventListener('click', exportAnswerLog);
+    document.getElementById('export-game-btn').addEventListener('click', exportGameLog);
 
     // === Sentinel Ops login/register ===
     function updateSentinelStatus(text, online) {
@@ -0,0 +1,943 @@
+# game_engine.py
+# Event-sourced Stellar Virtue rules, for replaying and auditing games.
+#
+# A game is its event log: every performAction (pray, drawCard, move, attack,
+# charge, repair, rest, virtueHeal, sundayRest) and every endTurn is one JSON
+# object, together with the random outcomes it drew (question, Catholic
+# Action cards, enemy card, Assault targets, Prudence preview). game.js
+# records this log as it plays (Download Game Log on the game over screen),
+# and `simulate` writes it for synthetic games. Applying the log to a new
+# game reproduces it, checking each event against the rules on the way, with
+# no random generator involved. Questions are the one outcome taken as
+# given: TeachingModule picks them by level and its own mastery record, so
+# any cardinal question is accepted. A prayer logs the answer given, not
+# whether it was right; that is looked up in virtues.js, so an edited log
+# cannot turn a wrong answer into merit.
+#
+# GameState keeps ships, enemies, bases and sub-virtue progress as small
+# arrays plus ints in __slots__. Every SNAPSHOT_EVERY events GameLog keeps a
+# snapshot that shares those arrays with the live state; whichever side
+# writes a column next copies it first, so a snapshot costs only the columns
+# that changed since the previous one. The state after any event is its
+# snapshot plus fewer than SNAPSHOT_EVERY events, and a turn is found by
+# bisecting the (day, turn) at which each turn started.
+#
+# Usage: python game_engine.py simulate [--games 1000] [--seed 1] [--output games/]
+#        python game_engine.py replay games/<id>.jsonl [--day 3 --turn Sext] [--check]
+#        python game_engine.py audit games/ [--scores tournament.csv] [--ledger]
+
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+
+from balance_sim import (ADJACENCY, BASE_HEALTH, BOARD, CATHOLIC_EFFECTS, ENEMY_ACTIONS, ENEMY_SHIPS,
+                         ENEMY_SPAWNS, MAX_DAYS, P_CORRECT_ANSWER, P_GREATER_GOOD, PLAYER_BASES,
+                         PLAYER_SHIPS, STARTING_ENEMIES, THEOLOGICAL_VIRTUES, TURNS)
+from merit_sync import read_scoresheet
+from virtue_data import load_virtue_data
+
+SNAPSHOT_EVERY = 32
+# Games whose every turn `simulate` rebuilds, with and without snapshots
+REPLAY_SAMPLE = 50
+# Fidelity in tenths: game.js's 1.0 minus 0.1 per missed prayer, without float drift
+FIDELITY = 10
+ENEMY_TURNS = TURNS[1:-1]
+TURN_ENDS = ("endTurn", "sundayRest")
+ACTION_TURNS = {
+    "pray": ("Lauds", "None"),
+    "drawCard": ("Prime",),
+    "move": ("Terce", "Vespers"),
+    "attack": ("Terce", "Vespers"),
+    "charge": ("Sext",),
+    "repair": ("Sext",),
+    "virtueHeal": ("None",),
+    "rest": ("Compline",),
+}
+PLAYING, WON, LOST = 0, 1, -1
+RESULTS = {PLAYING: "playing", WON: "won", LOST: "lost"}
+
+# Bits of ship_flags and enemy_flags
+DESTROYED = 1
+ACTED = 2
+DEPLOYED = 2
+
+# ===== Virtue tables (from virtues.js) =====
+
+DATA = load_virtue_data()
+CARDINAL_VIRTUES = list(DATA.cardinal_virtues)
+SUB_VIRTUES = [(v, s) for v in CARDINAL_VIRTUES for s in DATA.cardinal_virtues[v].sub_virtues]
+SUB_INDEX = {key: i for i, key in enumerate(SUB_VIRTUES)}
+# [start, stop) of each cardinal virtue's sub-virtues in SUB_VIRTUES
+SUB_RANGES = []
+for _subs in (DATA.cardinal_virtues[v].sub_virtues for v in CARDINAL_VIRTUES):
+    _start = SUB_RANGES[-1][1] if SUB_RANGES else 0
+    SUB_RANGES.append((_start, _start + len(_subs)))
+QUESTIONS = [(q.topic, q.subtopic) for q in DATA.virtue_questions]
+MORAL_CHOICES = [(m.virtue, m.sub) for m in DATA.moral_choices]
+
+
+def _requirement(condition):
+    """A gift's perfects or a fruit's unlockCondition as (kind, index, threshold)."""
+    if condition in THEOLOGICAL_VIRTUES:
+        return ("theological", THEOLOGICAL_VIRTUES.index(condition), 3)
+    if condition in CARDINAL_VIRTUES:
+        return ("mastered", CARDINAL_VIRTUES.index(condition), 0)
+    if condition.endswith(" mastered"):
+        return _requirement(condition.split(" ")[0])
+    name, threshold = condition.split(" >= ")
+    if "." in name:
+        return ("sub", SUB_INDEX[tuple(name.split("."))], int(threshold))
+    return ("theological", THEOLOGICAL_VIRTUES.index(name), int(threshold))
+
+
+GIFTS = [(g.id, _requirement(g.perfects)) for g in DATA.gifts]
+FRUITS = [(f.id, _requirement(f.unlock_condition)) for f in DATA.fruits]
+
+
+# ===== State =====
+
+COLUMNS = ("ship_health", "ship_max_health", "ship_charge", "ship_max_charge", "ship_sector", "ship_flags",
+           "enemy_health", "enemy_sector", "enemy_flags", "base_health", "progress", "theological")
+SCALARS = ("players", "day", "turn", "sunday", "prayed", "virtue_points", "enemies_defeated", "spawned",
+           "grace", "fidelity", "merit", "reflection", "preview", "mastered", "gifts", "fruits", "bases", "result")
+_COLUMN_BIT = {name: 1 << i for i, name in enumerate(COLUMNS)}
+
+
+class GameState:
+    """One game as in game.js newState(): a column array per ship, enemy, base and
+    sub-virtue field, and ints for the rest (mastered, gifts, fruits and bases are bitmasks).
+    Columns may be shared with snapshots, so rules write through writable()."""
+    __slots__ = COLUMNS + SCALARS + ("_owned",)
+
+    def __init__(self, players=4):
+        if not 1 <= players <= PLAYER_SHIPS:
+            raise ValueError(f"players must be 1-{PLAYER_SHIPS}, got {players}")
+        self.ship_health = array("b", [3] * PLAYER_SHIPS)
+        self.ship_max_health = array("b", [3] * PLAYER_SHIPS)
+        self.ship_charge = array("b", [1] * PLAYER_SHIPS)
+        self.ship_max_charge = array("b", [3] * PLAYER_SHIPS)
+        self.ship_sector = array("b", [PLAYER_BASES[i % len(PLAYER_BASES)] for i in range(PLAYER_SHIPS)])
+        self.ship_flags = array("B", [0] * PLAYER_SHIPS)
+        self.enemy_health = array("b", [2] * ENEMY_SHIPS)
+        self.enemy_sector = array("b", [ENEMY_SPAWNS[i % len(ENEMY_SPAWNS)] for i in range(ENEMY_SHIPS)])
+        self.enemy_flags = array("B", [DEPLOYED if i < STARTING_ENEMIES else 0 for i in range(ENEMY_SHIPS)])
+        self.base_health = array("b", [BASE_HEALTH] * len(PLAYER_BASES))
+        self.progress = array("b", [0] * len(SUB_VIRTUES))
+        self.theological = array("b", [0] * len(THEOLOGICAL_VIRTUES))
+        self.players = players
+        self.day = 1
+        self.turn = 0
+        self.sunday = False
+        self.prayed = False
+        self.virtue_points = 0
+        self.enemies_defeated = 0
+        self.spawned = STARTING_ENEMIES
+        self.grace = 0
+        self.fidelity = FIDELITY
+        self.merit = 0
+        self.reflection = 0
+        self.preview = None
+        self.mastered = 0
+        self.gifts = 0
+        self.fruits = 0
+        self.bases = (1 << len(PLAYER_BASES)) - 1
+        self.result = PLAYING
+        self._owned = (1 << len(COLUMNS)) - 1
+
+    def writable(self, name):
+        """Column name, copied first if a snapshot still shares it."""
+        column = getattr(self, name)
+        bit = _COLUMN_BIT[name]
+        if not self._owned & bit:
+            column = column[:]
+            setattr(self, name, column)
+            self._owned |= bit
+        return column
+
+    def fork(self):
+        """A copy sharing every column with this state; either copies a column before writing it."""
+        other = GameState.__new__(GameState)
+        for name in COLUMNS + SCALARS:
+            setattr(other, name, getattr(self, name))
+        other._owned = self._owned = 0
+        return other
+
+    def __eq__(self, other):
+        return isinstance(other, GameState) and all(
+            getattr(self, name) == getattr(other, name) for name in COLUMNS + SCALARS)
+
+    # ----- queries -----
+
+    def alive(self, ship):
+        return not self.ship_flags[ship] & DESTROYED
+
+    def active_enemies(self, sector=None):
+        """Deployed, undestroyed enemies (in sector, if given) in enemyShips order."""
+        return [e for e in range(ENEMY_SHIPS)
+                if self.enemy_flags[e] == DEPLOYED and (sector is None or self.enemy_sector[e] == sector)]
+
+    def has(self, virtue):
+        """Whether a cardinal virtue is mastered or a theological virtue received."""
+        if virtue in THEOLOGICAL_VIRTUES:
+            return self.theological[THEOLOGICAL_VIRTUES.index(virtue)] >= 3
+        return bool(self.mastered & (1 << CARDINAL_VIRTUES.index(virtue)))
+
+    def summary(self):
+        """The state as a JSON-able dict, for reports."""
+        def bits(mask, names):
+            return [name for i, name in enumerate(names) if mask & (1 << i)]
+        return {
+            "day": self.day,
+            "turn": "Sunday" if self.sunday else TURNS[self.turn],
+            "result": RESULTS[self.result],
+            "merit": self.merit,
+            "grace": self.grace,
+            "fidelity": self.fidelity / FIDELITY,
+            "virtue_points": self.virtue_points,
+            "enemies_defeated": self.enemies_defeated,
+            "enemies_active": len(self.active_enemies()),
+            "ships": [{"health": self.ship_health[i], "charge": self.ship_charge[i], "sector": self.ship_sector[i]}
+                      for i in range(PLAYER_SHIPS) if self.alive(i)],
+            "bases": {base: self.base_health[b] for b, base in enumerate(PLAYER_BASES) if self.bases & (1 << b)},
+            "cardinals_mastered": bits(self.mastered, CARDINAL_VIRTUES),
+            "theological": dict(zip(THEOLOGICAL_VIRTUES, self.theological)),
+            "gifts": bits(self.gifts, [gift for gift, _ in GIFTS]),
+            "fruits": bits(self.fruits, [fruit for fruit, _ in FRUITS]),
+        }
+
+
+# ===== Outcomes =====
+
+class _Recorded:
+    """Random outcomes read back from a logged event, each checked against what was possible."""
+
+    def __init__(self, event):
+        self.event = event
+        self.used = {}
+
+    def __call__(self, key, options):
+        values = self.event.get(key) or ()
+        n = self.used.get(key, 0)
+        if n >= len(values):
+            raise ValueError(f"{self.event['a']}: missing {key} outcome")
+        value = values[n]
+        if value not in options:
+            raise ValueError(f"{self.event['a']}: {key} {value!r} is not possible here")
+        self.used[key] = n + 1
+        return value
+
+    def done(self):
+        for key in ("question", "choice", "card", "removed", "enemy", "target", "preview"):
+            if len(self.event.get(key) or ()) != self.used.get(key, 0):
+                raise ValueError(f"{self.event['a']}: unused {key} outcome")
+
+
+class _Draw(_Recorded):
+    """Random outcomes for a live game: any the event already names are checked as when
+    replaying, the rest are picked from rng and recorded in the event."""
+
+    def __init__(self, event, rng):
+        super().__init__(event)
+        self.rng = rng
+
+    def __call__(self, key, options):
+        values = self.event.setdefault(key, [])
+        n = self.used.get(key, 0)
+        if n < len(values):
+            return super().__call__(key, options)
+        values.append(self.rng.choice(options))
+        self.used[key] = n + 1
+        return values[n]
+
+
+# ===== Rules (matching game.js) =====
+
+def _heal(st, ships, amount):
+    health = st.writable("ship_health")
+    for i in ships:
+        health[i] = min(st.ship_max_health[i], health[i] + amount)
+
+
+def _damage(st, ship, dmg):
+    health = st.writable("ship_health")
+    health[ship] -= dmg
+    if health[ship] <= 0:
+        health[ship] = 0
+        st.writable("ship_flags")[ship] |= DESTROYED
+
+
+def _living(st, sectors=None):
+    return [i for i in range(PLAYER_SHIPS) if st.alive(i) and (sectors is None or st.ship_sector[i] in sectors)]
+
+
+def _check_mastery(st):
+    """checkVirtueMastery: cardinal mastery, theological bonuses, gifts and fruits."""
+    for v, (start, stop) in enumerate(SUB_RANGES):
+        if min(st.progress[start:stop]) >= 2:
+            st.mastered |= 1 << v
+    if st.has("faith") and min(st.ship_max_charge) < 4:
+        max_charge = st.writable("ship_max_charge")
+        for i in range(PLAYER_SHIPS):
+            max_charge[i] = 4
+    if st.has("hope"):
+        for i in _living(st):
+            if st.ship_max_health[i] != 4:
+                st.writable("ship_max_health")[i] = 4
+    for g, (_, requirement) in enumerate(GIFTS):
+        if not st.gifts & (1 << g) and _met(st, requirement):
+            st.gifts |= 1 << g
+    for f, (_, requirement) in enumerate(FRUITS):
+        if not st.fruits & (1 << f) and _met(st, requirement):
+            st.fruits |= 1 << f
+            st.merit += 1
+
+
+def _met(st, requirement):
+    kind, index, threshold = requirement
+    if kind == "mastered":
+        return bool(st.mastered & (1 << index))
+    if kind == "sub":
+        return st.progress[index] >= threshold
+    return st.theological[index] >= threshold
+
+
+def _grow(st, virtue, sub):
+    k = SUB_INDEX.get((virtue, sub))
+    if k is not None:
+        progress = st.writable("progress")
+        progress[k] = min(2, progress[k] + 1)
+
+
+def _acting_ship(st, event):
+    """The ship an action names, after checking it may act now."""
+    action = event["a"]
+    if st.sunday:
+        raise ValueError(f"{action}: Sunday is rest (only sundayRest)")
+    if TURNS[st.turn] not in ACTION_TURNS[action]:
+        raise ValueError(f"{action} is not allowed at {TURNS[st.turn]}")
+    ship = event.get("ship")
+    if not isinstance(ship, int) or not 0 <= ship < PLAYER_SHIPS:
+        raise ValueError(f"{action}: no such ship {ship!r}")
+    if not st.alive(ship):
+        raise ValueError(f"{action}: ship {ship} is destroyed")
+    if st.ship_flags[ship] & ACTED:
+        raise ValueError(f"{action}: ship {ship} already acted this turn")
+    return ship
+
+
+def _acted(st, ship):
+    st.writable("ship_flags")[ship] |= ACTED
+
+
+def _pray(st, event, outcome):
+    """startVirtueChallenge + answerVirtueQuestion."""
+    ship = _acting_ship(st, event)
+    # TeachingModule picks by level and its own mastery record, so any cardinal question may come up
+    q = outcome("question", range(len(QUESTIONS)))
+    question = DATA.virtue_questions[q]
+    # The answer given, not whether it was right: that is looked up here
+    answer = event.get("answer")
+    if not isinstance(answer, int) or not 0 <= answer < len(question.answers):
+        raise ValueError(f"pray: no such answer {answer!r} to question {q}")
+    virtue, sub = QUESTIONS[q]
+    st.prayed = True
+    if answer == question.correct:
+        _grow(st, virtue, sub)
+        st.grace += 1
+        st.merit += 1
+        # Charity bonus: heal adjacent allies when praying
+        if st.has("charity"):
+            _heal(st, _living(st, ADJACENCY[st.ship_sector[ship]]), 1)
+        _check_mastery(st)
+    else:
+        st.virtue_points += 1
+    _acted(st, ship)
+
+
+def _draw_card(st, event, outcome):
+    """drawCatholicCard / applyCatholicCard; Lectio Divina draws again."""
+    ship = _acting_ship(st, event)
+    _acted(st, ship)
+    effect = "virtue1draw"
+    while effect == "virtue1draw":
+        effect = outcome("card", CATHOLIC_EFFECTS)
+        if effect == "virtue2":
+            st.virtue_points += 2
+        elif effect == "healSector":
+            _heal(st, _living(st, (st.ship_sector[ship],)), 1)
+        elif effect == "removeEnemy":
+            deployed = st.active_enemies()
+            if deployed:
+                target = outcome("removed", deployed)
+                st.writable("enemy_flags")[target] |= DESTROYED
+                st.enemies_defeated += 1
+        elif effect == "virtue3":
+            st.virtue_points += 3
+        elif effect == "healAll":
+            _heal(st, _living(st), 1)
+        else:
+            st.virtue_points += 1
+
+
+def _move(st, event, outcome):
+    ship = _acting_ship(st, event)
+    to = event.get("to")
+    if to not in ADJACENCY[st.ship_sector[ship]]:
+        raise ValueError(f"move: sector {to!r} is not adjacent to {st.ship_sector[ship]}")
+    st.writable("ship_sector")[ship] = to
+    _acted(st, ship)
+
+
+def _attack(st, event, outcome):
+    """startMoralChoice + resolveMoralChoice."""
+    ship = _acting_ship(st, event)
+    enemies = st.active_enemies(st.ship_sector[ship])
+    if not enemies:
+        raise ValueError(f"attack: no enemies in sector {st.ship_sector[ship]}")
+    virtue, sub = MORAL_CHOICES[outcome("choice", range(len(MORAL_CHOICES)))]
+    dmg = max(1, st.ship_charge[ship])
+    # Justice bonus: +1 attack damage
+    if st.has("justice"):
+        dmg += 1
+    if event.get("greater_good"):
+        dmg += 1
+        _grow(st, virtue, sub)
+        st.merit += 1
+        st.grace += 1
+        _check_mastery(st)
+    target = enemies[0]
+    health = st.writable("enemy_health")
+    health[target] -= dmg
+    # Temperance bonus: keep 1 charge instead of resetting to 0
+    st.writable("ship_charge")[ship] = min(1, st.ship_charge[ship]) if st.has("temperance") else 0
+    _acted(st, ship)
+    if health[target] <= 0:
+        st.writable("enemy_flags")[target] |= DESTROYED
+        st.enemies_defeated += 1
+
+
+def _charge(st, event, outcome):
+    ship = _acting_ship(st, event)
+    if st.ship_charge[ship] >= st.ship_max_charge[ship]:
+        raise ValueError(f"charge: ship {ship} is fully charged")
+    st.writable("ship_charge")[ship] += 1
+    _acted(st, ship)
+
+
+def _repair(st, event, outcome):
+    ship = _acting_ship(st, event)
+    if st.ship_health[ship] >= st.ship_max_health[ship]:
+        raise ValueError(f"repair: ship {ship} is undamaged")
+    st.writable("ship_health")[ship] += 1
+    _acted(st, ship)
+
+
+def _rest(st, event, outcome):
+    ship = _acting_ship(st, event)
+    _heal(st, (ship,), 1)
+    _acted(st, ship)
+
+
+def _virtue_heal(st, event, outcome):
+    ship = _acting_ship(st, event)
+    if st.virtue_points < 2:
+        raise ValueError("virtueHeal: needs 2 virtue points")
+    st.virtue_points -= 2
+    _heal(st, (ship,), 2)
+    _acted(st, ship)
+
+
+def _spawn(st, count):
+    flags = None
+    for e in range(ENEMY_SHIPS):
+        if count == 0:
+            break
+        if not st.enemy_flags[e]:
+            flags = flags or st.writable("enemy_flags")
+            flags[e] = DEPLOYED
+            st.spawned += 1
+            count -= 1
+
+
+def _nearest_base(st, sector):
+    return BOARD.nearest_base[st.bases][sector - 1]
+
+
+def _enemy_turn(st, event, outcome):
+    """enemyTurn then checkBases."""
+    card = outcome("enemy", [st.preview] if st.preview else ENEMY_ACTIONS)
+    st.preview = None
+    deployed = st.active_enemies()
+    fortitude = st.has("fortitude")
+    if card in ("Advance", "Regroup"):
+        table = BOARD.toward if card == "Advance" else BOARD.away
+        sectors = st.writable("enemy_sector")
+        for e in deployed:
+            sectors[e] = table[sectors[e] - 1][_nearest_base(st, sectors[e]) - 1]
+    elif card == "Flank":
+        sectors = st.writable("enemy_sector")
+        for e in deployed[:(len(deployed) + 1) // 2]:
+            nearest = _nearest_base(st, sectors[e])
+            step = BOARD.toward[sectors[e] - 1][nearest - 1]
+            sectors[e] = BOARD.toward[step - 1][nearest - 1]
+    elif card == "Assault":
+        for e in deployed:
+            targets = _living(st, (st.enemy_sector[e],))
+            if targets:
+                # Fortitude bonus: reduce incoming damage by 1 (min 0)
+                _damage(st, outcome("target", targets), 0 if fortitude else 1)
+        _spawn(st, 1)
+    elif card == "Ambush":
+        for e in deployed:
+            for ship in _living(st, (st.enemy_sector[e],)):
+                _damage(st, ship, 1 if fortitude else 2)
+    elif card == "Reinforce":
+        _spawn(st, 2)
+    _check_bases(st)
+
+
+def _check_bases(st):
+    for b, base in enumerate(PLAYER_BASES):
+        if not st.bases & (1 << b):
+            continue
+        enemies = len(st.active_enemies(base))
+        if enemies and not _living(st, (base,)):
+            health = st.writable("base_health")
+            health[b] -= enemies
+            if health[b] <= 0:
+                st.bases &= ~(1 << b)
+    if not st.bases:
+        st.result = LOST
+
+
+def _new_turn(st):
+    """Reset acted flags, first checking fidelity at the prayer hours (Lauds and None)."""
+    flags = st.ship_flags
+    acted = any(f & ACTED for f in flags)
+    if TURNS[st.turn] in ("Lauds", "None") and not acted:
+        st.fidelity = max(0, st.fidelity - 1)
+    if acted:
+        flags = st.writable("ship_flags")
+        for i in range(PLAYER_SHIPS):
+            flags[i] &= ~ACTED
+
+
+def _end_turn(st, event, outcome):
+    if st.sunday:
+        raise ValueError("endTurn: Sunday ends with sundayRest")
+    turn = TURNS[st.turn]
+    _new_turn(st)
+    if turn in ENEMY_TURNS:
+        _enemy_turn(st, event, outcome)
+        if st.result:
+            return
+    st.turn += 1
+    if st.turn == len(TURNS):
+        st.turn = 0
+        st.day += 1
+        st.sunday = st.day % 7 == 0
+        st.prayed = False
+        if st.day > MAX_DAYS:
+            st.result = WON
+            return
+    # Prudence bonus: preview the next enemy action
+    if st.has("prudence") and not st.sunday and TURNS[st.turn] in ENEMY_TURNS:
+        st.preview = outcome("preview", ENEMY_ACTIONS)
+
+
+def _sunday_rest(st, event, outcome):
+    """doSundayRest, then the endTurn that dismissing the reflection triggers."""
+    if not st.sunday:
+        raise ValueError("sundayRest: it is not Sunday")
+    _heal(st, _living(st), 2)
+    if st.fidelity * 2 >= FIDELITY:
+        # Rotate through Faith, Hope, Charity
+        which = (st.day - 1) % len(THEOLOGICAL_VIRTUES)
+        theological = st.writable("theological")
+        theological[which] = min(3, theological[which] + 1)
+        st.grace += 2
+    st.reflection += 1
+    st.prayed = False
+    _check_mastery(st)
+    # As in game.js, Sunday counts as a missed Lauds
+    _new_turn(st)
+    st.turn = 0
+    st.day += 1
+    st.sunday = st.day % 7 == 0
+    if st.day > MAX_DAYS:
+        st.result = WON
+
+
+RULES = {
+    "pray": _pray,
+    "drawCard": _draw_card,
+    "move": _move,
+    "attack": _attack,
+    "charge": _charge,
+    "repair": _repair,
+    "rest": _rest,
+    "virtueHeal": _virtue_heal,
+    "sundayRest": _sunday_rest,
+    "endTurn": _end_turn,
+}
+
+
+def apply(st, event, rng=None):
+    """Apply one event to st. With rng, its random outcomes are drawn and added to
+    the event; without, they are read from it. Raises ValueError if the rules forbid it."""
+    rule = RULES.get(event.get("a"))
+    if rule is None:
+        raise ValueError(f"unknown action {event.get('a')!r}")
+    if st.result:
+        raise ValueError(f"{event['a']}: the game is over ({RESULTS[st.result]})")
+    outcome = _Draw(event, rng) if rng is not None else _Recorded(event)
+    rule(st, event, outcome)
+    outcome.done()
+
+
+# ===== Event log =====
+
+class GameLog:
+    """A game's append-only event log, its current state, and snapshots taken every
+    snapshot_every events. With a path, every event is also appended to that JSONL file."""
+
+    def __init__(self, header, path=None, snapshot_every=SNAPSHOT_EVERY, seed=None):
+        self.header = dict(header)
+        self.header.setdefault("game", uuid.uuid4().hex[:12])
+        self.header.setdefault("players", 4)
+        self.snapshot_every = snapshot_every
+        self.events = []
+        self.state = GameState(self.header["players"])
+        # snapshots[k] is the state after k * snapshot_every events
+        self.snapshots = [self.state.fork()]
+        # (day, turn) at the start of each turn played, and the event count then
+        self.turn_keys = [(1, 0)]
+        self.turn_starts = [0]
+        self.rng = random.Random(seed)
+        self.path = path
+        self._file = None
+
+    @property
+    def game(self):
+        return self.header["game"]
+
+    def act(self, action, ship=None, **choices):
+        """Play an action in a live game (a performAction id, "endTurn" or "sundayRest");
+        random outcomes not given in choices are drawn now. Returns the logged event."""
+        event = {"a": action}
+        if ship is not None:
+            event["ship"] = ship
+        event.update(choices)
+        return self._append(event, self.rng)
+
+    def append(self, event):
+        """Append a recorded event, replaying its logged outcomes."""
+        if not isinstance(event, dict):
+            raise ValueError(f"event must be an object, got {event!r}")
+        return self._append(dict(event), None)
+
+    def _append(self, event, rng):
+        apply(self.state, event, rng)
+        self.events.append(event)
+        n = len(self.events)
+        if event["a"] in TURN_ENDS and not self.state.result:
+            self.turn_keys.append((self.state.day, self.state.turn))
+            self.turn_starts.append(n)
+        if n % self.snapshot_every == 0:
+            self.snapshots.append(self.state.fork())
+        if self.path:
+            self._write_line(event)
+        return event
+
+    def _write_line(self, record):
+        if self._file is None:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, "a", encoding="utf-8")
+            if new:
+                self._file.write(json.dumps(self.header) + "\n")
+                for event in self.events[:-1]:
+                    self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def state_at(self, n):
+        """The state after the first n events, from the snapshot before it."""
+        if not 0 <= n <= len(self.events):
+            raise IndexError(f"{self.game}: event {n} of {len(self.events)}")
+        k = n // self.snapshot_every
+        st = self.snapshots[k].fork()
+        for event in self.events[k * self.snapshot_every:n]:
+            apply(st, event)
+        return st
+
+    def turn_start(self, day, turn):
+        """Number of events before the turn (a TURNS name, or "Sunday") of day began."""
+        key = (day, 0 if turn == "Sunday" else TURNS.index(turn))
+        i = bisect_left(self.turn_keys, key)
+        if i == len(self.turn_keys) or self.turn_keys[i] != key:
+            raise KeyError(f"{self.game}: day {day} {turn} was not played")
+        return self.turn_starts[i]
+
+    def state_at_turn(self, day, turn):
+        return self.state_at(self.turn_start(day, turn))
+
+    @classmethod
+    def read(cls, path, snapshot_every=SNAPSHOT_EVERY):
+        """Load and replay a JSONL log (header line, then one event per line).
+        Raises ValueError naming the first event the rules reject."""
+        with open(path, encoding="utf-8") as f:
+            lines = (line for line in f if line.strip())
+            try:
+                log = cls(json.loads(next(lines)), snapshot_every=snapshot_every)
+            except StopIteration:
+                raise ValueError(f"{path}: empty log") from None
+            for number, line in enumerate(lines, 1):
+                try:
+                    log.append(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f"{path} event {number}: {e}") from e
+        return log
+
+
+def log_files(paths):
+    """The .jsonl logs named by paths, expanding directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".jsonl"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+# ===== Audit =====
+
+def audit(path, snapshot_every=SNAPSHOT_EVERY):
+    """Replay a log under the rules. Returns its game id, result, final merit and the
+    merit ledger (event number, day, turn, action, ship, merit gained), or the error
+    that stopped the replay."""
+    report = {"path": path, "game": None, "events": 0, "merit": 0, "result": None, "ledger": [], "error": None}
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    try:
+        log = GameLog(json.loads(lines[0]), snapshot_every=snapshot_every)
+    except (IndexError, TypeError, ValueError) as e:
+        report["error"] = f"bad header ({e})"
+        return report
+    report["game"] = log.game
+    st = log.state
+    for number, line in enumerate(lines[1:], 1):
+        day, turn, merit = st.day, "Sunday" if st.sunday else TURNS[st.turn], st.merit
+        try:
+            event = log.append(json.loads(line))
+        except ValueError as e:
+            report["error"] = f"event {number}: {e}"
+            break
+        if st.merit != merit:
+            report["ledger"].append((number, day, turn, event["a"], event.get("ship"), st.merit - merit))
+    report["events"] = len(log.events)
+    report["merit"] = st.merit
+    report["result"] = RESULTS[st.result]
+    return report
+
+
+def disputes(reports, awards):
+    """Scoresheet awards (read_scoresheet, with a game column) whose points differ from the replayed merit."""
+    merit = {r["game"]: r for r in reports}
+    found = []
+    for award in awards:
+        game = str(award["summary"].get("game", ""))
+        report = merit.get(game)
+        if report is None:
+            found.append((award, None, f"no log for game {game!r}"))
+        elif report["error"]:
+            found.append((award, report, f"log rejected: {report['error']}"))
+        elif award["points"] != report["merit"]:
+            found.append((award, report, f"claimed {award['points']}, replay gives {report['merit']}"))
+    return found
+
+
+# ===== Synthetic games =====
+
+def _pray_synthetic(log, ship, p_correct):
+    """Pray with a question drawn here (as game.js's fallback picker does), so the answer
+    can be right with probability p_correct."""
+    rng, st = log.rng, log.state
+    pool = [i for i, key in enumerate(QUESTIONS) if st.progress[SUB_INDEX[key]] < 2] or range(len(QUESTIONS))
+    q = rng.choice(pool)
+    correct = DATA.virtue_questions[q].correct
+    wrong = [i for i in range(len(DATA.virtue_questions[q].answers)) if i != correct]
+    log.act("pray", ship, question=[q], answer=correct if rng.random() < p_correct else rng.choice(wrong))
+
+
+def play_synthetic(log, p_correct=P_CORRECT_ANSWER, p_greater_good=P_GREATER_GOOD):
+    """Play log's game to the end with the test-game.js policy (as in balance_sim.py)."""
+    rng = log.rng
+    st = log.state
+    while not st.result:
+        if st.sunday:
+            log.act("sundayRest")
+            continue
+        turn = TURNS[st.turn]
+        for ship in range(PLAYER_SHIPS):
+            if st.result:
+                break
+            if not st.alive(ship):
+                continue
+            if turn == "Lauds":
+                _pray_synthetic(log, ship, p_correct)
+            elif turn == "Prime":
+                log.act("drawCard", ship)
+            elif turn in ("Terce", "Vespers"):
+                sector = st.ship_sector[ship]
+                enemies = st.active_enemies()
+                if any(st.enemy_sector[e] == sector for e in enemies):
+                    log.act("attack", ship, greater_good=rng.random() < p_greater_good)
+                elif enemies:
+                    goal = min((BOARD.distance[sector - 1][st.enemy_sector[e] - 1], st.enemy_sector[e])
+                               for e in enemies)[1]
+                    step = BOARD.toward[sector - 1][goal - 1]
+                    if step != sector:
+                        log.act("move", ship, to=step)
+            elif turn == "Sext":
+                if st.ship_health[ship] < st.ship_max_health[ship]:
+                    log.act("repair", ship)
+                elif st.ship_charge[ship] < st.ship_max_charge[ship]:
+                    log.act("charge", ship)
+            elif turn == "None":
+                if st.ship_health[ship] <= 1 and st.virtue_points >= 2:
+                    log.act("virtueHeal", ship)
+                else:
+                    _pray_synthetic(log, ship, p_correct)
+            else:
+                log.act("rest", ship)
+        if not st.result:
+            log.act("endTurn")
+    return log
+
+
+def _print_state(title, st):
+    s = st.summary()
+    print(f"{title}: day {s['day']} {s['turn']} ({s['result']})")
+    print(f"  merit {s['merit']}, grace {s['grace']}, fidelity {s['fidelity']:.0%}, "
+          f"virtue points {s['virtue_points']}, enemies defeated {s['enemies_defeated']} "
+          f"({s['enemies_active']} on the board)")
+    print("  ships: " + ", ".join(f"{sh['health']}hp@{sh['sector']}" for sh in s["ships"]))
+    print(f"  bases: {s['bases']}")
+    print(f"  mastered: {s['cardinals_mastered']}, theological: {s['theological']}")
+    print(f"  gifts: {s['gifts']}, fruits: {s['fruits']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay, audit and simulate Stellar Virtue event logs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("simulate", help="play synthetic games and time replaying them")
+    p.add_argument("--games", type=int, default=1000)
+    p.add_argument("--players", type=int, default=4)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--output", help="directory to write one <game>.jsonl log per game")
+    p = sub.add_parser("replay", help="show a logged game's state at any turn")
+    p.add_argument("log")
+    p.add_argument("--day", type=int)
+    p.add_argument("--turn", choices=TURNS + ["Sunday"], default="Lauds")
+    p.add_argument("--event", type=int, help="state after this many events")
+    p.add_argument("--check", action="store_true",
+                   help="check every turn rebuilt from snapshots equals a replay from the start")
+    p = sub.add_parser("audit", help="replay logs under the rules and recompute merit")
+    p.add_argument("logs", nargs="+", help="log files or directories of them")
+    p.add_argument("--scores", help="scoresheet (merit_sync.py format) with a game column to check")
+    p.add_argument("--ledger", action="store_true", help="list every merit award")
+    args = parser.parse_args()
+
+    if args.command == "simulate":
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+        rng = random.Random(args.seed)
+        logs, started = [], time.perf_counter()
+        for g in range(args.games):
+            header = {"game": f"synthetic-{g:06d}", "players": args.players}
+            path = os.path.join(args.output, f"{header['game']}.jsonl") if args.output else None
+            if path and os.path.exists(path):
+                os.remove(path)
+            log = play_synthetic(GameLog(header, path=path, seed=rng.randrange(1 << 32)))
+            log.close()
+            logs.append(log)
+        played = time.perf_counter() - started
+        events = sum(len(log.events) for log in logs)
+        won = sum(log.state.result == WON for log in logs)
+        print(f"Played {len(logs)} games ({events} events, {won} won) in {played:.2f}s")
+
+        # Rebuild every turn of a sample of games both ways
+        sample = logs[:REPLAY_SAMPLE]
+        turns = sum(len(log.turn_starts) for log in sample)
+        started = time.perf_counter()
+        for log in sample:
+            for n in log.turn_starts:
+                log.state_at(n)
+        snapshots = time.perf_counter() - started
+        started = time.perf_counter()
+        for log in sample:
+            for n in log.turn_starts:
+                st = GameState(log.header["players"])
+                for event in log.events[:n]:
+                    apply(st, event)
+        full = time.perf_counter() - started
+        print(f"Rebuilt {turns} turns of {len(sample)} games: {snapshots * 1e6 / turns:.0f} us per turn "
+              f"from snapshots, {full * 1e6 / turns:.0f} us replaying from turn zero")
+
+    elif args.command == "replay":
+        try:
+            log = GameLog.read(args.log)
+            if args.event is not None:
+                st, title = log.state_at(args.event), f"After event {args.event}"
+            elif args.day is not None:
+                st, title = log.state_at_turn(args.day, args.turn), f"Start of day {args.day} {args.turn}"
+            else:
+                st, title = log.state, "Final"
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            raise SystemExit(f"{args.log}: {e}")
+        print(f"Game {log.game}: {log.header['players']} players, {len(log.events)} events, "
+              f"{len(log.snapshots)} snapshots")
+        _print_state(title, st)
+        if args.check:
+            st = GameState(log.header["players"])
+            bad = 0
+            for n, event in enumerate([None] + log.events):
+                if event is not None:
+                    apply(st, event)
+                if n in log.turn_starts and log.state_at(n) != st:
+                    bad += 1
+                    print(f"  mismatch at event {n}")
+            print(f"Checked {len(log.turn_starts)} turns: {'all match' if not bad else f'{bad} differ'}")
+            raise SystemExit(1 if bad else 0)
+
+    else:
+        reports = [audit(path) for path in log_files(args.logs)]
+        rejected = [r for r in reports if r["error"]]
+        for r in reports:
+            status = f"rejected, {r['error']}" if r["error"] else r["result"]
+            print(f"{r['game'] or r['path']}: merit {r['merit']} after {r['events']} events ({status})")
+            if args.ledger:
+                for number, day, turn, action, ship, gain in r["ledger"]:
+                    who = f" ship {ship}" if ship is not None else ""
+                    print(f"  #{number} day {day} {turn}: {action}{who} +{gain}")
+        print(f"{len(reports)} games, {len(rejected)} rejected, "
+              f"{sum(r['merit'] for r in reports)} merit in total")
+        failed = bool(rejected)
+        if args.scores:
+            found = disputes(reports, read_scoresheet(args.scores))
+            for award, _, reason in found:
+                print(f"Dispute: {award['role_id']} game {award['summary'].get('game', '?')}: {reason}")
+            print(f"{len(found)} disputed awards in {args.scores}")
+            failed = failed or bool(found)
+        raise SystemExit(1 if failed else 0)
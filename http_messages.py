@@ -0,0 +1,52 @@
+# http_messages.py
+# Minimal HTTP/1.1 message framing over asyncio streams.
+#
+# merit_sync.py and render_service.py speak plain HTTP/1.1 with keep-alive
+# using only the standard library: one JSON or PDF body per message, framed
+# by Content-Length (chunked bodies are accepted when reading).
+
+MAX_HEADER_LINES = 100
+
+
+async def read_message(reader, max_body=None):
+    """Read one HTTP message; returns (start line, headers, body) or None at EOF.
+
+    Header names are lower-cased. Raises ValueError for malformed messages
+    or bodies larger than max_body bytes.
+    """
+    start = await reader.readline()
+    if not start:
+        return None
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise ValueError("too many header lines")
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+            if max_body is not None and len(body) > max_body:
+                raise ValueError(f"body larger than {max_body} bytes")
+    else:
+        length = int(headers.get("content-length", 0))
+        if max_body is not None and length > max_body:
+            raise ValueError(f"body larger than {max_body} bytes")
+        body = await reader.readexactly(length)
+    return start.decode("latin-1").strip(), headers, body
+
+
+def encode_message(start, headers, body):
+    """Serialize a request or response with a Content-Length header."""
+    head = [start] + [f"{name}: {value}" for name, value in headers.items()]
+    head.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
@@ -0,0 +1,174 @@
+# imposition.py
+# Lays out any number of cards on printed sheets.
+#
+# impose() pulls records lazily from any iterable, draws one sheet at a time
+# and yields after each sheet, so memory stays flat no matter how large the
+# deck is. Grids, bleed, crop marks and duplex card backs are configured on a
+# SheetLayout. Content that is the same on every card (frames, fixed labels)
+# is drawn once per sheet shape into a shared form and placed by reference.
+
+from itertools import islice
+
+from reportlab.lib.units import inch
+
+from page_templates import place
+
+CROP_MARK_LENGTH = 0.2 * inch
+CROP_MARK_OFFSET = 0.05 * inch
+
+
+def fit_grid(area_width, area_height, card_width, card_height, spacing=0, bleed=0):
+    """Return the largest (cols, rows) grid of cards (with bleed) that fits the area."""
+    cell_w = card_width + 2 * bleed
+    cell_h = card_height + 2 * bleed
+    cols = int((area_width + spacing) // (cell_w + spacing))
+    rows = int((area_height + spacing) // (cell_h + spacing))
+    return max(cols, 1), max(rows, 1)
+
+
+class SheetLayout:
+    """Card grid geometry for one sheet.
+
+    left/top locate the grid's top-left corner on the page. Card positions
+    are the bottom-left corner of each card's trim box, filled left to
+    right, top to bottom.
+    """
+
+    def __init__(self, page_width, page_height, card_width, card_height, cols, rows,
+                 left, top, spacing=0, bleed=0, crop_marks=False):
+        self.page_width = page_width
+        self.page_height = page_height
+        self.card_width = card_width
+        self.card_height = card_height
+        self.cols = cols
+        self.rows = rows
+        self.left = left
+        self.top = top
+        self.spacing = spacing
+        self.bleed = bleed
+        self.crop_marks = crop_marks
+
+    @property
+    def per_sheet(self):
+        return self.cols * self.rows
+
+    def position(self, slot, mirrored=False):
+        """(x, y) of the card trim box in a grid slot.
+
+        mirrored reflects the position about the page's vertical centre line,
+        which is where the card's back lands after a long-edge duplex flip.
+        """
+        col = slot % self.cols
+        row = slot // self.cols
+        cell_w = self.card_width + 2 * self.bleed
+        cell_h = self.card_height + 2 * self.bleed
+        x = self.left + col * (cell_w + self.spacing) + self.bleed
+        y = self.top - (row + 1) * (cell_h + self.spacing) + self.bleed
+        if mirrored:
+            x = self.page_width - x - self.card_width
+        return x, y
+
+    def sheets_needed(self, count):
+        return -(-count // self.per_sheet)
+
+    @property
+    def signature(self):
+        """Hashable description of the geometry, for shared-form keys."""
+        return (self.page_width, self.page_height, self.card_width, self.card_height, self.cols,
+                self.rows, self.left, self.top, self.spacing, self.bleed, self.crop_marks)
+
+
+def draw_crop_marks(c, layout, count, mirrored=False):
+    """Draw trim marks outside the grid, lined up with every card edge in use."""
+    xs = set()
+    ys = set()
+    for slot in range(count):
+        x, y = layout.position(slot, mirrored)
+        xs.update((x, x + layout.card_width))
+        ys.update((y, y + layout.card_height))
+    x_min, x_max = min(xs) - layout.bleed, max(xs) + layout.bleed
+    y_min, y_max = min(ys) - layout.bleed, max(ys) + layout.bleed
+    c.saveState()
+    c.setStrokeColorRGB(0, 0, 0)
+    c.setLineWidth(0.25)
+    for x in sorted(xs):
+        c.line(x, y_max + CROP_MARK_OFFSET, x, y_max + CROP_MARK_OFFSET + CROP_MARK_LENGTH)
+        c.line(x, y_min - CROP_MARK_OFFSET, x, y_min - CROP_MARK_OFFSET - CROP_MARK_LENGTH)
+    for y in sorted(ys):
+        c.line(x_min - CROP_MARK_OFFSET, y, x_min - CROP_MARK_OFFSET - CROP_MARK_LENGTH, y)
+        c.line(x_max + CROP_MARK_OFFSET, y, x_max + CROP_MARK_OFFSET + CROP_MARK_LENGTH, y)
+    c.restoreState()
+
+
+def draw_sheet_template(c, layout, count, frame=None, mirrored=False, page=None):
+    """Draw everything on a sheet that doesn't depend on the records, as one shared form.
+
+    frame is (key, draw) where draw(c, x, y) draws a card's fixed content at
+    its trim origin and key identifies that content; page(c) draws fixed
+    page furniture such as a footer. Together with the crop marks they are
+    compiled once per (frame, layout, count, side) and every later sheet of
+    the same shape only references the form.
+    """
+    if frame is None and page is None and not layout.crop_marks:
+        return
+    key, draw = frame or (None, None)
+
+    def draw_sheet(c):
+        if draw is not None:
+            for slot in range(count):
+                x, y = layout.position(slot, mirrored)
+                draw(c, x, y)
+        if layout.crop_marks:
+            draw_crop_marks(c, layout, count, mirrored)
+        if page is not None:
+            page(c)
+
+    place(c, ("sheet", key, page and page.__qualname__, layout.signature, count, mirrored), draw_sheet)
+
+
+def impose(c, records, draw, layout, back=None, finish_page=None, frame=None, back_frame=None,
+           page_template=None):
+    """Draw records onto as many sheets as needed, yielding (sheet_number, cards_on_sheet).
+
+    draw(c, x, y, record) draws one card front at its trim origin. If back is
+    given, each front sheet is followed by a back sheet with positions
+    mirrored for long-edge duplex printing; back(c, x, y, record) draws it.
+    frame and back_frame draw the fixed part of every front and back (see
+    draw_sheet_template); a static back needs only back_frame. page_template(c)
+    draws fixed furniture (e.g. a footer) into the same shared form, while
+    finish_page(c) runs before every showPage for anything that varies.
+    This is a generator: nothing is drawn until it is iterated.
+    """
+    records = iter(records)
+    sheet = 0
+    while True:
+        batch = list(islice(records, layout.per_sheet))
+        if not batch:
+            return
+        sheet += 1
+        draw_sheet_template(c, layout, len(batch), frame, page=page_template)
+        for slot, record in enumerate(batch):
+            x, y = layout.position(slot)
+            draw(c, x, y, record)
+        if finish_page:
+            finish_page(c)
+        c.showPage()
+        if back is not None or back_frame is not None:
+            draw_sheet_template(c, layout, len(batch), back_frame, mirrored=True, page=page_template)
+            if back is not None:
+                for slot, record in enumerate(batch):
+                    x, y = layout.position(slot, mirrored=True)
+                    back(c, x, y, record)
+            if finish_page:
+                finish_page(c)
+            c.showPage()
+        yield sheet, len(batch)
+
+
+def impose_all(c, records, draw, layout, back=None, finish_page=None, frame=None, back_frame=None,
+               page_template=None):
+    """Run impose() to completion and return the number of front sheets drawn."""
+    sheets = 0
+    for sheets, _ in impose(c, records, draw, layout, back, finish_page, frame, back_frame, page_template):
+        pass
+    return sheets
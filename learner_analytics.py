@@ -0,0 +1,366 @@
+# learner_analytics.py
+# Aggregates the answer logs exported from the web app into the statistics
+# that decide which cards get printed.
+#
+# game.js logs one JSON line per answered question and per moral choice
+# (logEvent), downloaded from the game over screen:
+#   {"type": "answer", "game": "lq3x9a", "question": "cardinal:12", "category": "cardinal",
+#    "topic": "prudence", "subtopic": "memory", "level": 1, "correct": true, ...}
+#   {"type": "moral_choice", "game": "lq3x9a", "choice": 3, "virtue": "justice",
+#    "sub": "clemency", "greater_good": false, ...}
+# Other lines are ignored and malformed ones counted. Logs (plain or gzipped
+# JSONL, any number of files) are read as a stream of chunks of whole lines
+# that worker processes parse and count; the main process merges the chunk
+# counters in file order, so memory grows with the number of games and cards,
+# not with the length of the logs. The report holds:
+#   - per question: attempts and accuracy;
+#   - per moral choice: times chosen on and greater-good rate;
+#   - per sub-virtue (cardinal virtue/sub-virtue, gift, fruit): attempts,
+#     accuracy and a mastery curve, the share of games that had mastered it
+#     (MASTERY_THRESHOLD right answers or greater-good choices, as game.js
+#     counts progress) within 1, 2, ... CURVE_ATTEMPTS attempts;
+#   - a print weight per sub-virtue, its smoothed error rate.
+# A variant's "focus" key names a report: the PDF generator then fills
+# card_counts with cards weighted toward the sub-virtues players miss most
+# (focus_cards).
+#
+# Usage: python learner_analytics.py LOG [LOG ...] [-o analytics.json] [--jobs 4]
+#        python learner_analytics.py --synthetic 100000 (writes and reads a generated log)
+
+import argparse
+import gzip
+import json
+import os
+import random
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import card_store
+import virtue_data
+from question_engine import MASTERY_THRESHOLD
+
+REPORT_VERSION = 1
+CURVE_ATTEMPTS = 10
+CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_OUTPUT = "analytics.json"
+
+
+def slot_name(category, topic, subtopic=None):
+    """Sub-virtue key: "cardinal/prudence/memory", "gift/wisdom", "fruit/joy"."""
+    if category == "cardinal":
+        return f"cardinal/{topic}/{subtopic}"
+    return f"{category}/{topic}"
+
+
+def error_weight(attempts, correct):
+    """Smoothed share of wrong answers: 0.5 with no data, tending to the observed rate."""
+    return (attempts - correct + 1) / (attempts + 2)
+
+
+# ===== Counting =====
+# A chunk's counters: lines, events and skipped lines; [attempts, correct]
+# per question id, moral choice number and sub-virtue; and per (game,
+# sub-virtue) [attempts, correct, attempt numbers of the first
+# MASTERY_THRESHOLD right answers], which merge() can chain across chunks.
+
+def _empty():
+    return {"lines": 0, "events": 0, "skipped": 0, "questions": {}, "choices": {}, "slots": {}, "progress": {}}
+
+
+def scan_chunk(blob):
+    """Counters for one chunk of log lines (bytes); runs in a worker process."""
+    part = _empty()
+    questions, choices, slots, progress = part["questions"], part["choices"], part["slots"], part["progress"]
+    for line in blob.splitlines():
+        if not line.strip():
+            continue
+        part["lines"] += 1
+        try:
+            event = json.loads(line)
+            kind = event.get("type")
+            if kind == "answer":
+                counts = questions
+                key = str(event["question"])
+                slot = slot_name(event.get("category") or "cardinal", event["topic"], event.get("subtopic"))
+                right = bool(event["correct"])
+            elif kind == "moral_choice":
+                counts = choices
+                key = int(event["choice"])
+                slot = slot_name("cardinal", event["virtue"], event["sub"])
+                right = bool(event["greater_good"])
+            else:
+                continue
+            game = str(event["game"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            part["skipped"] += 1
+            continue
+        part["events"] += 1
+        for counter, k in ((counts, key), (slots, slot)):
+            c = counter.get(k)
+            if c is None:
+                c = counter[k] = [0, 0]
+            c[0] += 1
+            c[1] += right
+        p = progress.get((game, slot))
+        if p is None:
+            p = progress[(game, slot)] = [0, 0, []]
+        p[0] += 1
+        if right:
+            p[1] += 1
+            if len(p[2]) < MASTERY_THRESHOLD:
+                p[2].append(p[0])
+    return part
+
+
+def merge(total, part):
+    """Add a chunk's counters to total; part must come after everything in total."""
+    for key in ("lines", "events", "skipped"):
+        total[key] += part[key]
+    for name in ("questions", "choices", "slots"):
+        counts = total[name]
+        for key, (attempts, correct) in part[name].items():
+            c = counts.get(key)
+            if c is None:
+                counts[key] = [attempts, correct]
+            else:
+                c[0] += attempts
+                c[1] += correct
+    progress = total["progress"]
+    for key, (attempts, correct, firsts) in part["progress"].items():
+        p = progress.get(key)
+        if p is None:
+            progress[key] = [attempts, correct, firsts]
+            continue
+        missing = MASTERY_THRESHOLD - len(p[2])
+        if missing > 0:
+            p[2].extend(p[0] + n for n in firsts[:missing])
+        p[0] += attempts
+        p[1] += correct
+    return total
+
+
+# ===== Reading =====
+
+def open_log(path):
+    """Binary stream of a log file, gunzipped if it is gzip (by its magic bytes)."""
+    with open(path, "rb") as f:
+        gzipped = f.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rb") if gzipped else open(path, "rb")
+
+
+def iter_chunks(paths, chunk_bytes=CHUNK_BYTES):
+    """Yield the logs as blobs of whole lines, about chunk_bytes each, in order."""
+    for path in paths:
+        with open_log(path) as f:
+            while True:
+                blob = f.read(chunk_bytes)
+                if not blob:
+                    break
+                if not blob.endswith(b"\n"):
+                    blob += f.readline()
+                yield blob
+
+
+def aggregate(paths, jobs=1, chunk_bytes=CHUNK_BYTES):
+    """Counters for the logs at paths, parsed by jobs worker processes a few chunks ahead."""
+    total = _empty()
+    chunks = iter_chunks(paths, chunk_bytes)
+    if jobs <= 1:
+        for blob in chunks:
+            merge(total, scan_chunk(blob))
+        return total
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for blob in chunks:
+            pending.append(pool.submit(scan_chunk, blob))
+            if len(pending) >= 2 * jobs:
+                merge(total, pending.popleft().result())
+        while pending:
+            merge(total, pending.popleft().result())
+    return total
+
+
+# ===== Report =====
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def summarize(total):
+    """The report for aggregated counters (see the header for its contents)."""
+    curves = {}  # sub-virtue -> [games, games mastered, games mastered on attempt n]
+    games = set()
+    for (game, slot), (attempts, correct, firsts) in total["progress"].items():
+        games.add(game)
+        entry = curves.get(slot)
+        if entry is None:
+            entry = curves[slot] = [0, 0, [0] * CURVE_ATTEMPTS]
+        entry[0] += 1
+        if len(firsts) == MASTERY_THRESHOLD:
+            entry[1] += 1
+            if firsts[-1] <= CURVE_ATTEMPTS:
+                entry[2][firsts[-1] - 1] += 1
+    sub_virtues = {}
+    for slot, (attempts, correct) in sorted(total["slots"].items()):
+        played, mastered, by_attempt = curves[slot]
+        curve, running = [], 0
+        for n in by_attempt:
+            running += n
+            curve.append(_ratio(running, played))
+        sub_virtues[slot] = {"attempts": attempts, "correct": correct, "accuracy": _ratio(correct, attempts),
+                             "games": played, "mastered": _ratio(mastered, played), "mastery_curve": curve,
+                             "weight": round(error_weight(attempts, correct), 4)}
+    questions = {}
+    for key, (attempts, correct) in sorted(total["questions"].items(), key=lambda kv: _id_order(kv[0])):
+        questions[key] = {"attempts": attempts, "correct": correct, "accuracy": _ratio(correct, attempts)}
+    moral_choices = {}
+    for key, (offered, greater) in sorted(total["choices"].items()):
+        moral_choices[str(key)] = {"offered": offered, "greater_good": greater,
+                                   "greater_good_rate": _ratio(greater, offered)}
+    return {"version": REPORT_VERSION, "mastery_threshold": MASTERY_THRESHOLD, "lines": total["lines"],
+            "events": total["events"], "skipped": total["skipped"], "games": len(games),
+            "sub_virtues": sub_virtues, "questions": questions, "moral_choices": moral_choices}
+
+
+def _id_order(question_id):
+    category, _, number = question_id.partition(":")
+    return (category, int(number) if number.isdigit() else -1, number)
+
+
+def write_report(report, path=DEFAULT_OUTPUT):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    os.replace(tmp, path)
+
+
+def load_report(path):
+    """Read a report written by write_report. Raises OSError or ValueError."""
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    if not isinstance(report, dict) or report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path} is not a version {REPORT_VERSION} learner analytics report")
+    return report
+
+
+# ===== Deck selection =====
+
+def allocate(count, weights, sizes):
+    """Split count among the keys of weights in proportion to them, at most sizes[key] each."""
+    quotas = dict.fromkeys(weights, 0)
+    left = min(count, sum(sizes.values()))
+    while left > 0:
+        open_keys = [k for k in weights if quotas[k] < sizes[k]]
+        total = sum(weights[k] for k in open_keys)
+        shares = {k: left * weights[k] / total for k in open_keys}
+        granted = 0
+        for k in open_keys:
+            n = min(int(shares[k]), sizes[k] - quotas[k])
+            quotas[k] += n
+            granted += n
+        if not granted:
+            # Every share is under one card: the largest get one each.
+            for k in sorted(open_keys, key=lambda k: -shares[k])[:left]:
+                quotas[k] += 1
+                granted += 1
+        left -= granted
+    return quotas
+
+
+def focus_cards(cards, count, report):
+    """The count cards of a deck to print, weighted toward the sub-virtues of report players miss.
+
+    Each sub-virtue in the deck gets a share of count in proportion to its
+    weight (unplayed ones the neutral 0.5); within a sub-virtue the cards
+    answered worst are taken first. The chosen cards keep their deck order.
+    Decks not backed by the card store (the curated deck) are cut to count.
+    """
+    if not isinstance(cards, (card_store.QuestionCards, card_store.MoralChoiceCards)):
+        return cards[:count]
+    store = cards.store
+    if isinstance(cards, card_store.MoralChoiceCards):
+        stats, fields = report["moral_choices"], ("offered", "greater_good")
+
+        def describe(item):
+            return slot_name("cardinal", store.label(store.m_virtue[item]), store.label(store.m_sub[item])), str(item)
+    else:
+        stats, fields = report["questions"], ("attempts", "correct")
+        ids = store.question_ids()
+
+        def describe(item):
+            category, topic, subtopic, _ = store.question_keys(item)
+            return slot_name(category, topic, subtopic), ids[item]
+
+    groups = {}  # sub-virtue -> [(-card weight, deck position)]
+    for position, item in enumerate(cards.items):
+        slot, key = describe(item)
+        seen = stats.get(key, {})
+        groups.setdefault(slot, []).append((-error_weight(seen.get(fields[0], 0), seen.get(fields[1], 0)), position))
+    for group in groups.values():
+        group.sort()
+    weights = {slot: report["sub_virtues"].get(slot, {}).get("weight", error_weight(0, 0)) for slot in groups}
+    quotas = allocate(count, weights, {slot: len(group) for slot, group in groups.items()})
+    chosen = sorted(position for slot, group in groups.items() for _, position in group[:quotas[slot]])
+    return type(cards)(store, array("I", (cards.items[p] for p in chosen)), cards.rotation)
+
+
+# ===== Synthetic logs =====
+
+def write_synthetic_log(path, events, seed=0):
+    """Write a gzipped log of about events events from games against the real bank, for sizing.
+
+    Each sub-virtue gets a fixed difficulty, so the report has weak spots to find.
+    """
+    rng = random.Random(seed)
+    store = card_store.open_store()
+    ids = store.question_ids()
+    questions = [(ids[i],) + store.question_keys(i) for i in range(len(store))]
+    choices = [(i, store.label(store.m_virtue[i]), store.label(store.m_sub[i])) for i in range(len(store.m_scenario))]
+    difficulty = {}
+    written = 0
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f:
+        while written < events:
+            game = f"g{written:x}"
+            for _ in range(rng.randint(20, 60)):
+                if rng.random() < 0.8:
+                    qid, category, topic, subtopic, level = rng.choice(questions)
+                    slot = slot_name(category, topic, subtopic)
+                    p = difficulty.setdefault(slot, rng.uniform(0.35, 0.95))
+                    event = {"type": "answer", "game": game, "question": qid, "category": category,
+                             "topic": topic, "subtopic": subtopic, "level": level, "correct": rng.random() < p}
+                else:
+                    index, virtue, sub = rng.choice(choices)
+                    p = difficulty.setdefault(slot_name("cardinal", virtue, sub), rng.uniform(0.35, 0.95))
+                    event = {"type": "moral_choice", "game": game, "choice": index, "virtue": virtue,
+                             "sub": sub, "greater_good": rng.random() < p}
+                f.write(json.dumps(event) + "\n")
+                written += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate Stellar Virtue answer logs into a learner analytics report.")
+    parser.add_argument("logs", nargs="*", help="JSONL answer logs, plain or gzipped")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help=f"report path (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--synthetic", type=int, help="generate a log of this many events and aggregate it")
+    args = parser.parse_args()
+
+    logs = args.logs
+    if args.synthetic:
+        path = os.path.join(virtue_data.CACHE_DIR, f"answer-log-synthetic-{args.synthetic}.jsonl.gz")
+        os.makedirs(virtue_data.CACHE_DIR, exist_ok=True)
+        write_synthetic_log(path, args.synthetic)
+        logs = logs + [path]
+    if not logs:
+        parser.error("give at least one log file (or --synthetic N)")
+    start = time.perf_counter()
+    report = summarize(aggregate(logs, args.jobs))
+    elapsed = time.perf_counter() - start
+    write_report(report, args.output)
+    print(f"{report['events']:,} events from {report['games']:,} games in {elapsed:.1f}s "
+          f"({report['skipped']:,} malformed lines skipped) -> {args.output}")
+    weakest = sorted(report["sub_virtues"].items(), key=lambda kv: -kv[1]["weight"])[:5]
+    for slot, stats in weakest:
+        print(f"  {slot}: {stats['accuracy']:.0%} right, {stats['mastered']:.0%} of games mastered it")
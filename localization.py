@@ -0,0 +1,173 @@
+# localization.py
+# Printed text in other languages, from the message catalogs in locales/.
+#
+# locales/<code>.json holds a language's name and its messages: English
+# source strings as drawn by stellar_virtue_boardgame.py (with {name}
+# placeholders) mapped to their translations. A catalog is compiled on first
+# use into a plain {source: translation} table, checked so every translation
+# keeps its source's placeholders, and pickled to .cache/locales/ keyed by
+# the JSON's SHA-256; render workers load only the languages they draw and
+# never re-parse or re-check the JSON. Strings a catalog lacks print in
+# English.
+#
+# Usage: python localization.py [--list] [--deck curated] [code ...]
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import string
+
+from virtue_data import CACHE_DIR, HERE
+
+LOCALE_DIR = os.path.join(HERE, "locales")
+LOCALE_CACHE_DIR = os.path.join(CACHE_DIR, "locales")
+SOURCE_LANGUAGE = "en"
+# Bump when the compiled table layout changes so stale caches are ignored.
+CATALOG_VERSION = 1
+
+# code -> compiled table, per process
+_catalogs = {}
+_table = None
+_missing = set()
+
+
+def catalog_path(code):
+    return os.path.join(LOCALE_DIR, f"{code}.json")
+
+
+def languages():
+    """Codes of the printable languages: English plus one per catalog in locales/."""
+    try:
+        names = sorted(os.listdir(LOCALE_DIR))
+    except OSError:
+        names = []
+    return [SOURCE_LANGUAGE] + [name[:-5] for name in names if name.endswith(".json")]
+
+
+def catalog_files():
+    """Paths of every catalog, for code fingerprints."""
+    return [catalog_path(code) for code in languages()[1:]]
+
+
+def _fields(text):
+    return sorted(field for _, field, _, _ in string.Formatter().parse(text) if field is not None)
+
+
+def compile_catalog(raw, code="?"):
+    """{source: translation} from a catalog's JSON bytes. Raises ValueError on a bad entry."""
+    messages = json.loads(raw)["messages"]
+    table = {}
+    for source, translation in messages.items():
+        if not isinstance(translation, str):
+            raise ValueError(f"{code}: translation of {source!r} is not a string")
+        if _fields(source) != _fields(translation):
+            raise ValueError(f"{code}: translation of {source!r} must use the placeholders {_fields(source)}")
+        if translation:
+            table[source] = translation
+    return table
+
+
+def _write_atomic(path, data):
+    try:
+        os.makedirs(LOCALE_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def catalog(code):
+    """The compiled message table for a language, loaded on first use."""
+    table = _catalogs.get(code)
+    if table is not None:
+        return table
+    with open(catalog_path(code), "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_file = os.path.join(LOCALE_CACHE_DIR, f"{code}-v{CATALOG_VERSION}-{digest[:16]}.pickle")
+    try:
+        with open(cache_file, "rb") as f:
+            table = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        table = compile_catalog(raw, code)
+        _write_atomic(cache_file, pickle.dumps(table, protocol=pickle.HIGHEST_PROTOCOL))
+    _catalogs[code] = table
+    return table
+
+
+def use_language(code):
+    """Make tr() translate into code (an entry of languages()) from now on."""
+    global _table
+    _table = None if code == SOURCE_LANGUAGE else catalog(code)
+
+
+def tr(text, **fields):
+    """text in the current language (English if untranslated), with fields filled in."""
+    if _table is not None and text:
+        translated = _table.get(text)
+        if translated is None:
+            _missing.add(text)
+        else:
+            text = translated
+    return text.format(**fields) if fields else text
+
+
+def tr_all(texts):
+    """Translate texts as a unit: all of them, or none if any is untranslated.
+
+    Used for the blocks of one card, so a card never prints half translated.
+    """
+    texts = list(texts)
+    if _table is None:
+        return texts
+    translated = [_table.get(text) if text else text for text in texts]
+    if None in translated:
+        _missing.update(text for text, t in zip(texts, translated) if t is None)
+        return texts
+    return translated
+
+
+def missing():
+    """Strings looked up since the last call that the current catalogs lack (and clears them)."""
+    found = sorted(_missing)
+    _missing.clear()
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the message catalogs in locales/ and list untranslated text.")
+    parser.add_argument("codes", nargs="*", help="languages to check (default: every catalog)")
+    parser.add_argument("--deck", choices=["full", "curated"], default="curated",
+                        help="deck whose kit is drawn to find the printed strings")
+    parser.add_argument("--list", action="store_true", help="print every untranslated string")
+    args = parser.parse_args()
+
+    # The generator translates through the imported module, not __main__
+    import localization
+    import stellar_virtue_boardgame as svb
+
+    failed = False
+    for code in args.codes or languages()[1:]:
+        try:
+            variant = svb.normalize_variant({"deck": args.deck, "language": code, "players": 4,
+                                                 "school": "School"})
+            deck = svb.build_deck(variant)
+            localization.missing()
+            for name, _, _ in svb.SECTIONS:
+                svb.render_section(name, deck)
+        except (OSError, ValueError) as e:
+            print(f"{code}: {e}")
+            failed = True
+            continue
+        untranslated = localization.missing()
+        with open(catalog_path(code), encoding="utf-8") as f:
+            name = json.load(f)["language"]
+        print(f"{code} ({name}): {len(localization.catalog(code))} messages, {len(untranslated)} printed strings untranslated")
+        if args.list:
+            for text in untranslated:
+                print(f"  {text!r}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,476 @@
+# merit_sync.py
+# Bulk EZ Merit Point submission to Sentinel Ops, for tabletop events.
+#
+# sentinel-api.js submits one award per finished game. For a tournament the
+# results come off printed scoresheets, so this module takes a whole sheet of
+# awards at once: each award is first appended to a write-ahead queue file
+# (merit_queue.jsonl), then sent over a small pool of keep-alive connections
+# with bounded concurrency. Transient failures (connection errors, 429, 5xx)
+# are retried with exponential backoff; if the server stays unreachable the
+# awards simply remain queued and the next sync sends them. Every award carries
+# an Idempotency-Key so a retried request is not counted twice.
+#
+# StandInServer implements the Sentinel Ops endpoints sentinel-api.js uses,
+# in memory, for trying the client without a real server.
+#
+# Usage: python merit_sync.py submit scores.csv [--server URL]
+#        python merit_sync.py sync | status
+#        python merit_sync.py serve [--port 8000] [--fail-rate 0.2]
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import time
+import uuid
+from collections import deque
+from urllib.parse import urlsplit
+
+from http_messages import encode_message, read_message
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+QUEUE_FILE = os.path.join(HERE, "merit_queue.jsonl")
+DEFAULT_SERVER = "http://localhost:8000"  # sentinel-api.js default
+CONCURRENCY = 8
+RETRIES = 5
+BACKOFF = 0.5       # seconds before the first retry; doubles each attempt
+MAX_BACKOFF = 30.0
+TIMEOUT = 10.0
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class SentinelError(Exception):
+    """A request the server rejected; status is the HTTP status (None for network errors)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def transient(self):
+        return self.status is None or self.status in RETRY_STATUS
+
+
+# ===== Client connections =====
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one server, at most size open at once."""
+
+    def __init__(self, base_url, size=CONCURRENCY, timeout=TIMEOUT):
+        url = urlsplit(base_url)
+        self.ssl = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.ssl else 80)
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self.idle = deque()
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _connect(self):
+        conn = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        self.opened += 1
+        return conn
+
+    async def request(self, method, path, body=None, headers=None):
+        """Send one request; returns the decoded JSON response. Raises SentinelError."""
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = {"Host": f"{self.host}:{self.port}", "Content-Type": "application/json",
+                "Connection": "keep-alive"}
+        head.update(headers or {})
+        message = encode_message(f"{method} {self.prefix}{path} HTTP/1.1", head, payload)
+        async with self.slots:
+            # A reused connection may have been closed by the server while idle;
+            # that is retried once on a fresh connection.
+            for reused in (True, False):
+                conn = self.idle.popleft() if reused and self.idle else None
+                if conn is None:
+                    reused = False
+                    try:
+                        conn = await asyncio.wait_for(self._connect(), self.timeout)
+                    except (OSError, asyncio.TimeoutError) as e:
+                        raise SentinelError(f"cannot connect to {self.host}:{self.port}: {e}") from e
+                reader, writer = conn
+                try:
+                    writer.write(message)
+                    await writer.drain()
+                    response = await asyncio.wait_for(read_message(reader), self.timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    writer.close()
+                    if reused:
+                        continue
+                    raise SentinelError(f"{method} {path}: {e or type(e).__name__}") from e
+                if response is None:
+                    writer.close()
+                    if reused:
+                        continue
+                    raise SentinelError(f"{method} {path}: connection closed")
+                break
+            start, response_headers, data = response
+            if response_headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self.idle.append(conn)
+        status = int(start.split()[1])
+        try:
+            data = json.loads(data) if data else {}
+        except ValueError:
+            data = {"error": data.decode("utf-8", "replace")[:200]}
+        if status >= 400:
+            error = SentinelError(data.get("error") or f"HTTP {status}", status)
+            error.retry_after = response_headers.get("retry-after")
+            raise error
+        return data
+
+    async def close(self):
+        while self.idle:
+            _, writer = self.idle.popleft()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+# ===== Write-ahead queue =====
+
+class MeritQueue:
+    """Append-only log of awards: "add" when queued, "done" or "failed" once settled.
+
+    Each record is one JSON line, flushed and fsynced before the award is sent,
+    so a crash or lost connection never loses an award. Replaying the log on
+    open gives the awards still pending. A torn last line is ignored.
+    """
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        self.awards = {}   # id -> award, in the order queued
+        self.settled = {}  # id -> "done" / "failed" record
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(record)
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, record):
+        op = record.pop("op")
+        if op == "add":
+            self.awards[record["id"]] = record
+        else:
+            self.settled[record["id"]] = dict(record, status=op)
+
+    def _append(self, records):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for record in records:
+            self._apply(dict(record))
+
+    def add(self, awards):
+        """Queue awards ({"role_id", "points", "summary"}); returns them with their ids."""
+        records = [{"op": "add", "id": award.get("id") or uuid.uuid4().hex, "role_id": award["role_id"],
+                    "points": award["points"], "summary": award.get("summary") or {},
+                    "queued": time.time()} for award in awards]
+        self._append(records)
+        return [self.awards[record["id"]] for record in records]
+
+    def settle(self, award_id, status, **details):
+        self._append([dict({"op": status, "id": award_id}, **details)])
+
+    def pending(self):
+        return [award for award_id, award in self.awards.items() if award_id not in self.settled]
+
+    def failed(self):
+        return [(self.awards[award_id], record) for award_id, record in self.settled.items()
+                if record["status"] == "failed" and award_id in self.awards]
+
+    def compact(self):
+        """Rewrite the log without delivered awards (failed ones are kept for review)."""
+        keep = []
+        for award_id, award in self.awards.items():
+            record = self.settled.get(award_id)
+            if record and record["status"] == "done":
+                continue
+            keep.append(dict({"op": "add"}, **award))
+            if record:
+                keep.append(dict({k: v for k, v in record.items() if k != "status"}, op=record["status"]))
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in keep)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.awards = {k: v for k, v in self.awards.items() if self.settled.get(k, {}).get("status") != "done"}
+        self.settled = {k: v for k, v in self.settled.items() if k in self.awards}
+
+
+# ===== Client =====
+
+class MeritSync:
+    """Sends queued merit awards to a Sentinel Ops server.
+
+    Up to concurrency requests are in flight at once, each over a pooled
+    keep-alive connection. A transient failure is retried up to retries times
+    with exponential backoff (honouring Retry-After); after that the server is
+    treated as offline and the remaining awards stay queued for the next sync.
+    Awards the server rejects outright (other 4xx) are marked failed.
+    """
+
+    def __init__(self, base_url=DEFAULT_SERVER, queue=None, concurrency=CONCURRENCY, retries=RETRIES,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF, timeout=TIMEOUT):
+        self.base_url = base_url
+        self.queue = queue if queue is not None else MeritQueue()
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+    async def submit(self, awards):
+        """Queue awards, then sync; returns the sync summary."""
+        self.queue.add(awards)
+        return await self.sync()
+
+    async def sync(self):
+        """Send every pending award. Returns {"sent", "failed", "pending", "points", "connections"}."""
+        pending = self.queue.pending()
+        summary = {"sent": 0, "failed": 0, "pending": 0, "points": 0, "connections": 0}
+        if not pending:
+            return summary
+        pool = ConnectionPool(self.base_url, self.concurrency, self.timeout)
+        offline = asyncio.Event()
+        try:
+            results = await asyncio.gather(*(self._send(pool, award, offline) for award in pending))
+        finally:
+            await pool.close()
+        for status, points in results:
+            summary[status] += 1
+            summary["points"] += points
+        summary["connections"] = pool.opened
+        if not summary["pending"]:
+            self.queue.compact()
+        return summary
+
+    async def _send(self, pool, award, offline):
+        body = {"role_id": award["role_id"], "points_earned": award["points"], "game_summary": award["summary"]}
+        for attempt in range(self.retries + 1):
+            if offline.is_set():
+                return "pending", 0
+            try:
+                result = await pool.request("POST", "/api/game/merit", body, {"Idempotency-Key": award["id"]})
+            except SentinelError as e:
+                if not e.transient:
+                    self.queue.settle(award["id"], "failed", error=str(e), http_status=e.status)
+                    return "failed", 0
+                if attempt == self.retries:
+                    offline.set()
+                    return "pending", 0
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+            else:
+                self.queue.settle(award["id"], "done", points_awarded=result.get("points_awarded"),
+                                  capped=bool(result.get("capped")))
+                return "sent", result.get("points_awarded") or 0
+        return "pending", 0
+
+
+def read_scoresheet(path):
+    """Awards from a CSV (role_id, points, other columns go into the game summary) or JSONL file."""
+    awards = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    for number, row in enumerate(rows, 1):
+        row = dict(row)
+        try:
+            role_id = str(row.pop("role_id")).strip()
+            points = int(row.pop("points"))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"{path} row {number}: needs role_id and integer points ({e})") from e
+        summary = row.pop("summary", None) or {}
+        for key, value in row.items():
+            if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+                value = int(value)
+            summary[key] = value
+        awards.append({"role_id": role_id, "points": points, "summary": summary})
+    return awards
+
+
+# ===== Stand-in server =====
+
+class StandInServer:
+    """In-memory Sentinel Ops with the endpoints sentinel-api.js calls.
+
+    fail_rate answers that share of requests with 503 and latency delays every
+    response, to exercise retries and concurrency. daily_cap limits merit per
+    role per day, like the real service.
+    """
+
+    def __init__(self, daily_cap=None, welcome_bonus=10, fail_rate=0.0, latency=0.0, seed=None):
+        self.daily_cap = daily_cap
+        self.welcome_bonus = welcome_bonus
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.agents = {}        # role_id -> {"name", "balance"}
+        self.earned_today = {}  # (role_id, date) -> points
+        self.seen_keys = {}     # Idempotency-Key -> response
+        self.requests = 0
+        self.connections = 0
+        self.server = None
+        self.clients = {}       # writer -> handler task, for close()
+
+    def register(self, name, role_id=None):
+        role_id = role_id or uuid.uuid4().hex[:12]
+        self.agents[role_id] = {"name": name, "balance": self.welcome_bonus}
+        return role_id
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start listening; returns the base URL."""
+        self.server = await asyncio.start_server(self._serve, host, port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def close(self):
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*self.clients.values(), return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self.clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await read_message(reader)
+                if request is None:
+                    break
+                start, headers, body = request
+                method, path = start.split()[:2]
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.fail_rate and self.random.random() < self.fail_rate:
+                    status, data = 503, {"error": "Service unavailable"}
+                else:
+                    try:
+                        status, data = self._route(method, path, json.loads(body) if body else {}, headers)
+                    except (ValueError, KeyError, TypeError) as e:
+                        status, data = 400, {"error": f"bad request: {e}"}
+                writer.write(encode_message(f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}",
+                                             {"Content-Type": "application/json"},
+                                             json.dumps(data).encode("utf-8")))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    def _route(self, method, path, body, headers):
+        parts = path.strip("/").split("/")
+        if method == "POST" and parts == ["api", "agents", "register"]:
+            role_id = self.register(body["name"])
+            return 200, {"role_id": role_id, "welcome_bonus": self.welcome_bonus}
+        if method == "GET" and len(parts) == 4 and parts[:2] == ["api", "agents"] and parts[3] == "profile":
+            agent = self.agents.get(parts[2])
+            if agent is None:
+                return 404, {"error": "Unknown role_id"}
+            return 200, {"role_id": parts[2], "name": agent["name"], "balance": agent["balance"]}
+        if method == "GET" and len(parts) == 3 and parts[:2] == ["api", "wallet"]:
+            agent = self.agents.get(parts[2])
+            if agent is None:
+                return 404, {"error": "Unknown role_id"}
+            return 200, {"role_id": parts[2], "balance": agent["balance"]}
+        if method == "POST" and parts == ["api", "game", "merit"]:
+            key = headers.get("idempotency-key")
+            if key in self.seen_keys:
+                return 200, self.seen_keys[key]
+            agent = self.agents.get(body["role_id"])
+            if agent is None:
+                return 404, {"error": "Unknown role_id"}
+            points = int(body["points_earned"])
+            if points < 0:
+                return 400, {"error": "points_earned must not be negative"}
+            day = (body["role_id"], time.strftime("%Y-%m-%d"))
+            earned = self.earned_today.get(day, 0)
+            awarded = points if self.daily_cap is None else max(0, min(points, self.daily_cap - earned))
+            self.earned_today[day] = earned + awarded
+            agent["balance"] += awarded
+            result = {"points_awarded": awarded, "capped": awarded < points, "balance": agent["balance"]}
+            if key:
+                self.seen_keys[key] = result
+            return 200, result
+        return 404, {"error": f"No route for {method} {path}"}
+
+
+async def _serve_forever(args):
+    server = StandInServer(args.daily_cap, fail_rate=args.fail_rate, latency=args.latency)
+    for role_id in args.agents or ():
+        server.register(role_id, role_id)
+    url = await server.start(args.host, args.port)
+    print(f"Stand-in Sentinel Ops at {url} (agents: {', '.join(server.agents) or 'none'})")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submit EZ Merit Points in bulk to Sentinel Ops.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    submit = sub.add_parser("submit", help="queue the awards on a scoresheet and send them")
+    submit.add_argument("scoresheet", help="CSV with role_id and points columns (or JSONL)")
+    sync = sub.add_parser("sync", help="send awards still queued")
+    for p in (submit, sync):
+        p.add_argument("--server", default=DEFAULT_SERVER)
+        p.add_argument("--concurrency", type=int, default=CONCURRENCY, help="requests in flight at once")
+        p.add_argument("--retries", type=int, default=RETRIES)
+    sub.add_parser("status", help="show queued and failed awards")
+    for p in (submit, sync, sub.choices["status"]):
+        p.add_argument("--queue", default=QUEUE_FILE, help="write-ahead queue file")
+    serve = sub.add_parser("serve", help="run the in-memory stand-in server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--daily-cap", type=int)
+    serve.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered 503")
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    serve.add_argument("--agents", nargs="+", help="role ids to pre-register")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(_serve_forever(args))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "status":
+        queue = MeritQueue(args.queue)
+        pending = queue.pending()
+        print(f"{len(pending)} awards queued ({sum(a['points'] for a in pending)} points)")
+        for award, record in queue.failed():
+            print(f"FAILED {award['role_id']} {award['points']} points: {record.get('error')}")
+    else:
+        client = MeritSync(args.server, MeritQueue(args.queue), args.concurrency, args.retries)
+        start = time.perf_counter()
+        if args.command == "submit":
+            summary = asyncio.run(client.submit(read_scoresheet(args.scoresheet)))
+        else:
+            summary = asyncio.run(client.sync())
+        print(f"{summary['sent']} sent ({summary['points']} points awarded), {summary['failed']} rejected, "
+              f"{summary['pending']} still queued; {summary['connections']} connections, "
+              f"{time.perf_counter() - start:.2f}s")
+        if summary["pending"]:
+            print("Server unreachable; run 'python merit_sync.py sync' to send the rest.")
@@ -0,0 +1,43 @@
+# page_templates.py
+# Reusable PDF form XObjects for content that repeats across pages.
+#
+# place() compiles a drawing into a named form the first time it is used on
+# a canvas and afterwards only emits a reference to it, so repeated content
+# (card sheet frames and footers, card backs, token faces) is stored once per
+# PDF instead of once per use. Each form costs a few hundred bytes of object
+# overhead, so it only pays for content that is either large or used often.
+
+import hashlib
+
+FORM_PADDING = 4  # room for stroke width outside the bounding box
+
+
+def form_name(key):
+    """Short PDF-safe form name for a key tuple (it is repeated in every page's resources)."""
+    return "T" + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:10]
+
+
+def place(c, key, draw, x=0, y=0, bbox=None):
+    """Draw a repeated element at (x, y) by reference.
+
+    key is a tuple identifying the element's content; draw(c) draws it
+    relative to (0, 0) and runs only the first time key is placed on c.
+    bbox is (lowerx, lowery, upperx, uppery) around that origin, default the
+    whole page.
+    """
+    name = form_name(key)
+    if not c.hasForm(name):
+        if bbox is None:
+            c.beginForm(name)
+        else:
+            x0, y0, x1, y1 = bbox
+            c.beginForm(name, x0 - FORM_PADDING, y0 - FORM_PADDING, x1 + FORM_PADDING, y1 + FORM_PADDING)
+        draw(c)
+        c.endForm()
+    if x or y:
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+    else:
+        c.doForm(name)
@@ -0,0 +1,167 @@
+# pdf_merge.py
+# Concatenates separately rendered PDF sections into one document.
+# pypdf is optional: callers check available() and fall back to drawing
+# everything into a single canvas when it is missing.
+#
+# PdfStreamWriter needs no pypdf: it appends reportlab-generated sections to
+# any binary sink as they are finished, so only one section is in memory.
+
+import io
+import os
+import re
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+
+def available():
+    """True if pypdf is installed."""
+    return PdfWriter is not None
+
+
+def _info(metadata):
+    return {"/" + key.capitalize(): value for key, value in metadata.items()}
+
+
+def merge_pdfs(parts, output, metadata=None):
+    """Append the pages of each PDF in parts (bytes) to output, in order.
+
+    output may be a path or a writable binary file object. The document
+    info of the first part is kept (producer, dates) and overridden with
+    metadata, e.g. {"title": ..., "author": ...}.
+    """
+    if PdfWriter is None:
+        raise RuntimeError("pypdf is required to merge PDF sections (pip install pypdf)")
+    writer = PdfWriter()
+    info = {}
+    for i, data in enumerate(parts):
+        reader = PdfReader(io.BytesIO(data))
+        if i == 0 and reader.metadata:
+            info.update(reader.metadata)
+        for page in reader.pages:
+            writer.add_page(page)
+    info.update(_info(metadata or {}))
+    if info:
+        writer.add_metadata(info)
+    writer.write(output)
+
+
+# ===== Streaming writer =====
+
+_REF_RE = re.compile(rb"(\d+) 0 R\b")
+_OBJ_RE = re.compile(rb"(\d+) 0 obj")
+_INFO_ENTRY_RE = re.compile(rb"/(\w+) (\((?:\\.|[^\\)])*\)|/\w+)", re.S)
+
+
+def _pdf_string(value):
+    """Encode a str as a PDF literal string (UTF-16 when it isn't Latin-1)."""
+    try:
+        raw = value.encode("latin-1")
+    except UnicodeEncodeError:
+        raw = b"\xfe\xff" + value.encode("utf-16-be")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _read_sections(data):
+    """Split a PDF with a classic xref table into {number: raw object bytes} and its trailer."""
+    xref = int(data[data.rindex(b"startxref") + 9:].split()[0])
+    lines = data[xref:].split(b"trailer", 1)
+    rows = lines[0].split(b"\n")[2:]
+    offsets = {}
+    for number, row in enumerate(rows):
+        parts = row.split()
+        if len(parts) == 3 and parts[2] == b"n":
+            offsets[number] = int(parts[0])
+    bounds = sorted(offsets.values()) + [xref]
+    ends = dict(zip(bounds, bounds[1:]))
+    objects = {n: data[off:ends[off]] for n, off in offsets.items()}
+    return objects, lines[1]
+
+
+def page_count(data):
+    """Number of pages in a rendered PDF (bytes), read from its page tree root."""
+    objects, trailer = _read_sections(data)
+    root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+    pages = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+    return int(re.search(rb"/Count (\d+)", objects[pages]).group(1))
+
+
+class PdfStreamWriter:
+    """Write a PDF to output one section at a time.
+
+    output may be a path or any writable binary file object; nothing is
+    seeked, so pipes and HTTP responses work. Each section's page tree is
+    hung under one root page tree, so sections are copied without parsing
+    their content. Call add() per rendered section, then close().
+    """
+
+    ROOT, CATALOG, INFO = 1, 2, 3
+
+    def __init__(self, output, metadata=None):
+        self._own = isinstance(output, (str, os.PathLike))
+        self._out = open(output, "wb") if self._own else output
+        self._metadata = metadata or {}
+        self._offsets = {}
+        self._next = 4
+        self._kids = []
+        self._pages = 0
+        self._info = None
+        self._pos = 0
+        self._write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+    def _write(self, data):
+        self._out.write(data)
+        self._pos += len(data)
+
+    def _object(self, number, body):
+        self._offsets[number] = self._pos
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def add(self, data):
+        """Append the pages of one rendered PDF (bytes) and flush them to the sink."""
+        objects, trailer = _read_sections(data)
+        root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+        info = re.search(rb"/Info (\d+) 0 R", trailer)
+        info = int(info.group(1)) if info else None
+        pages = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+        if self._info is None and info is not None:
+            self._info = objects[info]
+        keep = [n for n in sorted(objects) if n not in (root, info)]
+        numbers = {old: self._next + i for i, old in enumerate(keep)}
+        self._next += len(keep)
+
+        def renumber(match):
+            return b"%d 0 R" % numbers.get(int(match.group(1)), 0)
+
+        for old in keep:
+            raw = objects[old]
+            body = raw[_OBJ_RE.match(raw).end():raw.rindex(b"endobj")].strip(b"\r\n")
+            head, sep, stream = body.partition(b"\nstream")
+            head = _REF_RE.sub(renumber, head)
+            if old == pages:
+                head = head.replace(b"<<", b"<< /Parent %d 0 R" % self.ROOT, 1)
+                self._pages += int(re.search(rb"/Count (\d+)", head).group(1))
+            self._object(numbers[old], head + sep + stream)
+        self._kids.append(numbers[pages])
+        self._out.flush()
+
+    def close(self):
+        """Write the page tree root, catalog, info and cross-reference table."""
+        kids = b" ".join(b"%d 0 R" % k for k in self._kids)
+        self._object(self.ROOT, b"<< /Count %d /Kids [ %s ] /Type /Pages >>" % (self._pages, kids))
+        self._object(self.CATALOG, b"<< /PageMode /UseNone /Pages %d 0 R /Type /Catalog >>" % self.ROOT)
+        entries = dict(_INFO_ENTRY_RE.findall(self._info or b""))
+        for key, value in _info(self._metadata).items():
+            entries[key[1:].encode("ascii")] = _pdf_string(value)
+        self._object(self.INFO, b"<< " + b" ".join(b"/" + k + b" " + v for k, v in entries.items()) + b" >>")
+        xref = self._pos
+        rows = [b"0000000000 65535 f \n"]
+        rows += [b"%010d 00000 n \n" % self._offsets[n] for n in range(1, self._next)]
+        self._write(b"xref\n0 %d\n" % self._next + b"".join(rows))
+        self._write(b"trailer\n<< /Info %d 0 R /Root %d 0 R /Size %d >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self.INFO, self.CATALOG, self._next, xref))
+        self._out.flush()
+        if self._own:
+            self._out.close()
@@ -0,0 +1,469 @@
+# print_shop.py
+# Print-shop runs: many kit orders packed onto shared sheets.
+#
+# create_batch() prints each kit on its own: every deck ends on a partly
+# filled card sheet, and the tokens get a page of their own. Here the cards
+# and tokens of every kit in every order are pooled instead. Identical cards
+# (the same text, language and fit, e.g. the four copies of each action card
+# in every kit) become one counted run, and the runs fill sheets in order:
+# the card grid from card_layout(), and tokens in the band left below it (or
+# token-only sheets once the cards run out). A sheet that one run of cards
+# and one run of tokens fill completely repeats until either run ends, so it
+# is stored once with a copy count, and packing is a single pass over the
+# runs however many kits there are. Only the last sheet of each language is
+# part empty. Full pages (cover, rules, board) are counted runs too: a page
+# that is the same in many orders is rendered once and printed as often as
+# needed.
+#
+# The run PDF holds each distinct sheet once, with its id and copy count in
+# the bottom margin. The plan JSON lists every sheet and, per order, how
+# many of each card and token to pull from which sheets (the cut/sort list),
+# which is also written as one text file per order.
+#
+# Usage: python print_shop.py orders.json [--output print_run.pdf] [--bleed 0.125] [--card-backs]
+#        python print_shop.py --synthetic 2000 [--seed 1]
+
+import argparse
+import io
+import json
+import os
+import random
+import time
+from collections import defaultdict
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+import localization
+import pdf_merge
+import stellar_virtue_boardgame as svb
+from imposition import CROP_MARK_LENGTH, CROP_MARK_OFFSET, SheetLayout, draw_crop_marks, fit_grid
+from render_cache import SectionCache
+
+TOKEN_SPACING = 0.25 * inch  # as on the kit's token page
+SLUG_Y = 0.3 * inch          # where kits print their footer
+PAGE_SECTIONS = [name for name, _, _ in svb.SECTIONS if name not in svb.CARD_SECTIONS and name != "tokens"]
+
+
+# ===== Orders =====
+
+def load_orders(path):
+    """Read orders: a JSON list, or {"defaults": {...}, "orders": [...]}. Each order is a
+    variant (see VARIANT_DEFAULTS) plus "order" (its id) and "kits" (how many to print)."""
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        return manifest
+    defaults = manifest.get("defaults", {})
+    return [dict(defaults, **order) for order in manifest["orders"]]
+
+
+def normalize_order(order, index=0):
+    """(order id, kits, normalized variant) for one order. Raises ValueError."""
+    order = dict(order)
+    name = str(order.pop("order", f"order-{index + 1}"))
+    kits = order.pop("kits", 1)
+    if not isinstance(kits, int) or kits < 1:
+        raise ValueError(f"{name}: kits must be a positive integer, got {kits!r}")
+    order.pop("output", None)
+    try:
+        return name, kits, svb.normalize_variant(order)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from e
+
+
+def synthetic_orders(kits, seed=None):
+    """Orders adding up to kits kits, each of a random size, language, deck and player count."""
+    rng = random.Random(seed)
+    orders = []
+    while kits > 0:
+        n = min(kits, rng.randint(1, 60))
+        number = len(orders) + 1
+        orders.append({"order": f"order-{number:05d}", "kits": n, "school": f"School {number}",
+                       "language": rng.choice(svb.LANGUAGES), "deck": rng.choice(["full", "curated"]),
+                       "players": rng.randint(2, 6)})
+        kits -= n
+    return orders
+
+
+# ===== Counted runs =====
+
+class Run:
+    """One distinct card, token or page, and how many of it each order needs.
+
+    draw holds what rendering needs: (record, draw, frame, back_label,
+    accent_color) for a card, the token type for a token, and
+    (section name, deck, cache key) for a page.
+    """
+
+    def __init__(self, kind, label, language, draw):
+        self.kind = kind
+        self.label = label
+        self.language = language
+        self.draw = draw
+        self.count = 0
+        self.orders = []  # [order index, count], in order
+        self._next = 0
+        self._used = 0
+
+    def add(self, order, count):
+        if self.orders and self.orders[-1][0] == order:
+            self.orders[-1][1] += count
+        else:
+            self.orders.append([order, count])
+        self.count += count
+
+    def allocate(self, count):
+        """Yield (order index, count) for the next count pieces; orders are served in turn."""
+        while count:
+            order, wanted = self.orders[self._next]
+            take = min(count, wanted - self._used)
+            self._used += take
+            if self._used == wanted:
+                self._next += 1
+                self._used = 0
+            count -= take
+            yield order, take
+
+
+def card_label(section, record):
+    """Short English name of a card for cut lists."""
+    if section == "saint_ships":
+        return f"Saint Ship: {record}"
+    if section == "enemy_ships":
+        return f"Enemy Ship {record}"
+    if section in ("catholic_actions", "enemy_actions"):
+        kind = "Catholic Action" if section == "catholic_actions" else "Enemy Action"
+        return f"{kind}: {record.split(':')[0]}"
+    if section == "virtue_questions":
+        return f"Virtue Question: {record[0]}: {record[1][:40]}"
+    return f"Moral Choice: {record[3]}: {record[0][:40]}"
+
+
+def collect(orders, per_sheet):
+    """Counted runs for normalized orders ((id, kits, variant) each).
+
+    Returns (card runs, token runs, page runs, sheets each order would use
+    printed kit by kit), runs in print order.
+    """
+    runs = {}
+    separate = []
+    for index, (_, kits, variant) in enumerate(orders):
+        deck = svb.build_deck(variant)
+        language = variant["language"]
+        sections = variant["sections"] or [name for name, _, _ in svb.SECTIONS]
+        sheets = 0
+        for section in svb.CARD_SECTIONS:
+            if section not in sections:
+                continue
+            records, draw, back_label, accent_color, frame = svb.card_deck(section, deck)
+            sheets += -(-len(records) // per_sheet)
+            for record in records:
+                key = ("card", section, language, deck["autofit"], repr(record))
+                run = runs.get(key)
+                if run is None:
+                    run = runs[key] = Run("card", card_label(section, record), language,
+                                          (record, draw, frame, back_label, accent_color))
+                run.add(index, kits)
+        if "tokens" in sections:
+            sheets += 1
+            for token_type in svb.TOKEN_TYPES:
+                key = ("token", language, token_type)
+                run = runs.get(key)
+                if run is None:
+                    run = runs[key] = Run("token", f"{token_type} token", language, token_type)
+                run.add(index, kits * svb.TOKENS_PER_TYPE)
+        pages = [name for name in PAGE_SECTIONS if name in sections]
+        for name, part, key in svb.section_units(deck, pages) if pages else ():
+            run = runs.get(key)
+            if run is None:
+                run = runs[key] = Run("page", name, language, (name, part, key))
+            run.add(index, kits)
+        separate.append(sheets)
+    by_kind = defaultdict(list)
+    for run in runs.values():
+        by_kind[run.kind].append(run)
+    # Stable sorts: grouped by language, cards in deck order within it
+    order = {language: i for i, language in enumerate(svb.LANGUAGES)}
+    for kind in by_kind:
+        by_kind[kind].sort(key=lambda run: order.get(run.language, len(order)))
+    return by_kind["card"], by_kind["token"], by_kind["page"], separate
+
+
+# ===== Packing =====
+
+class SheetShape:
+    """Where cards and tokens go on a run sheet: cards in the card_layout() grid, tokens in
+    the band below it (band is None if there is no room), tokens alone on token sheets."""
+
+    def __init__(self, options=None):
+        self.cards = svb.card_layout(options)
+        width = svb.PAGE_WIDTH - svb.MARGIN - 0.25 * inch
+        _, lowest = self.cards.position(self.cards.per_sheet - 1)
+        top = lowest - self.cards.bleed - svb.CARD_SPACING
+        if self.cards.crop_marks:
+            top -= CROP_MARK_OFFSET + CROP_MARK_LENGTH
+        self.band = self._tokens(width, top - svb.MARGIN, top)
+        self.tokens = self._tokens(width, svb.PAGE_HEIGHT - 2 * svb.MARGIN, svb.PAGE_HEIGHT - svb.MARGIN)
+
+    @staticmethod
+    def _tokens(width, height, top):
+        if height < svb.TOKEN_SIZE:
+            return None
+        cols, rows = fit_grid(width, height, svb.TOKEN_SIZE, svb.TOKEN_SIZE, TOKEN_SPACING)
+        return SheetLayout(svb.PAGE_WIDTH, svb.PAGE_HEIGHT, svb.TOKEN_SIZE, svb.TOKEN_SIZE, cols, rows,
+                           left=svb.MARGIN, top=top, spacing=TOKEN_SPACING)
+
+
+class _Stream:
+    """The pieces of a list of runs, taken in order."""
+
+    def __init__(self, runs):
+        self.runs = [run for run in runs if run.count]
+        self.index = 0
+        self.left = self.runs[0].count if self.runs else 0
+
+    def __bool__(self):
+        return self.index < len(self.runs)
+
+    def whole(self, n):
+        """Sheets' worth of n pieces left in the current run."""
+        return self.left // n
+
+    def repeat(self, n, copies):
+        run = self.runs[self.index]
+        self._consume(n * copies)
+        return [(run, n)]
+
+    def take(self, n):
+        taken = []
+        while n and self:
+            k = min(n, self.left)
+            taken.append((self.runs[self.index], k))
+            self._consume(k)
+            n -= k
+        return taken
+
+    def _consume(self, n):
+        self.left -= n
+        if not self.left:
+            self.index += 1
+            self.left = self.runs[self.index].count if self else 0
+
+
+def pack(card_runs, token_runs, shape):
+    """Fill sheets with counted runs of cards and tokens, in order.
+
+    Returns [(copies, cards, tokens)] where cards and tokens list (run,
+    pieces) in slot order. Consecutive identical sheets are one entry, so
+    the result grows with the number of runs, not of pieces.
+    """
+    cards, tokens = _Stream(card_runs), _Stream(token_runs)
+    sheets = []
+    while cards or tokens:
+        if cards:
+            card_slots, token_slots = shape.cards.per_sheet, shape.band.per_sheet if shape.band else 0
+        else:
+            card_slots, token_slots = 0, shape.tokens.per_sheet
+        fills = [stream.whole(n) for stream, n in ((cards, card_slots), (tokens, token_slots)) if stream and n]
+        copies = min(fills)
+        if copies:
+            sheets.append((copies, cards.repeat(card_slots, copies) if card_slots else [],
+                           tokens.repeat(token_slots, copies) if tokens and token_slots else []))
+        else:
+            sheets.append((1, cards.take(card_slots), tokens.take(token_slots)))
+    return sheets
+
+
+def plan_run(orders, options=None):
+    """Pack normalized orders into a print run.
+
+    Returns a dict: "sheets" as [(sheet id, language, copies, cards,
+    tokens)], "pages" as [(sheet id, run)], "pulls" per order index as
+    {run: [(sheet id, count)]}, and "separate", the sheets each order would
+    take printed kit by kit.
+    """
+    shape = SheetShape(options)
+    card_runs, token_runs, page_runs, separate = collect(orders, shape.cards.per_sheet)
+    pulls = [defaultdict(list) for _ in orders]
+    sheets = []
+    for language in dict.fromkeys(run.language for run in card_runs + token_runs):
+        for copies, cards, tokens in pack([run for run in card_runs if run.language == language],
+                                          [run for run in token_runs if run.language == language], shape):
+            sheet = f"S{len(sheets) + 1}"
+            sheets.append((sheet, language, copies, cards, tokens))
+            for run, n in cards + tokens:
+                for order, count in run.allocate(n * copies):
+                    pulls[order][run].append((sheet, count))
+    pages = []
+    for run in page_runs:
+        sheet = f"P{len(pages) + 1}"
+        pages.append((sheet, run))
+        for order, count in run.allocate(run.count):
+            pulls[order][run].append((sheet, count))
+    return {"shape": shape, "sheets": sheets, "pages": pages, "pulls": pulls, "separate": separate}
+
+
+# ===== Output =====
+
+def _draw_slug(c, text):
+    c.setFont(svb.FONT_NAME, 8)
+    c.setFillColor(svb.royal_turquoise)
+    svb.draw_string(c, svb.MARGIN, SLUG_Y, text)
+
+
+def render_sheets(plan, card_backs=False):
+    """PDF bytes per language with each distinct sheet once (and its mirrored back with card_backs)."""
+    svb.use_fonts()
+    shape = plan["shape"]
+    parts = []
+    by_language = defaultdict(list)
+    for sheet in plan["sheets"]:
+        by_language[sheet[1]].append(sheet)
+    for language, sheets in by_language.items():
+        localization.use_language(language)
+        buf = io.BytesIO()
+        c = canvas.Canvas(buf, pagesize=letter)
+        svb.set_metadata(c)
+        for sheet, _, copies, cards, tokens in sheets:
+            token_layout = shape.band if cards else shape.tokens
+            slots = [run for run, n in cards for _ in range(n)]
+            for slot, run in enumerate(slots):
+                x, y = shape.cards.position(slot)
+                record, draw, frame, _, accent_color = run.draw
+                if frame is None:
+                    svb.draw_card_frame(c, x, y, accent_color)
+                else:
+                    frame(c, x, y)
+                draw(c, x, y, record)
+            for slot, run in enumerate(run for run, n in tokens for _ in range(n)):
+                svb.draw_token(c, *token_layout.position(slot), run.draw)
+            if slots and shape.cards.crop_marks:
+                draw_crop_marks(c, shape.cards, len(slots))
+            _draw_slug(c, f"{sheet} - {language} - print {copies}")
+            c.showPage()
+            if card_backs and slots:
+                for slot, run in enumerate(slots):
+                    x, y = shape.cards.position(slot, mirrored=True)
+                    svb.draw_card_back(c, x, y, run.draw[3], run.draw[4])
+                if shape.cards.crop_marks:
+                    draw_crop_marks(c, shape.cards, len(slots), mirrored=True)
+                _draw_slug(c, f"{sheet} back - {language} - print {copies}")
+                c.showPage()
+        c.save()
+        parts.append(buf.getvalue())
+    return parts
+
+
+def render_pages(plan, cache=None):
+    """Rendered PDF bytes of each page run, in plan order (from cache where possible)."""
+    units = [run.draw for _, run in plan["pages"]]
+    return [data for _, data, _ in svb.stream_units(units, cache=cache)]
+
+
+def plan_report(orders, plan, page_counts):
+    """The plan as JSON-able data: the run's sheets and pages, and each order's cut/sort list."""
+    sheets = [{"sheet": sheet, "language": language, "copies": copies,
+               "cards": [[run.label, n] for run, n in cards], "tokens": [[run.label, n] for run, n in tokens]}
+              for sheet, language, copies, cards, tokens in plan["sheets"]]
+    pages = [{"sheet": sheet, "language": run.language, "section": run.label, "pages": page_counts[sheet],
+              "copies": run.count} for sheet, run in plan["pages"]]
+    cut_lists = []
+    for (name, kits, variant), pulls in zip(orders, plan["pulls"]):
+        items = [{"item": run.label, "kind": run.kind, "per_kit": sum(n for _, n in where) // kits,
+                  "from": [[sheet, n] for sheet, n in where]} for run, where in pulls.items()]
+        cut_lists.append({"order": name, "kits": kits, "language": variant["language"],
+                          "school": variant["school"], "items": items})
+    page_sheets = sum(page["pages"] * page["copies"] for page in pages)
+    printed = sum(sheet["copies"] for sheet in sheets) + page_sheets
+    # Full pages take the same paper either way; only cards and tokens pack tighter
+    separate = sum(kits * n for (_, kits, _), n in zip(orders, plan["separate"])) + page_sheets
+    return {"orders": len(orders), "kits": sum(kits for _, kits, _ in orders),
+            "sheets_printed": printed, "sheets_kit_by_kit": separate,
+            "distinct_sheets": len(sheets) + sum(page["pages"] for page in pages),
+            "sheets": sheets, "pages": pages, "cut_lists": cut_lists}
+
+
+def format_cut_list(cut_list):
+    """One order's cut/sort list as text."""
+    lines = [f"Order {cut_list['order']}: {cut_list['kits']} kits ({cut_list['language']})"
+             + (f" for {cut_list['school']}" if cut_list["school"] else "")]
+    for kind, title in (("page", "Pages (one of each per kit)"), ("card", "Cards"), ("token", "Tokens")):
+        items = [item for item in cut_list["items"] if item["kind"] == kind]
+        if not items:
+            continue
+        lines.append(f"{title}:")
+        for item in items:
+            where = ", ".join(f"{sheet} x{n}" for sheet, n in item["from"])
+            lines.append(f"  {item['per_kit']:>3} per kit  {item['item']:<60} {where}")
+    return "\n".join(lines) + "\n"
+
+
+def write_run(orders, output, plan_path, cut_dir, options=None, use_cache=True):
+    """Plan and render a print run: the PDF at output, the plan JSON, one cut list per order.
+    Returns the plan report."""
+    started = time.perf_counter()
+    plan = plan_run(orders, options)
+    planned = time.perf_counter() - started
+    cache = SectionCache() if use_cache else None
+    card_parts = render_sheets(plan, bool(options and options.get("card_backs")))
+    page_parts = render_pages(plan, cache)
+    page_counts = {sheet: pdf_merge.page_count(data) for (sheet, _), data in zip(plan["pages"], page_parts)}
+    metadata = dict(svb.PDF_METADATA, title=f"{svb.PDF_METADATA['title']} - Print Run")
+    writer = pdf_merge.PdfStreamWriter(output, metadata)
+    for data in card_parts + page_parts:
+        writer.add(data)
+    writer.close()
+    if cache is not None:
+        cache.prune()
+    report = plan_report(orders, plan, page_counts)
+    report["planning_seconds"] = round(planned, 3)
+    with open(plan_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    os.makedirs(cut_dir, exist_ok=True)
+    for cut_list in report["cut_lists"]:
+        slug = "".join(ch if ch.isalnum() or ch in "-_" else "-" for ch in cut_list["order"])
+        with open(os.path.join(cut_dir, f"{slug}.txt"), "w", encoding="utf-8") as f:
+            f.write(format_cut_list(cut_list))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack many Stellar Virtue kit orders onto shared print sheets.")
+    parser.add_argument("orders", nargs="?", help="JSON orders: variants with \"order\" and \"kits\" keys")
+    parser.add_argument("--synthetic", type=int, metavar="KITS", help="plan random orders adding up to KITS kits")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="print_run.pdf", help="run PDF path")
+    parser.add_argument("--plan", help="plan JSON path (default: next to the PDF)")
+    parser.add_argument("--cut-lists", help="directory for one cut list per order (default: next to the PDF)")
+    parser.add_argument("--bleed", type=float, default=0, help="bleed around each card, in inches")
+    parser.add_argument("--crop-marks", action="store_true", help="draw crop marks around the cards")
+    parser.add_argument("--card-backs", action="store_true", help="follow each sheet with its mirrored card backs")
+    parser.add_argument("--grid", type=lambda v: tuple(int(n) for n in v.split("x")), default=None,
+                        metavar="COLSxROWS", help="cards per sheet, e.g. 3x2")
+    parser.add_argument("--no-cache", action="store_true", help="re-render every full page")
+    args = parser.parse_args()
+    if not args.orders and not args.synthetic:
+        parser.error("give an orders file or --synthetic KITS")
+
+    stem = os.path.splitext(args.output)[0]
+    svb.use_fonts(report=True)
+    try:
+        raw = load_orders(args.orders) if args.orders else synthetic_orders(args.synthetic, args.seed)
+        orders = [normalize_order(order, i) for i, order in enumerate(raw)]
+    except (OSError, KeyError, ValueError) as e:
+        raise SystemExit(f"Bad orders: {e}")
+    if len({name for name, _, _ in orders}) != len(orders):
+        raise SystemExit("Bad orders: order ids must be distinct")
+    options = svb.imposition_options(args.bleed * inch, args.crop_marks, args.card_backs, args.grid)
+    started = time.perf_counter()
+    report = write_run(orders, args.output, args.plan or stem + ".json", args.cut_lists or stem + "-orders",
+                       options, use_cache=not args.no_cache)
+    saved = 1 - report["sheets_printed"] / report["sheets_kit_by_kit"]
+    print(f"{report['kits']} kits in {report['orders']} orders: {report['sheets_printed']} sheets printed "
+          f"instead of {report['sheets_kit_by_kit']} kit by kit ({saved:.1%} less paper)")
+    print(f"{report['distinct_sheets']} distinct sheets; planned in {report['planning_seconds']:.2f}s, "
+          f"written in {time.perf_counter() - started:.1f}s")
+    print(f"Wrote {args.output}, {args.plan or stem + '.json'} and {report['orders']} cut lists in "
+          f"{args.cut_lists or stem + '-orders'}/")
@@ -0,0 +1,267 @@
+# question_engine.py
+# Server-side question selection with the same rules as teaching-module.js.
+#
+# getRandomQuestion() in the web app filters the whole bank on every draw.
+# Here the bank is indexed once (QuestionBank): every question has a bit, and
+# each (category, topic, subtopic, level) slot is a bitmask. A learner is a
+# few integers used as bitsets (answered, items at the learner's current
+# level for their topic, items of fully mastered topics) plus a byte per
+# topic for level and correct count, kept up to date as answers come in.
+# A draw is then a handful of AND/NOT operations on bitsets the size of the
+# bank and a random set bit, no matter how many learners are hosted.
+#
+# Usage: python question_engine.py [--learners 20000] [--draws 200000]
+
+import argparse
+import random
+import time
+import tracemalloc
+from collections import deque
+
+import card_store
+import virtue_data
+
+# Same defaults virtues.js registers with TeachingModule
+MASTERY_THRESHOLD = 2
+MAX_LEVEL = 3
+# Random probes for a set bit before counting bits to find one
+RANDOM_PROBES = 8
+WORD = 64
+WORD_MASK = (1 << WORD) - 1
+
+
+def random_bit(mask, rng):
+    """Index of a uniformly random set bit of mask (which must be non-zero)."""
+    size = mask.bit_length()
+    for _ in range(RANDOM_PROBES):
+        i = rng.randrange(size)
+        if mask >> i & 1:
+            return i
+    # Sparse mask: pick the k-th set bit, skipping whole words by popcount
+    k = rng.randrange(mask.bit_count())
+    base = 0
+    word = mask & WORD_MASK
+    while k >= word.bit_count():
+        k -= word.bit_count()
+        base += WORD
+        word = mask >> base & WORD_MASK
+    for _ in range(k):
+        word &= word - 1
+    return base + (word & -word).bit_length() - 1
+
+
+class QuestionBank:
+    """Bit indexes over every question in virtues.js, shared by all learners.
+
+    Question i is bit i. Topics with subtopics (the cardinal virtues) are
+    tracked per subtopic, gifts and fruits per topic, as in the web app.
+    Reads the memory-mapped card store unless data (a VirtueData) is given.
+    """
+
+    def __init__(self, data=None, categories=virtue_data.QUESTION_CATEGORIES,
+                 mastery_threshold=MASTERY_THRESHOLD, max_level=MAX_LEVEL):
+        if data is None:
+            store = card_store.open_store()
+            items = store.question_selection(categories)
+            self.questions = card_store.QuestionRecords(store, items)
+            keys = [store.question_keys(i) for i in items]
+        else:
+            banks = {"cardinal": data.virtue_questions, "gift": data.gift_questions, "fruit": data.fruit_questions}
+            self.questions = [question for category in categories for question in banks[category]]
+            keys = [(q.category, q.topic, q.subtopic, q.level) for q in self.questions]
+        self.mastery_threshold = mastery_threshold
+        self.max_level = max_level
+        self.ids = []              # "category:index", the web app's globalId
+        self.slots = []            # (category, topic, subtopic or None)
+        self.item_slots = []       # question -> slot number
+        self.index = {}            # (category, topic, subtopic, level) -> bitmask
+        self.slot_masks = []       # slot -> bitmask of its questions
+        self.slot_level_masks = []  # slot -> [bitmask per level 0..max_level]
+        self.category_masks = {category: 0 for category in categories}
+        slot_numbers = {}
+        local = dict.fromkeys(categories, 0)
+        for item, (category, topic, subtopic, level) in enumerate(keys):
+            bit = 1 << item
+            subtopic = subtopic if category == "cardinal" else None
+            slot_key = (category, topic, subtopic)
+            slot = slot_numbers.get(slot_key)
+            if slot is None:
+                slot = slot_numbers[slot_key] = len(self.slots)
+                self.slots.append(slot_key)
+                self.slot_masks.append(0)
+                self.slot_level_masks.append([0] * (max_level + 1))
+            level = min(max(level, 1), max_level)
+            self.ids.append(f"{category}:{local[category]}")
+            local[category] += 1
+            self.item_slots.append(slot)
+            self.slot_masks[slot] |= bit
+            self.slot_level_masks[slot][level] |= bit
+            self.category_masks[category] |= bit
+            key = slot_key + (level,)
+            self.index[key] = self.index.get(key, 0) | bit
+        self.slot_numbers = slot_numbers
+        self.item_numbers = {gid: i for i, gid in enumerate(self.ids)}
+        self.all_mask = (1 << len(keys)) - 1
+        # Every topic starts at level 1
+        self.start_mask = 0
+        for levels in self.slot_level_masks:
+            self.start_mask |= levels[1]
+
+    def __len__(self):
+        return len(self.questions)
+
+    def items(self, mask):
+        """Question numbers set in mask, in bank order."""
+        return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+class Learner:
+    """One learner's progress and history as bitsets over a QuestionBank."""
+    __slots__ = ("levels", "correct", "answered", "recent", "current", "mastered")
+
+    def __init__(self, bank, recent_window=None):
+        self.levels = bytearray([1]) * len(bank.slots)
+        self.correct = bytearray(len(bank.slots))
+        self.answered = 0          # bitset of answered questions
+        self.recent = deque() if recent_window else None
+        self.current = bank.start_mask  # questions at the learner's level for their topic
+        self.mastered = 0          # questions of fully mastered topics
+
+
+class QuestionEngine:
+    """Selects questions for many learners in one process.
+
+    Selection follows TeachingModule.getRandomQuestion: prefer unanswered
+    questions (all of them once everything is answered); among those,
+    questions at the learner's current level for a topic not yet fully
+    mastered; then any question of a topic not fully mastered; then any.
+    With recent_window, only the last recent_window answered questions count
+    as answered.
+    """
+
+    def __init__(self, bank=None, recent_window=None, seed=None):
+        self.bank = bank or QuestionBank()
+        self.recent_window = recent_window
+        self.learners = {}
+        self.random = random.Random(seed)
+
+    def learner(self, learner_id):
+        learner = self.learners.get(learner_id)
+        if learner is None:
+            learner = self.learners[learner_id] = Learner(self.bank, self.recent_window)
+        return learner
+
+    def forget(self, learner_id):
+        self.learners.pop(learner_id, None)
+
+    def select(self, learner_id, category=None):
+        """Return the next question number for the learner (see bank.questions / bank.ids), or None."""
+        bank = self.bank
+        learner = self.learner(learner_id)
+        pool = bank.category_masks.get(category, 0) if category else bank.all_mask
+        if not pool:
+            return None
+        candidates = pool & ~learner.answered or pool
+        open_items = candidates & ~learner.mastered
+        choice = candidates & learner.current & ~learner.mastered or open_items or candidates
+        return random_bit(choice, self.random)
+
+    def record_answer(self, learner_id, item, correct):
+        """Record an answer to question item; returns (correct count, level, leveled_up).
+
+        As in game.js, only correct answers count as answered and advance
+        progress; a topic levels up after mastery_threshold correct answers.
+        """
+        bank = self.bank
+        learner = self.learner(learner_id)
+        slot = bank.item_slots[item]
+        level = learner.levels[slot]
+        if not correct:
+            return learner.correct[slot], level, False
+        self._mark_answered(learner, item)
+        count = min(bank.mastery_threshold, learner.correct[slot] + 1)
+        leveled_up = count >= bank.mastery_threshold and level < bank.max_level
+        if leveled_up:
+            levels = bank.slot_level_masks[slot]
+            learner.current ^= levels[level] | levels[level + 1]
+            level += 1
+            count = 0
+            learner.levels[slot] = level
+        elif count >= bank.mastery_threshold:
+            learner.mastered |= bank.slot_masks[slot]
+        learner.correct[slot] = count
+        return count, level, leveled_up
+
+    def _mark_answered(self, learner, item):
+        learner.answered |= 1 << item
+        if learner.recent is not None:
+            learner.recent.append(item)
+            if len(learner.recent) > self.recent_window:
+                oldest = learner.recent.popleft()
+                if oldest not in learner.recent:
+                    learner.answered &= ~(1 << oldest)
+
+    # ===== Web app state =====
+
+    def progress_state(self, learner_id):
+        """The learner's progress in TeachingModule's progressState shape."""
+        learner = self.learner(learner_id)
+        state = {}
+        for slot, (category, topic, subtopic) in enumerate(self.bank.slots):
+            entry = {"level": learner.levels[slot], "correct": learner.correct[slot]}
+            if subtopic is None:
+                state.setdefault(category, {})[topic] = entry
+            else:
+                state.setdefault(category, {}).setdefault(topic, {})[subtopic] = entry
+        return state
+
+    def load_state(self, learner_id, progress_state, answered_ids=()):
+        """Restore a learner from the web app's progressState and answeredTeachingIds."""
+        bank = self.bank
+        learner = self.learners[learner_id] = Learner(bank, self.recent_window)
+        learner.current = 0
+        for slot, (category, topic, subtopic) in enumerate(bank.slots):
+            entry = progress_state.get(category, {}).get(topic, {})
+            if subtopic is not None:
+                entry = entry.get(subtopic, {})
+            level = min(max(int(entry.get("level", 1)), 1), bank.max_level)
+            count = min(int(entry.get("correct", 0)), bank.mastery_threshold)
+            learner.levels[slot] = level
+            learner.correct[slot] = count
+            learner.current |= bank.slot_level_masks[slot][level]
+            if level >= bank.max_level and count >= bank.mastery_threshold:
+                learner.mastered |= bank.slot_masks[slot]
+        for gid in answered_ids:
+            item = bank.item_numbers.get(gid)
+            if item is not None:
+                self._mark_answered(learner, item)
+        return learner
+
+
+def simulate(learners=20000, draws=200000, p_correct=0.7, seed=1):
+    """Drive the engine with random learners; returns (draws per second, bytes per learner)."""
+    tracemalloc.start()
+    engine = QuestionEngine(seed=seed)
+    before = tracemalloc.get_traced_memory()[0]
+    for learner_id in range(learners):
+        engine.learner(learner_id)
+    per_learner = (tracemalloc.get_traced_memory()[0] - before) / learners
+    tracemalloc.stop()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(draws):
+        learner_id = rng.randrange(learners)
+        item = engine.select(learner_id)
+        engine.record_answer(learner_id, item, rng.random() < p_correct)
+    return draws / (time.perf_counter() - start), per_learner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exercise the question engine with simulated learners.")
+    parser.add_argument("--learners", type=int, default=20000)
+    parser.add_argument("--draws", type=int, default=200000, help="select + answer rounds to run")
+    parser.add_argument("--p-correct", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rate, per_learner = simulate(args.learners, args.draws, args.p_correct, args.seed)
+    print(f"{args.learners} learners: {rate:,.0f} draws/s, {per_learner:,.0f} bytes per learner")
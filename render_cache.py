@@ -0,0 +1,105 @@
+# render_cache.py
+# On-disk cache of rendered document sections for incremental rebuilds.
+#
+# Each section is keyed by a hash of its name, the deck data it draws, and a
+# fingerprint of the drawing code. A build manifest records which section
+# keys produced an output file, so a rebuild where nothing changed can skip
+# rendering and merging altogether.
+
+import hashlib
+import json
+import os
+
+from virtue_data import CACHE_DIR
+
+SECTION_CACHE_DIR = os.path.join(CACHE_DIR, "sections")
+MAX_CACHED_SECTIONS = 512
+
+_fingerprints = {}
+
+
+def code_fingerprint(paths):
+    """Hash of the given source files; changes whenever drawing code changes."""
+    key = tuple(paths)
+    if key not in _fingerprints:
+        h = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _fingerprints[key] = h.hexdigest()
+    return _fingerprints[key]
+
+
+def section_key(name, inputs, fingerprint):
+    """Content hash for a section: its name, its input data and the code fingerprint."""
+    payload = json.dumps([name, inputs, fingerprint], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SectionCache:
+    """Rendered section PDFs stored as <key>.pdf, plus per-output build manifests."""
+
+    def __init__(self, directory=SECTION_CACHE_DIR, max_entries=MAX_CACHED_SECTIONS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pdf")
+
+    def get(self, key):
+        """Return the cached section bytes, or None."""
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _manifest_path(self, output):
+        digest = hashlib.sha256(os.path.abspath(output).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"build-{digest}.json")
+
+    def is_current(self, output, keys):
+        """True if output was last built from exactly these section keys and is untouched since."""
+        try:
+            with open(self._manifest_path(output)) as f:
+                manifest = json.load(f)
+            st = os.stat(output)
+        except (OSError, ValueError):
+            return False
+        return (manifest.get("keys") == keys and manifest.get("size") == st.st_size
+                and manifest.get("mtime_ns") == st.st_mtime_ns)
+
+    def record_build(self, output, keys):
+        """Remember which section keys produced output."""
+        st = os.stat(output)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._manifest_path(output), "w") as f:
+            json.dump({"keys": keys, "size": st.st_size, "mtime_ns": st.st_mtime_ns}, f)
+
+    def prune(self):
+        """Drop the least recently written sections beyond max_entries."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(".pdf")]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,156 @@
+# render_profile.py
+# Opt-in instrumentation for the print generator (--profile).
+#
+# Records wall time, text layout and canvas call counts, bytes and pages for
+# every rendered section, and exports them as JSON or as collapsed stacks for
+# flame graph tools (flamegraph.pl, speedscope). Nothing is counted unless a
+# profile is requested, so normal builds pay no overhead.
+
+import json
+import time
+from contextlib import contextmanager
+
+from reportlab.pdfgen import canvas
+
+import text_layout
+
+ROOT_FRAME = "stellar_virtue"
+CANVAS_CALLS = ("drawString", "drawCentredString", "drawRightString", "rect", "circle", "line",
+                "doForm", "setFont", "showPage")
+
+
+class CountingCanvas(canvas.Canvas):
+    """Canvas that counts calls to the drawing methods in CANVAS_CALLS."""
+
+    def __init__(self, *args, **kwargs):
+        self.call_counts = dict.fromkeys(CANVAS_CALLS, 0)
+        super().__init__(*args, **kwargs)
+
+
+def _counted(name):
+    method = getattr(canvas.Canvas, name)
+
+    def counted(self, *args, **kwargs):
+        self.call_counts[name] += 1
+        return method(self, *args, **kwargs)
+
+    counted.__name__ = name
+    counted.__doc__ = method.__doc__
+    return counted
+
+
+for _name in CANVAS_CALLS:
+    setattr(CountingCanvas, _name, _counted(_name))
+
+
+def layout_counts():
+    """Cumulative text layout calls: wrap_lines, string_width lookups, reportlab stringWidth calls."""
+    stats = text_layout.layout_stats()
+    return {
+        "wrap_lines": stats["wrap"]["hits"] + stats["wrap"]["misses"],
+        "string_width": stats["width"]["hits"] + stats["width"]["misses"],
+        "stringWidth": stats["width"]["misses"],
+    }
+
+
+class SectionTimer:
+    """Times one section render: drawing, then c.save() serialization."""
+
+    def __init__(self, name):
+        self.name = name
+        self._layout = layout_counts()
+        self._start = time.perf_counter_ns()
+        self._drawn = None
+
+    def drawn(self):
+        self._drawn = time.perf_counter_ns()
+
+    def finish(self, c, data):
+        """Return the section's record; c is the CountingCanvas it drew on."""
+        end = time.perf_counter_ns()
+        drawn = self._drawn or end
+        calls = dict(c.call_counts)
+        calls.update({k: v - self._layout[k] for k, v in layout_counts().items()})
+        return {
+            "name": self.name,
+            "draw_ns": drawn - self._start,
+            "save_ns": end - drawn,
+            "bytes": len(data),
+            "pages": calls["showPage"],
+            "calls": calls,
+        }
+
+
+class RenderProfile:
+    """Collects section records and named time spans for one build (or batch)."""
+
+    def __init__(self):
+        self.sections = {}
+        self.spans = {}
+        self._start = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, *stack):
+        """Time a block under a stack of frame names, e.g. span("out.pdf", "merge")."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans[stack] = self.spans.get(stack, 0) + time.perf_counter_ns() - start
+
+    def add_section(self, output, record=None, name=None, size=0):
+        """Add a rendered section's record, or a cache hit for name (size bytes)."""
+        name = record["name"] if record else name
+        entry = self.sections.setdefault((output, name), {
+            "output": output, "name": name, "draw_ns": 0, "save_ns": 0, "bytes": 0, "pages": 0,
+            "rendered": 0, "cached": 0, "calls": dict.fromkeys(CANVAS_CALLS + tuple(layout_counts()), 0),
+        })
+        if record is None:
+            entry["cached"] += 1
+            entry["bytes"] += size
+            return
+        entry["rendered"] += 1
+        for key in ("draw_ns", "save_ns", "bytes", "pages"):
+            entry[key] += record[key]
+        for key, value in record["calls"].items():
+            entry["calls"][key] = entry["calls"].get(key, 0) + value
+
+    def to_dict(self):
+        return {
+            "wall_ns": time.perf_counter_ns() - self._start,
+            "spans": [{"stack": list(stack), "ns": ns} for stack, ns in self.spans.items()],
+            "sections": list(self.sections.values()),
+            "layout_cache": text_layout.layout_stats(),
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def collapsed_stacks(self):
+        """Lines of "frame;frame;frame microseconds", the flame graph collapsed-stack format."""
+        lines = []
+        for stack, ns in self.spans.items():
+            lines.append((";".join((ROOT_FRAME,) + stack), ns))
+        for entry in self.sections.values():
+            base = f"{ROOT_FRAME};{entry['output']};{entry['name']}"
+            lines.append((base + ";draw", entry["draw_ns"]))
+            lines.append((base + ";save", entry["save_ns"]))
+        return [f"{stack} {ns // 1000}" for stack, ns in lines if ns >= 1000]
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+
+    def format_summary(self):
+        """Per-section table for the console."""
+        rows = [f"{'section':<18}{'ms':>9}{'pages':>7}{'KB':>9}{'wraps':>8}{'widths':>9}{'draws':>8}"]
+        for entry in self.sections.values():
+            calls = entry["calls"]
+            draws = sum(calls[k] for k in CANVAS_CALLS if k not in ("setFont", "showPage"))
+            ms = (entry["draw_ns"] + entry["save_ns"]) / 1e6
+            label = entry["name"] + ("*" if not entry["rendered"] else "")
+            rows.append(f"{label:<18}{ms:>9.1f}{entry['pages']:>7}{entry['bytes'] / 1024:>9.1f}"
+                        f"{calls['wrap_lines']:>8}{calls['string_width']:>9}{draws:>8}")
+        rows.append(f"total {(time.perf_counter_ns() - self._start) / 1e6:.1f} ms wall (* = from cache)")
+        return "\n".join(rows)
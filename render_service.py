@@ -0,0 +1,300 @@
+# render_service.py
+# HTTP service that renders kits on demand.
+#
+# POST /render with a variant as JSON (the same keys as a batch manifest
+# variant: school, players, sections, difficulty, categories, card_counts,
+# focus, ...) returns the kit PDF. Kits are identified by a hash of the normalized
+# variant, the generator version, the drawing code, the question bank and the
+# fonts, so:
+#   - finished PDFs are kept in an LRU cache bounded in bytes, in memory and
+#     on disk (.cache/kits/), and repeated requests are served from it;
+#   - requests for a kit that is already being rendered wait for that render
+#     instead of starting another;
+#   - renders run in a pool of worker processes, which share the section
+#     cache, so kits that differ in one section only draw that section.
+#
+# A variant's "focus" names a learner analytics report in --reports-dir; paths
+# are refused. GET /stats reports cache and render counters.
+#
+# Usage: python render_service.py [--port 8080] [--jobs 4] [--memory-mb 128] [--disk-mb 1024] [--reports-dir reports/]
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import card_store
+import deck_optimizer
+import font_resolver
+import learner_analytics
+import stellar_virtue_boardgame as svb
+from http_messages import encode_message, read_message
+from render_cache import SectionCache, code_fingerprint
+from virtue_data import CACHE_DIR
+
+KIT_CACHE_DIR = os.path.join(CACHE_DIR, "kits")
+MEMORY_BYTES = 128 * 1024 * 1024
+DISK_BYTES = 1024 * 1024 * 1024
+MAX_REQUEST_BYTES = 64 * 1024
+READ_TIMEOUT = 30.0
+KIT_SOURCES = svb.DRAWING_SOURCES + [os.path.abspath(m.__file__) for m in (deck_optimizer, learner_analytics)]
+
+
+def kit_key(variant):
+    """Hash identifying the PDF a normalized variant renders to."""
+    spec = {k: v for k, v in variant.items() if k != "output"}
+    if spec["focus"]:
+        # The report's content, not its path, decides which cards are printed.
+        with open(spec["focus"], "rb") as f:
+            spec["focus"] = hashlib.sha256(f.read()).hexdigest()
+    # The same inputs as the section cache keys: the question bank and fonts print too
+    fonts = [font_resolver.font_signature(svb.use_fonts()), font_resolver.fallback_signature()]
+    payload = json.dumps([spec, svb.VERSION, code_fingerprint(KIT_SOURCES), card_store.open_store().digest, fonts],
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_kit(variant):
+    """Render one normalized variant to PDF bytes (runs in a worker process)."""
+    svb.use_fonts()
+    deck = svb.build_deck(variant)
+    names = [name for name, _, _ in svb.SECTIONS if not variant["sections"] or name in variant["sections"]]
+    out = io.BytesIO()
+    cache = SectionCache()
+    svb.write_pdf(deck, out, names, cache=cache)
+    return out.getvalue()
+
+
+class KitCache:
+    """LRU of rendered kits: a byte-bounded dict in memory over a byte-bounded directory.
+
+    A disk hit is promoted to memory; writing a kit evicts the least recently
+    used ones from each tier until it is back under its limit. Disk recency
+    is the file mtime, refreshed on every hit, so it survives restarts.
+    """
+
+    def __init__(self, directory=KIT_CACHE_DIR, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()  # key -> bytes, least recent first
+        self.memory_used = 0
+        self.disk = OrderedDict()    # key -> size, least recent first
+        self.disk_used = 0
+        try:
+            entries = [e for e in os.scandir(directory) if e.name.endswith(".pdf")]
+        except OSError:
+            entries = []
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime_ns):
+            self.disk[entry.name[:-4]] = entry.stat().st_size
+            self.disk_used += entry.stat().st_size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pdf")
+
+    def get(self, key):
+        """Return (bytes, "memory" or "disk"), or (None, None)."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key], "memory"
+        if key in self.disk:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                self.disk_used -= self.disk.pop(key)
+                return None, None
+            self.disk.move_to_end(key)
+            self._remember(key, data)
+            return data, "disk"
+        return None, None
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if len(data) > self.disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.disk_used += len(data) - self.disk.pop(key, 0)
+        self.disk[key] = len(data)
+        while self.disk_used > self.disk_bytes:
+            old, size = self.disk.popitem(last=False)
+            self.disk_used -= size
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        self.memory_used += len(data) - len(self.memory.pop(key, b""))
+        self.memory[key] = data
+        while self.memory_used > self.memory_bytes:
+            _, old = self.memory.popitem(last=False)
+            self.memory_used -= len(old)
+
+
+class RenderService:
+    """Renders kits in a process pool, coalescing identical requests and caching results."""
+
+    def __init__(self, jobs=2, cache=None, reports_dir=None):
+        self.jobs = jobs
+        self.reports_dir = reports_dir
+        self.cache = cache if cache is not None else KitCache()
+        self.pool = None
+        self.in_flight = {}  # key -> task rendering that kit
+        self.stats = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "coalesced": 0, "renders": 0,
+                      "render_seconds": 0.0, "errors": 0}
+
+    async def kit(self, spec):
+        """Return (pdf bytes, key, source) for a variant spec; source is memory, disk, coalesced or render.
+
+        Raises ValueError for an invalid spec.
+        """
+        if spec.get("focus") is not None:
+            spec = dict(spec, focus=self.focus_path(spec["focus"]))
+        variant = svb.normalize_variant(spec)
+        key = kit_key(variant)
+        self.stats["requests"] += 1
+        data, tier = self.cache.get(key)
+        if data is not None:
+            self.stats[f"{tier}_hits"] += 1
+            return data, key, tier
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            source = "coalesced"
+        else:
+            # The render is a task of its own, so a client disconnecting does
+            # not cancel it for everyone else waiting on the same kit.
+            task = self.in_flight[key] = asyncio.ensure_future(self._render(key, variant))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            source = "render"
+        return await asyncio.shield(task), key, source
+
+    def focus_path(self, name):
+        """Path of the focus report called name in reports_dir. Raises ValueError.
+
+        Clients name a report, never a path, and errors do not echo server paths.
+        """
+        if self.reports_dir is None:
+            raise ValueError("focus reports are not enabled on this server")
+        if not isinstance(name, str) or not name or name.startswith(".") or os.path.basename(name) != name:
+            raise ValueError("focus must be the name of a report in the server's reports directory")
+        path = os.path.join(self.reports_dir, name)
+        try:
+            learner_analytics.load_report(path)
+        except (OSError, ValueError):
+            raise ValueError(f"no usable focus report named {name!r}")
+        return path
+
+    async def _render(self, key, variant):
+        try:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.jobs)
+            start = time.perf_counter()
+            data = await asyncio.get_running_loop().run_in_executor(self.pool, render_kit, variant)
+            self.stats["renders"] += 1
+            self.stats["render_seconds"] += time.perf_counter() - start
+            self.cache.put(key, data)
+            return data
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            del self.in_flight[key]
+
+    def snapshot(self):
+        return dict(self.stats, in_flight=len(self.in_flight), memory_kits=len(self.cache.memory),
+                    memory_bytes=self.cache.memory_used, disk_kits=len(self.cache.disk),
+                    disk_bytes=self.cache.disk_used)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    # ===== HTTP =====
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await asyncio.wait_for(read_message(reader, MAX_REQUEST_BYTES), READ_TIMEOUT)
+                if request is None:
+                    break
+                start, headers, body = request
+                method, path = start.split()[:2]
+                status, content_type, payload, extra = await self.respond(method, path, body)
+                response_headers = {"Content-Type": content_type}
+                response_headers.update(extra)
+                writer.write(encode_message(f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}",
+                                            response_headers, payload))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, path, body):
+        """Return (status, content type, body bytes, extra headers) for one request."""
+        if method == "GET" and path == "/stats":
+            return 200, "application/json", json.dumps(self.snapshot()).encode("utf-8"), {}
+        if method != "POST" or path != "/render":
+            return _error(404, f"No route for {method} {path}")
+        try:
+            spec = json.loads(body or b"{}")
+            if not isinstance(spec, dict):
+                raise ValueError("the request body must be a JSON object of variant keys")
+            data, key, source = await self.kit(spec)
+        except ValueError as e:
+            return _error(400, str(e))
+        except Exception as e:
+            return _error(500, f"render failed: {e}")
+        return 200, "application/pdf", data, {"ETag": f'"{key[:32]}"', "X-Kit-Source": source}
+
+
+def _error(status, message):
+    return status, "application/json", json.dumps({"error": message}).encode("utf-8"), {}
+
+
+async def serve(host="127.0.0.1", port=8080, jobs=2, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES,
+                reports_dir=None):
+    svb.use_fonts(report=True)
+    service = RenderService(jobs, KitCache(memory_bytes=memory_bytes, disk_bytes=disk_bytes), reports_dir)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Render service on http://{host}:{port} ({jobs} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Stellar Virtue kit PDFs rendered on demand.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--jobs", type=int, default=2, help="render worker processes")
+    parser.add_argument("--memory-mb", type=int, default=MEMORY_BYTES // (1024 * 1024),
+                        help="in-memory kit cache size")
+    parser.add_argument("--disk-mb", type=int, default=DISK_BYTES // (1024 * 1024),
+                        help="on-disk kit cache size (.cache/kits)")
+    parser.add_argument("--reports-dir", help="learner analytics reports variants may name as \"focus\"")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, args.memory_mb * 1024 * 1024,
+                          args.disk_mb * 1024 * 1024, args.reports_dir))
+    except KeyboardInterrupt:
+        pass
@@ -7,18 +7,32 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from reportlab.lib.colors import Color
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+import argparse
+import io
+import json
 import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
 
-# Register Century Schoolbook font (adjust path if necessary)
-try:
-    pdfmetrics.registerFont(TTFont("CenturySchoolbook", "C:/Windows/Fonts/CENSCBK.TTF"))
-    FONT_NAME = "CenturySchoolbook"
-    print("Century Schoolbook font registered successfully.")
-except Exception as e:
-    print(f"Failed to register Century Schoolbook: {e}. Falling back to Helvetica.")
-    FONT_NAME = "Helvetica"
+from text_layout import wrap_lines, string_width, font_runs, fit_text, format_layout_stats
+from imposition import SheetLayout, fit_grid, impose_all
+from render_cache import SectionCache, code_fingerprint, section_key
+from page_templates import place
+from render_profile import CountingCanvas, RenderProfile, SectionTimer
+import virtue_data
+import card_store
+import deck_optimizer
+import learner_analytics
+import pdf_merge
+import font_resolver
+import localization
+from localization import tr, tr_all
+from board_model import BoardModel
+
+# Body font: resolved and registered on first render by use_fonts(), not at import
+BODY_FONT = "CenturySchoolbook"
+FONT_NAME = None
 
 # Constants
 PAGE_WIDTH, PAGE_HEIGHT = letter
@@ -27,8 +41,45 @@ CARD_WIDTH, CARD_HEIGHT = 2.5 * inch, 3.5 * inch
 TOKEN_SIZE = 0.75 * inch
 CARD_SPACING = 0.1 * inch
 SECTOR_SPACING = 2.75 * inch
+VERSION = "0.13"
 royal_turquoise = Color(0, 0.569, 0.545)
 dark_red = Color(0.545, 0, 0)
+moral_purple = Color(0.4, 0.2, 0.6)
+
+# ===== Card Data =====
+
+SAINT_NAMES = [
+    "Saint Peter", "Saint Paul", "Saint Augustine", "Saint Thomas Aquinas",
+    "Saint Francis of Assisi", "Saint Teresa of Avila", "Saint Ignatius of Loyola",
+    "Saint Catherine of Siena", "Saint Joan of Arc", "Saint Therese of Lisieux",
+    "Saint John Paul II", "Saint Mother Teresa"
+]
+
+ENEMY_SHIP_COUNT = 24
+
+CATHOLIC_ACTIONS = [
+    "Pray the Rosary: Gain 2 virtue points.",
+    "Act of Charity: Heal all ships in one sector by 1 health.",
+    "Confession: Remove one enemy ship from the board.",
+    "Fast: Skip a turn to gain 3 virtue points.",
+    "Almsgiving: Heal all player ships by 1 health.",
+    "Lectio Divina: Gain 1 virtue point and draw a card."
+]
+
+ENEMY_ACTIONS = [
+    "Advance: Move all enemy ships one sector toward the nearest base.",
+    "Assault: All enemy ships attack; spawn 1 new ship.",
+    "Flank: Move half the enemy ships two sectors toward a base.",
+    "Regroup: Move all enemy ships one sector away from bases.",
+    "Ambush: Enemy ships in player sectors deal double damage.",
+    "Reinforce: Spawn 2 new enemy ships in a spawn sector."
+]
+
+# Copies of each action card in the printed action decks
+ACTION_CARD_COPIES = 4
+
+TOKEN_TYPES = ["Health", "Charge", "Virtue"]
+TOKENS_PER_TYPE = 20
 
 # ===== Virtue Data (matching virtues.js) =====
 
@@ -97,40 +148,188 @@ PRINT_MORAL_CHOICES = [
 ]
 
 
+def load_print_deck(source="full", categories=virtue_data.QUESTION_CATEGORIES, max_level=None):
+    """Return the content to print: the full bank from virtues.js, or the curated tuples above.
+
+    The full bank's question and moral choice decks are read-only sequences
+    over the memory-mapped card store (see card_store.py).
+
+    categories and max_level select which questions of the full bank are
+    printed; the curated deck is always printed whole.
+    """
+    if source == "full":
+        try:
+            store = card_store.open_store()
+        except (OSError, ValueError) as e:
+            print(f"Could not load virtues.js ({e}). Falling back to the curated deck.")
+        else:
+            return card_store.print_deck(store, categories, max_level)
+    return {
+        "cardinal_virtues": CARDINAL_VIRTUES,
+        "gifts": GIFTS_OF_SPIRIT,
+        "fruits": FRUITS_OF_SPIRIT,
+        "virtue_questions": PRINT_VIRTUE_QUESTIONS,
+        "moral_choices": PRINT_MORAL_CHOICES,
+    }
+
+
+# ===== Variants =====
+# A variant personalizes one printed kit. Batch manifests list variants as
+# JSON objects with any of these keys; missing keys take these defaults.
+
+VARIANT_DEFAULTS = {
+    "output": None,         # PDF filename (default: derived from the school name)
+    "school": None,         # printed on the cover and in the PDF title
+    "language": "en",
+    "players": None,        # 1-12; adds player count and ship assignment to the rules
+    "deck": "full",         # "full" (virtues.js) or "curated"
+    "sections": None,       # subset of SECTIONS names to print (default: all)
+    "categories": list(virtue_data.QUESTION_CATEGORIES),
+    "difficulty": None,     # "easy", "normal" or "hard" (default: every question)
+    "saints": None,         # 12 saint names to replace SAINT_NAMES
+    "autofit": True,        # shrink card text to fit instead of cutting it to fixed line counts
+    "board": None,          # BoardModel arguments: sectors, bases, spawns, adjacency, distance
+    "card_counts": None,    # cards per deck, e.g. {"virtue_questions": 40}, chosen by deck_optimizer
+    "focus": None,          # learner_analytics.py report: fill card_counts toward weak sub-virtues
+}
+LANGUAGES = localization.languages()  # "en" plus each catalog in locales/
+DIFFICULTY_LEVELS = {"easy": 1, "normal": 2, "hard": 3}
+MAX_PLAYERS = len(SAINT_NAMES)
+BOARD_KEYS = {"sectors", "bases", "spawns", "adjacency", "distance"}
+
+
+def normalize_variant(variant):
+    """Validate a variant from a batch manifest and fill in defaults. Raises ValueError."""
+    unknown = set(variant) - set(VARIANT_DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown variant keys: {', '.join(sorted(unknown))}")
+    v = dict(VARIANT_DEFAULTS)
+    v.update(variant)
+    if v["players"] is not None and not (isinstance(v["players"], int) and 1 <= v["players"] <= MAX_PLAYERS):
+        raise ValueError(f"players must be between 1 and {MAX_PLAYERS}, got {v['players']!r}")
+    if v["deck"] not in ("full", "curated"):
+        raise ValueError(f"deck must be 'full' or 'curated', got {v['deck']!r}")
+    if v["difficulty"] is not None and v["difficulty"] not in DIFFICULTY_LEVELS:
+        raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTY_LEVELS)}, got {v['difficulty']!r}")
+    bad = set(v["sections"] or ()) - set(SECTION_FUNCS)
+    if bad:
+        raise ValueError(f"unknown sections: {', '.join(sorted(bad))}")
+    bad = set(v["categories"]) - set(virtue_data.QUESTION_CATEGORIES)
+    if bad:
+        raise ValueError(f"unknown question categories: {', '.join(sorted(bad))}")
+    if v["saints"] is not None and len(v["saints"]) != len(SAINT_NAMES):
+        raise ValueError(f"saints must list {len(SAINT_NAMES)} names, got {len(v['saints'])}")
+    if v["board"] is not None:
+        bad = set(v["board"]) - BOARD_KEYS
+        if bad:
+            raise ValueError(f"unknown board keys: {', '.join(sorted(bad))}")
+        BoardModel.from_dict(v["board"])
+    if v["card_counts"] is not None:
+        bad = set(v["card_counts"]) - set(CHUNKED_SECTIONS.values())
+        if bad:
+            raise ValueError(f"card_counts can only limit {', '.join(CHUNKED_SECTIONS.values())}, "
+                             f"got {', '.join(sorted(bad))}")
+        if not all(isinstance(n, int) and n >= 0 for n in v["card_counts"].values()):
+            raise ValueError(f"card_counts must be non-negative integers, got {v['card_counts']!r}")
+    if v["focus"] is not None:
+        if v["card_counts"] is None:
+            raise ValueError("focus chooses which cards fill card_counts; give card_counts too")
+        try:
+            learner_analytics.load_report(v["focus"])
+        except OSError as e:
+            raise ValueError(f"cannot read focus report: {e}")
+    if v["language"] not in LANGUAGES:
+        raise ValueError(f"language must be one of {', '.join(LANGUAGES)}, got {v['language']!r}")
+    return v
+
+
+def variant_filename(variant, index=0):
+    """Output filename for a variant: its "output" key, else a slug of the school name."""
+    if variant["output"]:
+        return variant["output"]
+    if variant["school"]:
+        slug = "".join(ch if ch.isalnum() else "-" for ch in variant["school"].lower()).strip("-")
+        return f"stellar_virtue-{'-'.join(filter(None, slug.split('-')))}.pdf"
+    return f"stellar_virtue-{index + 1}.pdf"
+
+
+def build_deck(variant=None, imposition=None):
+    """Return the print deck for a normalized variant, with imposition options attached."""
+    variant = variant or normalize_variant({})
+    deck = load_print_deck(variant["deck"], variant["categories"],
+                           DIFFICULTY_LEVELS.get(variant["difficulty"]))
+    focus = learner_analytics.load_report(variant["focus"]) if variant["focus"] else None
+    for key, count in (variant["card_counts"] or {}).items():
+        deck[key] = (learner_analytics.focus_cards(deck[key], count, focus) if focus
+                     else deck_optimizer.compose(deck[key], count))
+    deck["saints"] = list(variant["saints"] or SAINT_NAMES)
+    deck["variant"] = {"school": variant["school"], "players": variant["players"],
+                       "language": variant["language"], "version": VERSION}
+    deck["imposition"] = imposition or imposition_options()
+    deck["autofit"] = bool(variant["autofit"])
+    deck["board"] = BoardModel.from_dict(variant["board"]).spec()
+    return deck
+
+
+def imposition_options(bleed=0, crop_marks=False, card_backs=False, grid=None):
+    """Card sheet options stored on the deck (bleed in points, grid as (cols, rows))."""
+    return {"bleed": float(bleed), "crop_marks": crop_marks, "card_backs": card_backs,
+            "grid": list(grid) if grid else None}
+
+
 # Helper Functions
 def wrap_text(text, width, font, font_size, c):
-    """Wrap text to fit within a specified width."""
+    """Wrap text to fit within a specified width (cached; see text_layout)."""
     c.setFont(font, font_size)
-    words = text.split()
-    lines = []
-    current_line = []
-    current_width = 0
-    for word in words:
-        word_width = c.stringWidth(word + " ", font, font_size)
-        if current_width + word_width <= width:
-            current_line.append(word)
-            current_width += word_width
-        else:
-            lines.append(" ".join(current_line))
-            current_line = [word]
-            current_width = word_width
-    if current_line:
-        lines.append(" ".join(current_line))
-    return lines
+    return list(wrap_lines(text, width, font, font_size))
+
+def draw_string(c, x, y, text):
+    """Draw text in the current font, switching to fallback fonts for glyphs it lacks (see text_layout)."""
+    font, size = c._fontname, c._fontsize
+    runs = font_runs(text, font)
+    if len(runs) == 1 and runs[0][1] == font:
+        c.drawString(x, y, text)
+        return
+    for run, run_font in runs:
+        c.setFont(run_font, size)
+        c.drawString(x, y, run)
+        x += string_width(run, run_font, size)
+    c.setFont(font, size)
+
+
+def draw_centred_string(c, x, y, text):
+    """Draw text centred on x, like draw_string."""
+    font, size = c._fontname, c._fontsize
+    runs = font_runs(text, font)
+    if len(runs) == 1 and runs[0][1] == font:
+        c.drawCentredString(x, y, text)
+    else:
+        draw_string(c, x - string_width(text, font, size) / 2, y, text)
+
 
 def draw_common_footer(c):
     """Draw the footer on each page."""
     c.setFont(FONT_NAME, 8)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, 0.3 * inch, "zoseco.com")
+    draw_centred_string(c, PAGE_WIDTH / 2, 0.3 * inch, "zoseco.com")
 
 # Component Drawing Functions
-def draw_game_board(c):
-    """Draw the game board across three pages, four centered sectors per page with Earth on page 1."""
-    for page in range(3):
+def board_pages(board):
+    """Pages the board prints on: four sectors per page."""
+    return -(-board.sectors // 4)
+
+
+def draw_game_board(c, board=None):
+    """Draw the game board, four centered sectors per page with Earth on page 1.
+
+    board is a BoardModel (default: the 12-sector board, three pages).
+    """
+    board = board or BoardModel()
+    pages = board_pages(board)
+    for page in range(pages):
         c.setFont(FONT_NAME, 16)
         c.setFillColor(royal_turquoise)
-        c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, f"Stellar Virtue Game Board - Page {page+1} of 3")
+        draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, tr("Stellar Virtue Game Board - Page {page} of {pages}", page=page + 1, pages=pages))
 
         # Earth on page 1 (top center)
         if page == 0:
@@ -139,10 +338,10 @@ def draw_game_board(c):
             c.setStrokeColor(royal_turquoise)
             c.circle(earth_x, earth_y, 0.75 * inch)
             c.setFont(FONT_NAME, 12)
-            c.drawCentredString(earth_x, earth_y, "Earth")
+            draw_centred_string(c, earth_x, earth_y, tr("Earth"))
 
         # Sectors (2x2 grid, centered below Earth or title)
-        for i in range(4):
+        for i in range(min(4, board.sectors - page * 4)):
             sector_num = page * 4 + i + 1
             row = i // 2
             col = i % 2
@@ -151,136 +350,216 @@ def draw_game_board(c):
             c.setStrokeColor(royal_turquoise)
             c.circle(x, y, 1.25 * inch)
             c.setFont(FONT_NAME, 12)
-            c.drawCentredString(x, y, f"Sector {sector_num}")
-            if sector_num in [1, 5, 9]:
-                c.drawCentredString(x, y - 20, "Player Base")
-            elif sector_num in [4, 8, 12]:
-                c.drawCentredString(x, y - 20, "Enemy Spawn")
+            draw_centred_string(c, x, y, tr("Sector {number}", number=sector_num))
+            if sector_num in board.bases:
+                draw_centred_string(c, x, y - 20, tr("Player Base"))
+            elif sector_num in board.spawns:
+                draw_centred_string(c, x, y - 20, tr("Enemy Spawn"))
         draw_common_footer(c)
         c.showPage()
 
-def draw_card(c, x, y, title, text, accent_color=None):
-    """Draw a generic card (used for saint ships, enemy ships, action cards)."""
-    color = accent_color or royal_turquoise
-    c.setStrokeColor(color)
+# Cards are drawn in two parts: the frame (border plus anything printed on
+# every card of a deck) and the per-card content. impose_deck compiles the
+# frames of a whole sheet into one shared form, so a deck of any size only
+# stores its frames once per sheet shape.
+
+def draw_card_frame(c, x, y, accent_color=None):
+    """Draw a card border."""
+    c.setStrokeColor(accent_color or royal_turquoise)
     c.setLineWidth(2)
     c.rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+
+def draw_card_title(c, x, y, title, accent_color=None):
+    """Draw a generic card's centered title."""
     c.setFont(FONT_NAME, 14)
-    c.setFillColor(color)
-    title_width = c.stringWidth(title, FONT_NAME, 14)
-    c.drawString(x + (CARD_WIDTH - title_width) / 2, y + CARD_HEIGHT - 25, title)
-    c.setFont(FONT_NAME, 12)
-    c.setFillColorRGB(0, 0, 0)
-    wrapped_text = wrap_text(text, CARD_WIDTH - 20, FONT_NAME, 12, c)
-    for i, line in enumerate(wrapped_text[:4]):
-        line_width = c.stringWidth(line, FONT_NAME, 12)
-        c.drawString(x + (CARD_WIDTH - line_width) / 2, y + CARD_HEIGHT - 50 - i * 15, line)
-
-def draw_virtue_question_card(c, x, y, header, question, answers, correct, explanation):
-    """Draw a virtue question card with question, answers, and explanation."""
-    c.setStrokeColor(royal_turquoise)
-    c.setLineWidth(2)
-    c.rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+    c.setFillColor(accent_color or royal_turquoise)
+    title_width = string_width(title, FONT_NAME, 14)
+    draw_string(c, x + (CARD_WIDTH - title_width) / 2, y + CARD_HEIGHT - 25, title)
+
+# Card text is laid out as blocks of (text, font size, leading, space before,
+# color). With auto-fit (the default) a card's blocks shrink together until
+# they fit its text box, and only text that overflows even at the smallest
+# size is cut (and listed by fit_report); without it every block keeps its
+# design size and is cut to a fixed number of lines, as printed before.
+
+# Text boxes: (line width, first baseline below the card top, lowest baseline above the card bottom)
+CARD_TEXT_BOX = (CARD_WIDTH - 20, 50, 10)
+QUESTION_TEXT_BOX = (CARD_WIDTH - 16, 35, 20)
+MORAL_TEXT_BOX = (CARD_WIDTH - 16, 48, 10)
+BLACK = Color(0, 0, 0)
+GREY = Color(0.3, 0.3, 0.3)
+BROWN = Color(0.6, 0.3, 0)
+
+
+def card_text_blocks(text):
+    """Blocks and legacy line caps for a generic card's centered body text."""
+    return [(tr(text), 12, 15, 0, BLACK)], [4]
+
+
+def question_card_text(header, question, answers, correct, explanation):
+    """A virtue question card's printed text in the current language, as
+    (header, answer line, question, answer lines, explanation).
+
+    Everything printed on the card is one translation unit, so a card is
+    translated whole or prints in English; it never mixes languages.
+    """
+    # Answers are lettered "A) ..."; the letter stays and the answer is translated
+    lines = answers.split('\n')
+    letters = [line[:3] if line[1:3] == ") " else "" for line in lines]
+    parts = header.split(" - ")
+    texts = tr_all(parts + ["Answer: {letter}", question] +
+                   [line[len(letter):] for line, letter in zip(lines, letters)] + [explanation])
+    answer_line, question, *answer_texts, explanation = texts[len(parts):]
+    return (" - ".join(texts[:len(parts)]), answer_line.format(letter=correct), question,
+            [letter + text for letter, text in zip(letters, answer_texts)], explanation)
+
+
+def question_blocks(text):
+    """Blocks and legacy line caps for a virtue question card's body, from question_card_text."""
+    _, _, question, answer_lines, explanation = text
+    blocks = [(question, 9, 12, 0, BLACK)]
+    blocks += [(line, 8, 10, 4 if i == 0 else 0, BLACK) for i, line in enumerate(answer_lines)]
+    blocks.append((explanation, 7, 9, 4, GREY))
+    return blocks, [3] + [2] * len(answer_lines) + [3]
+
+
+def moral_choice_text(scenario, lesser, greater, virtue):
+    """A moral choice card's printed text in the current language, as
+    (virtue label, scenario, lesser label, lesser, greater label, greater); one translation unit."""
+    parts = virtue.split(" - ")
+    texts = tr_all(parts + [scenario, "Lesser Good:", lesser, "Greater Good (+1 dmg, +virtue):", greater])
+    return (" - ".join(texts[:len(parts)]),) + tuple(texts[len(parts):])
+
+
+def moral_choice_blocks(text):
+    """Blocks and legacy line caps for a moral choice card's body, from moral_choice_text."""
+    _, scenario, lesser_label, lesser, greater_label, greater = text
+    return [
+        (scenario, 9, 12, 0, BLACK),
+        (lesser_label, 8, 10, 6, BROWN),
+        (lesser, 8, 10, 0, BLACK),
+        (greater_label, 8, 10, 6, royal_turquoise),
+        (greater, 8, 10, 0, BLACK),
+    ], [3, 1, 2, 1, 2]
+
+
+def layout_card_text(blocks, caps, box, autofit=True):
+    """Return (scale, lines per block, lines dropped) for a card's text blocks in box."""
+    width, top, bottom = box
+    height = CARD_HEIGHT - top - bottom
+    text_blocks = [block[:4] for block in blocks]
+    if not autofit:
+        full = [wrap_lines(text, width, FONT_NAME, size) for text, size, _, _ in text_blocks]
+        return 1.0, [lines[:cap] for lines, cap in zip(full, caps)], sum(max(len(l) - cap, 0) for l, cap in zip(full, caps))
+    scale, lines, fits = fit_text(text_blocks, width, FONT_NAME, height)
+    if fits:
+        return scale, lines, 0
+    # Keep the lines whose baselines are still inside the box at the smallest size
+    kept, offset = [], 0
+    for (_, _, leading, space_before), block_lines in zip(text_blocks, lines):
+        offset += space_before * scale
+        n = 0
+        while n < len(block_lines) and offset <= height:
+            n += 1
+            offset += leading * scale
+        kept.append(block_lines[:n])
+    return scale, kept, sum(len(l) for l in lines) - sum(len(l) for l in kept)
+
+
+# Cards drawn in this process whose text was cut short, for the build log
+_fit_stats = {"cut": 0}
+
+
+def draw_card_blocks(c, x, y, blocks, layout, box, centered=False):
+    """Draw text blocks laid out by layout_card_text on the card at (x, y)."""
+    scale, lines, dropped = layout
+    if dropped:
+        _fit_stats["cut"] += 1
+    width, top, _ = box
+    y_pos = y + CARD_HEIGHT - top
+    for (text, size, leading, space_before, color), block_lines in zip(blocks, lines):
+        y_pos -= space_before * scale
+        c.setFont(FONT_NAME, size * scale)
+        c.setFillColor(color)
+        for line in block_lines:
+            if centered:
+                line_x = x + (CARD_WIDTH - string_width(line, FONT_NAME, size * scale)) / 2
+            else:
+                line_x = x + (CARD_WIDTH - width) / 2
+            draw_string(c, line_x, y_pos, line)
+            y_pos -= leading * scale
+
+
+def draw_card_text(c, x, y, text, autofit=True):
+    """Draw a generic card's centered body text."""
+    blocks, caps = card_text_blocks(text)
+    draw_card_blocks(c, x, y, blocks, layout_card_text(blocks, caps, CARD_TEXT_BOX, autofit),
+                     CARD_TEXT_BOX, centered=True)
+
+def draw_card(c, x, y, title, text, accent_color=None, autofit=True):
+    """Draw a generic card (used for saint ships, enemy ships, action cards)."""
+    draw_card_frame(c, x, y, accent_color)
+    draw_card_title(c, x, y, title, accent_color)
+    draw_card_text(c, x, y, text, autofit)
+
+def draw_virtue_question_card(c, x, y, header, question, answers, correct, explanation, autofit=True):
+    """Draw a virtue question card's content: question, answers, and explanation (frame: draw_card_frame)."""
+
+    text = question_card_text(header, question, answers, correct, explanation)
 
     # Header
     c.setFont(FONT_NAME, 10)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(x + CARD_WIDTH / 2, y + CARD_HEIGHT - 18, header)
-
-    # Question
-    c.setFont(FONT_NAME, 9)
-    c.setFillColorRGB(0, 0, 0)
-    q_lines = wrap_text(question, CARD_WIDTH - 16, FONT_NAME, 9, c)
-    y_pos = y + CARD_HEIGHT - 35
-    for line in q_lines[:3]:
-        c.drawString(x + 8, y_pos, line)
-        y_pos -= 12
-
-    # Answers
-    y_pos -= 4
-    c.setFont(FONT_NAME, 8)
-    for ans_line in answers.split('\n'):
-        a_lines = wrap_text(ans_line, CARD_WIDTH - 16, FONT_NAME, 8, c)
-        for line in a_lines[:2]:
-            c.drawString(x + 8, y_pos, line)
-            y_pos -= 10
+    draw_centred_string(c, x + CARD_WIDTH / 2, y + CARD_HEIGHT - 18, text[0])
 
     # Answer indicator (small, upside down at bottom)
     c.setFont(FONT_NAME, 7)
-    c.setFillColor(royal_turquoise)
-    c.drawString(x + 8, y + 8, f"Answer: {correct}")
+    draw_string(c, x + 8, y + 8, text[1])
 
-    # Explanation (small text)
-    y_pos -= 4
-    c.setFont(FONT_NAME, 7)
-    c.setFillColorRGB(0.3, 0.3, 0.3)
-    exp_lines = wrap_text(explanation, CARD_WIDTH - 16, FONT_NAME, 7, c)
-    for line in exp_lines[:3]:
-        c.drawString(x + 8, y_pos, line)
-        y_pos -= 9
-
-def draw_moral_choice_card(c, x, y, scenario, lesser, greater, virtue):
-    """Draw a moral choice card."""
-    c.setStrokeColor(Color(0.4, 0.2, 0.6))  # Purple accent for moral choices
-    c.setLineWidth(2)
-    c.rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+    # Question, answers and explanation
+    blocks, caps = question_blocks(text)
+    draw_card_blocks(c, x, y, blocks, layout_card_text(blocks, caps, QUESTION_TEXT_BOX, autofit),
+                     QUESTION_TEXT_BOX)
 
-    # Header
-    c.setFont(FONT_NAME, 10)
-    c.setFillColor(Color(0.4, 0.2, 0.6))
-    c.drawCentredString(x + CARD_WIDTH / 2, y + CARD_HEIGHT - 18, "Moral Choice")
+def draw_moral_choice_card(c, x, y, scenario, lesser, greater, virtue, autofit=True):
+    """Draw a moral choice card's content (frame: draw_moral_choice_frame)."""
+    text = moral_choice_text(scenario, lesser, greater, virtue)
 
     # Virtue tag
     c.setFont(FONT_NAME, 8)
-    c.drawCentredString(x + CARD_WIDTH / 2, y + CARD_HEIGHT - 30, virtue)
+    c.setFillColor(moral_purple)
+    draw_centred_string(c, x + CARD_WIDTH / 2, y + CARD_HEIGHT - 30, text[0])
 
-    # Scenario
-    c.setFont(FONT_NAME, 9)
-    c.setFillColorRGB(0, 0, 0)
-    s_lines = wrap_text(scenario, CARD_WIDTH - 16, FONT_NAME, 9, c)
-    y_pos = y + CARD_HEIGHT - 48
-    for line in s_lines[:3]:
-        c.drawString(x + 8, y_pos, line)
-        y_pos -= 12
-
-    # Lesser good
-    y_pos -= 6
-    c.setFont(FONT_NAME, 8)
-    c.setFillColor(Color(0.6, 0.3, 0))
-    c.drawString(x + 8, y_pos, "Lesser Good:")
-    y_pos -= 10
-    c.setFillColorRGB(0, 0, 0)
-    l_lines = wrap_text(lesser, CARD_WIDTH - 16, FONT_NAME, 8, c)
-    for line in l_lines[:2]:
-        c.drawString(x + 8, y_pos, line)
-        y_pos -= 10
+    # Scenario, lesser good and greater good
+    blocks, caps = moral_choice_blocks(text)
+    draw_card_blocks(c, x, y, blocks, layout_card_text(blocks, caps, MORAL_TEXT_BOX, autofit),
+                     MORAL_TEXT_BOX)
 
-    # Greater good
-    y_pos -= 6
-    c.setFont(FONT_NAME, 8)
-    c.setFillColor(royal_turquoise)
-    c.drawString(x + 8, y_pos, "Greater Good (+1 dmg, +virtue):")
-    y_pos -= 10
-    c.setFillColorRGB(0, 0, 0)
-    g_lines = wrap_text(greater, CARD_WIDTH - 16, FONT_NAME, 8, c)
-    for line in g_lines[:2]:
-        c.drawString(x + 8, y_pos, line)
-        y_pos -= 10
+def draw_moral_choice_frame(c, x, y):
+    """Draw the purple border and header shared by every moral choice card."""
+    draw_card_frame(c, x, y, moral_purple)
+    c.setFont(FONT_NAME, 10)
+    c.setFillColor(moral_purple)
+    draw_centred_string(c, x + CARD_WIDTH / 2, y + CARD_HEIGHT - 18, tr("Moral Choice"))
 
 def draw_token(c, x, y, token_type):
-    """Draw a token (health, charge, virtue)."""
+    """Draw a token (health, charge, virtue); each token face is a shared form."""
+    place(c, ("token", token_type), lambda c: _draw_token(c, token_type), x, y,
+          (0, 0, TOKEN_SIZE, TOKEN_SIZE))
+
+def _draw_token(c, token_type):
     c.setStrokeColor(royal_turquoise)
     c.setLineWidth(1)
-    c.circle(x + TOKEN_SIZE / 2, y + TOKEN_SIZE / 2, TOKEN_SIZE / 2)
+    c.circle(TOKEN_SIZE / 2, TOKEN_SIZE / 2, TOKEN_SIZE / 2)
     c.setFont(FONT_NAME, 10)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(x + TOKEN_SIZE / 2, y + TOKEN_SIZE / 2 - 5, token_type)
+    draw_centred_string(c, TOKEN_SIZE / 2, TOKEN_SIZE / 2 - 5, tr(token_type))
 
 def draw_reference_page(c, title, items, columns=2):
     """Draw a reference page with items in columns."""
     c.setFont(FONT_NAME, 16)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, title)
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, title)
 
     usable_width = PAGE_WIDTH - 2 * MARGIN
     col_width = usable_width / columns
@@ -295,26 +574,26 @@ def draw_reference_page(c, title, items, columns=2):
             name, subtitle, desc = item
             c.setFont(FONT_NAME, 11)
             c.setFillColor(royal_turquoise)
-            c.drawString(x, y_pos, name)
+            draw_string(c, x, y_pos, name)
             c.setFont(FONT_NAME, 8)
             c.setFillColor(Color(0.4, 0.4, 0.4))
-            c.drawString(x, y_pos - 12, subtitle)
+            draw_string(c, x, y_pos - 12, subtitle)
             c.setFont(FONT_NAME, 9)
             c.setFillColorRGB(0, 0, 0)
-            d_lines = wrap_text(desc, col_width - 10, FONT_NAME, 9, c)
+            d_lines = wrap_lines(desc, col_width - 10, FONT_NAME, 9)
             for i, line in enumerate(d_lines[:2]):
-                c.drawString(x, y_pos - 24 - i * 11, line)
+                draw_string(c, x, y_pos - 24 - i * 11, line)
             y_pos -= 52
         elif isinstance(item, tuple) and len(item) == 2:
             name, desc = item
             c.setFont(FONT_NAME, 11)
             c.setFillColor(royal_turquoise)
-            c.drawString(x, y_pos, name)
+            draw_string(c, x, y_pos, name)
             c.setFont(FONT_NAME, 9)
             c.setFillColorRGB(0, 0, 0)
-            d_lines = wrap_text(desc, col_width - 10, FONT_NAME, 9, c)
+            d_lines = wrap_lines(desc, col_width - 10, FONT_NAME, 9)
             for i, line in enumerate(d_lines[:2]):
-                c.drawString(x, y_pos - 14 - i * 11, line)
+                draw_string(c, x, y_pos - 14 - i * 11, line)
             y_pos -= 40
 
         if y_pos < MARGIN + 0.5 * inch:
@@ -324,76 +603,102 @@ def draw_reference_page(c, title, items, columns=2):
                 break
 
 
-def create_pdf():
-    """Generate the Stellar Virtue board game PDF."""
-    c = canvas.Canvas("stellar_virtue.pdf", pagesize=letter)
-
-    # Set PDF metadata
-    c.setTitle("Stellar Virtue: A Cooperative Board Game")
-    c.setAuthor("Zoseco")
-    c.setSubject("Version 0.13")
-    c.setCreator("Zoseco Team")
-    c.setKeywords("Stellar Virtue, board game, cooperative, Catholic, AI, spaceship, virtues")
+# ===== Document Sections =====
+# Each section draws one or more complete pages (ending with showPage) and
+# depends only on the print deck, so sections can be rendered independently.
 
-    # ===== Cover Page =====
+def draw_cover_page(c, deck):
+    """Draw the cover page."""
+    variant = deck["variant"]
     c.setFont(FONT_NAME, 24)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2 + 50, "Stellar Virtue")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2 + 50, "Stellar Virtue")
     c.setFont(FONT_NAME, 14)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2 + 20, "A Cooperative Board Game by Zoseco")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2 + 20, tr("A Cooperative Board Game by Zoseco"))
     c.setFont(FONT_NAME, 10)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2, "Version 0.13")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2, tr("Version {version}", version=variant['version']))
     c.setFont(FONT_NAME, 9)
     c.setFillColorRGB(0.3, 0.3, 0.3)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2 - 30, "Learn the cardinal virtues, gifts and fruits of the Holy Spirit")
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2 - 45, "through cooperative gameplay and moral choices.")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2 - 30, tr("Learn the cardinal virtues, gifts and fruits of the Holy Spirit"))
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2 - 45, tr("through cooperative gameplay and moral choices."))
+    if variant["school"] or variant["players"]:
+        c.setFont(FONT_NAME, 12)
+        c.setFillColor(royal_turquoise)
+        if variant["school"]:
+            draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2 + 120, tr("Prepared for {school}", school=variant['school']))
+        if variant["players"]:
+            players = variant["players"]
+            c.setFont(FONT_NAME, 10)
+            draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT / 2 - 80,
+                                tr("For {players} players", players=players) if players > 1 else tr("For 1 player"))
     draw_common_footer(c)
     c.showPage()
 
-    # ===== Instructions Page =====
+
+def ship_assignment(players):
+    """Rules sentence dividing the 12 saint ships among the players."""
+    ships = len(SAINT_NAMES)
+    if players == 1:
+        return tr("Players: One player commands all {ships} saint ships.", ships=ships)
+    fewest, most = ships // players, -(-ships // players)
+    share = str(fewest) if fewest == most else tr("{fewest} or {most}", fewest=fewest, most=most)
+    return tr("Players: Deal the {ships} saint ships out among the {players} players; "
+              "each player commands {share} ships.", ships=ships, players=players, share=share)
+
+
+def draw_instructions_page(c, deck):
+    """Draw the How to Play page."""
     c.setFont(FONT_NAME, 16)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, "Stellar Virtue: How to Play")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, tr("Stellar Virtue: How to Play"))
+    board = BoardModel.from_dict(deck["board"])
     instructions = [
-        "Stellar Virtue is a cooperative board game where players command virtuous AI fleets to defend human colonies from rogue AI ships. The game spans 9 days, each with 7 turns themed after the Liturgy of the Hours: Lauds, Prime, Terce, Sext, None, Vespers, and Compline.",
-        "Setup: Assemble the game board from three pages (12 sectors with Earth at center). Assign player bases (sectors 1, 5, 9) and place enemy spawns (sectors 4, 8, 12). Set up 12 player ships and 6 starting enemy ships.",
-        "Gameplay: Each day, players take 7 turns. During prayer turns (Lauds, None), draw a Virtue Question card and answer to grow in virtue. During combat turns (Terce, Vespers), draw a Moral Choice card before attacking. Correct answers and greater-good choices earn virtue progress and combat bonuses.",
-        "Virtues: Master all sub-virtues of a cardinal virtue to unlock its combat bonus. Theological virtues are received through Sunday rest. Gifts and Fruits of the Holy Spirit unlock as you progress.",
-        "Winning: Survive 9 days without losing all bases. Bonus victory for defeating all 24 enemy ships.",
+        tr("Stellar Virtue is a cooperative board game where players command virtuous AI fleets to defend human colonies from rogue AI ships. The game spans 9 days, each with 7 turns themed after the Liturgy of the Hours: Lauds, Prime, Terce, Sext, None, Vespers, and Compline."),
+        tr("Setup: Assemble the game board from {pages} pages ({sectors} sectors with Earth at center). Assign player bases (sectors {bases}) and place enemy spawns (sectors {spawns}). Set up 12 player ships and 6 starting enemy ships.",
+           pages=board_pages(board), sectors=board.sectors, bases=", ".join(map(str, board.bases)),
+           spawns=", ".join(map(str, board.spawns))),
+        tr("Gameplay: Each day, players take 7 turns. During prayer turns (Lauds, None), draw a Virtue Question card and answer to grow in virtue. During combat turns (Terce, Vespers), draw a Moral Choice card before attacking. Correct answers and greater-good choices earn virtue progress and combat bonuses."),
+        tr("Virtues: Master all sub-virtues of a cardinal virtue to unlock its combat bonus. Theological virtues are received through Sunday rest. Gifts and Fruits of the Holy Spirit unlock as you progress."),
+        tr("Winning: Survive 9 days without losing all bases. Bonus victory for defeating all 24 enemy ships."),
     ]
+    players = deck["variant"]["players"]
+    if players:
+        instructions.insert(2, ship_assignment(players))
     y_pos = PAGE_HEIGHT - MARGIN - 30
     for line in instructions:
         wrapped_lines = wrap_text(line, PAGE_WIDTH - 2 * MARGIN, FONT_NAME, 11, c)
         for wrapped_line in wrapped_lines:
             c.setFont(FONT_NAME, 11)
             c.setFillColorRGB(0, 0, 0)
-            c.drawString(MARGIN, y_pos, wrapped_line)
+            draw_string(c, MARGIN, y_pos, wrapped_line)
             y_pos -= 14
         y_pos -= 6
     draw_common_footer(c)
     c.showPage()
 
-    # ===== Turn Actions and Daily Office Page =====
+
+def draw_turn_actions_page(c, deck):
+    """Draw the turn actions and Daily Office page."""
     c.setFont(FONT_NAME, 16)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, "Turn Actions and Daily Office")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, tr("Turn Actions and Daily Office"))
     turn_actions = [
-        "Each day consists of 7 turns, themed after the Liturgy of the Hours:",
-        "- Lauds: Morning prayer. Draw a Virtue Question card. Correct answer: +1 virtue progress, +1 grace. Wrong: +1 VP (consolation).",
-        "- Prime: Draw a Catholic Action Card (Rosary, Charity, Confession, Fast, Almsgiving, Lectio Divina).",
-        "- Terce: Mid-morning action. Move to an adjacent sector OR attack enemies. Before attacking, draw a Moral Choice card.",
-        "- Sext: Noon. Charge weapons (+1 charge, max 3) OR repair (+1 health).",
-        "- None: Afternoon. Draw a Virtue Question card OR spend 2 VP to heal +2 health.",
-        "- Vespers: Evening action. Move OR attack (with Moral Choice card).",
-        "- Compline: Night rest. Auto-heal +1 health.",
+        tr("Each day consists of 7 turns, themed after the Liturgy of the Hours:"),
+        tr("- Lauds: Morning prayer. Draw a Virtue Question card. Correct answer: +1 virtue progress, +1 grace. Wrong: +1 VP (consolation)."),
+        tr("- Prime: Draw a Catholic Action Card (Rosary, Charity, Confession, Fast, Almsgiving, Lectio Divina)."),
+        tr("- Terce: Mid-morning action. Move to an adjacent sector OR attack enemies. Before attacking, draw a Moral Choice card."),
+        tr("- Sext: Noon. Charge weapons (+1 charge, max 3) OR repair (+1 health)."),
+        tr("- None: Afternoon. Draw a Virtue Question card OR spend 2 VP to heal +2 health."),
+        tr("- Vespers: Evening action. Move OR attack (with Moral Choice card)."),
+        tr("- Compline: Night rest. Auto-heal +1 health."),
         "",
-        "Every 7th day is Sunday (Lord's Day): All ships heal +2, a theological virtue grows, and a Sunday Reflection is read. No combat on Sundays.",
+        tr("Every 7th day is Sunday (Lord's Day): All ships heal +2, a theological virtue grows, and a Sunday Reflection is read. No combat on Sundays."),
         "",
-        "Cardinal Virtue Bonuses (when all sub-virtues mastered):",
-        "- Prudence: Preview enemy actions (FORESIGHT)",
-        "- Justice: +1 attack damage",
-        "- Fortitude: Reduce incoming damage by 1",
-        "- Temperance: Keep 1 charge after attacking",
+        tr("Cardinal Virtue Bonuses (when all sub-virtues mastered):"),
+        tr("- Prudence: Preview enemy actions (FORESIGHT)"),
+        tr("- Justice: +1 attack damage"),
+        tr("- Fortitude: Reduce incoming damage by 1"),
+        tr("- Temperance: Keep 1 charge after attacking"),
     ]
     y_pos = PAGE_HEIGHT - MARGIN - 30
     for line in turn_actions:
@@ -401,32 +706,34 @@ def create_pdf():
         for wrapped_line in wrapped_lines:
             c.setFont(FONT_NAME, 11)
             c.setFillColorRGB(0, 0, 0)
-            c.drawString(MARGIN, y_pos, wrapped_line)
+            draw_string(c, MARGIN, y_pos, wrapped_line)
             y_pos -= 13
     draw_common_footer(c)
     c.showPage()
 
-    # ===== Virtue Taxonomy Reference Page =====
+
+def draw_taxonomy_page(c, deck):
+    """Draw the cardinal virtue taxonomy page with progress checkboxes."""
     c.setFont(FONT_NAME, 16)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, "Cardinal Virtues & Sub-Virtues")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, tr("Cardinal Virtues & Sub-Virtues"))
     c.setFont(FONT_NAME, 9)
     c.setFillColorRGB(0.3, 0.3, 0.3)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN - 15, "Master all sub-virtues (2 correct answers each) to unlock the cardinal virtue bonus")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN - 15, tr("Master all sub-virtues (2 correct answers each) to unlock the cardinal virtue bonus"))
 
     y_pos = PAGE_HEIGHT - MARGIN - 40
-    for virtue, subs in CARDINAL_VIRTUES.items():
+    for virtue, subs in deck["cardinal_virtues"].items():
         c.setFont(FONT_NAME, 13)
         c.setFillColor(royal_turquoise)
-        c.drawString(MARGIN, y_pos, virtue)
+        draw_string(c, MARGIN, y_pos, tr(virtue))
         y_pos -= 16
         # Draw sub-virtues in a wrapped row
         c.setFont(FONT_NAME, 10)
         c.setFillColorRGB(0, 0, 0)
-        row_text = "  |  ".join(subs)
+        row_text = "  |  ".join(tr(sub) for sub in subs)
         row_lines = wrap_text(row_text, PAGE_WIDTH - 2 * MARGIN, FONT_NAME, 10, c)
         for line in row_lines:
-            c.drawString(MARGIN + 10, y_pos, line)
+            draw_string(c, MARGIN + 10, y_pos, line)
             y_pos -= 13
         # Draw checkboxes for progress tracking
         c.setFont(FONT_NAME, 8)
@@ -434,199 +741,643 @@ def create_pdf():
         for sub in subs:
             if y_pos < MARGIN + inch:
                 break
-            c.drawString(MARGIN + 15, y_pos, f"[ ][ ] {sub}")
+            draw_string(c, MARGIN + 15, y_pos, f"[ ][ ] {tr(sub)}")
             y_pos -= 11
         y_pos -= 10
 
     draw_common_footer(c)
     c.showPage()
 
-    # ===== Gifts & Fruits Reference Page =====
+
+def draw_gifts_fruits_page(c, deck):
+    """Draw the Gifts & Fruits of the Holy Spirit reference page."""
     c.setFont(FONT_NAME, 16)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, "Gifts & Fruits of the Holy Spirit")
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, tr("Gifts & Fruits of the Holy Spirit"))
 
     # Gifts
     y_pos = PAGE_HEIGHT - MARGIN - 30
     c.setFont(FONT_NAME, 13)
     c.setFillColor(royal_turquoise)
-    c.drawString(MARGIN, y_pos, "7 Gifts of the Holy Spirit")
+    draw_string(c, MARGIN, y_pos, tr("{count} Gifts of the Holy Spirit", count=len(deck['gifts'])))
     y_pos -= 18
-    for name, perfects, desc in GIFTS_OF_SPIRIT:
+    for name, perfects, desc in deck["gifts"]:
         c.setFont(FONT_NAME, 10)
         c.setFillColor(royal_turquoise)
-        c.drawString(MARGIN + 10, y_pos, name)
+        draw_string(c, MARGIN + 10, y_pos, tr(name))
         c.setFont(FONT_NAME, 8)
         c.setFillColor(Color(0.4, 0.4, 0.4))
-        c.drawString(MARGIN + 120, y_pos, perfects)
+        draw_string(c, MARGIN + 120, y_pos, tr(perfects))
         c.setFont(FONT_NAME, 9)
         c.setFillColorRGB(0, 0, 0)
-        c.drawString(MARGIN + 10, y_pos - 12, desc)
+        draw_string(c, MARGIN + 10, y_pos - 12, tr(desc))
         y_pos -= 28
 
     # Fruits
     y_pos -= 10
     c.setFont(FONT_NAME, 13)
     c.setFillColor(royal_turquoise)
-    c.drawString(MARGIN, y_pos, "12 Fruits of the Holy Spirit")
+    draw_string(c, MARGIN, y_pos, tr("{count} Fruits of the Holy Spirit", count=len(deck['fruits'])))
     y_pos -= 18
 
     # Two columns for fruits
     col_width = (PAGE_WIDTH - 2 * MARGIN) / 2
-    left_fruits = FRUITS_OF_SPIRIT[:6]
-    right_fruits = FRUITS_OF_SPIRIT[6:]
+    fruits = deck["fruits"]
+    left_fruits = fruits[:(len(fruits) + 1) // 2]
+    right_fruits = fruits[(len(fruits) + 1) // 2:]
 
     saved_y = y_pos
     for name, desc in left_fruits:
         c.setFont(FONT_NAME, 10)
         c.setFillColor(royal_turquoise)
-        c.drawString(MARGIN + 10, y_pos, name)
+        draw_string(c, MARGIN + 10, y_pos, tr(name))
         c.setFont(FONT_NAME, 8)
         c.setFillColorRGB(0, 0, 0)
-        c.drawString(MARGIN + 10, y_pos - 11, desc)
+        draw_string(c, MARGIN + 10, y_pos - 11, tr(desc))
         y_pos -= 26
 
     y_pos = saved_y
     for name, desc in right_fruits:
         c.setFont(FONT_NAME, 10)
         c.setFillColor(royal_turquoise)
-        c.drawString(MARGIN + col_width + 10, y_pos, name)
+        draw_string(c, MARGIN + col_width + 10, y_pos, tr(name))
         c.setFont(FONT_NAME, 8)
         c.setFillColorRGB(0, 0, 0)
-        c.drawString(MARGIN + col_width + 10, y_pos - 11, desc)
+        draw_string(c, MARGIN + col_width + 10, y_pos - 11, tr(desc))
         y_pos -= 26
 
     draw_common_footer(c)
     c.showPage()
 
-    # ===== Game Board (3 pages) =====
-    draw_game_board(c)
 
-    # ===== Saint Ships (2 pages, 6 per page) =====
-    saint_names = [
-        "Saint Peter", "Saint Paul", "Saint Augustine", "Saint Thomas Aquinas",
-        "Saint Francis of Assisi", "Saint Teresa of Avila", "Saint Ignatius of Loyola",
-        "Saint Catherine of Siena", "Saint Joan of Arc", "Saint Therese of Lisieux",
-        "Saint John Paul II", "Saint Mother Teresa"
-    ]
-    for page in range(2):
-        for i in range(6):
-            index = page * 6 + i
-            if index >= 12:
-                break
-            col = i % 3
-            row = i // 3
-            x = MARGIN + col * (CARD_WIDTH + CARD_SPACING)
-            y = PAGE_HEIGHT - MARGIN - (row + 1) * (CARD_HEIGHT + CARD_SPACING)
-            draw_card(c, x, y, saint_names[index], "Player Ship\nHealth: [ ] [ ] [ ]\nCharge: [ ] [ ] [ ] (Dmg: 1/2/3)")
-        draw_common_footer(c)
-        c.showPage()
+def card_layout(options=None):
+    """SheetLayout for card decks; defaults to the 3x2 grid, refitted when bleed is added."""
+    options = options or {}
+    bleed = options.get("bleed", 0)
+    cols, rows = options.get("grid") or (3, 2)
+    if bleed and not options.get("grid"):
+        # Fit inside the page leaving room for the footer and crop marks
+        cols, rows = fit_grid(PAGE_WIDTH - MARGIN - 0.25 * inch, PAGE_HEIGHT - 2 * MARGIN,
+                              CARD_WIDTH, CARD_HEIGHT, CARD_SPACING, bleed)
+    return SheetLayout(PAGE_WIDTH, PAGE_HEIGHT, CARD_WIDTH, CARD_HEIGHT, cols, rows,
+                       left=MARGIN, top=PAGE_HEIGHT - MARGIN, spacing=CARD_SPACING,
+                       bleed=bleed, crop_marks=options.get("crop_marks", False))
 
-    # ===== Enemy Ships (4 pages, 6 per page) =====
-    for page in range(4):
-        for i in range(6):
-            index = page * 6 + i
-            if index >= 24:
-                break
-            col = i % 3
-            row = i // 3
-            x = MARGIN + col * (CARD_WIDTH + CARD_SPACING)
-            y = PAGE_HEIGHT - MARGIN - (row + 1) * (CARD_HEIGHT + CARD_SPACING)
-            draw_card(c, x, y, f"Enemy Ship {index + 1}", "Health: [ ] [ ]", accent_color=dark_red)
-        draw_common_footer(c)
-        c.showPage()
 
-    # ===== Catholic Action Cards (4 pages, 6 per page) =====
-    catholic_actions = [
-        "Pray the Rosary: Gain 2 virtue points.",
-        "Act of Charity: Heal all ships in one sector by 1 health.",
-        "Confession: Remove one enemy ship from the board.",
-        "Fast: Skip a turn to gain 3 virtue points.",
-        "Almsgiving: Heal all player ships by 1 health.",
-        "Lectio Divina: Gain 1 virtue point and draw a card."
-    ] * 4
-    for page in range(4):
-        for i in range(6):
-            index = page * 6 + i
-            if index >= 24:
-                break
-            col = i % 3
-            row = i // 3
-            x = MARGIN + col * (CARD_WIDTH + CARD_SPACING)
-            y = PAGE_HEIGHT - MARGIN - (row + 1) * (CARD_HEIGHT + CARD_SPACING)
-            draw_card(c, x, y, "Catholic Action", catholic_actions[index % len(catholic_actions)])
-        draw_common_footer(c)
-        c.showPage()
+def draw_card_back(c, x, y, label, accent_color=None):
+    """Draw a card back (for duplex printing)."""
+    color = accent_color or royal_turquoise
+    draw_card_frame(c, x, y, color)
+    c.setFillColor(color)
+    c.setFont(FONT_NAME, 16)
+    draw_centred_string(c, x + CARD_WIDTH / 2, y + CARD_HEIGHT / 2 + 10, "Stellar Virtue")
+    c.setFont(FONT_NAME, 11)
+    draw_centred_string(c, x + CARD_WIDTH / 2, y + CARD_HEIGHT / 2 - 10, tr(label))
+    c.setFont(FONT_NAME, 8)
+    draw_centred_string(c, x + CARD_WIDTH / 2, y + 12, "zoseco.com")
 
-    # ===== Enemy Action Cards (4 pages, 6 per page) =====
-    enemy_actions = [
-        "Advance: Move all enemy ships one sector toward the nearest base.",
-        "Assault: All enemy ships attack; spawn 1 new ship.",
-        "Flank: Move half the enemy ships two sectors toward a base.",
-        "Regroup: Move all enemy ships one sector away from bases.",
-        "Ambush: Enemy ships in player sectors deal double damage.",
-        "Reinforce: Spawn 2 new enemy ships in a spawn sector."
-    ] * 4
-    for page in range(4):
-        for i in range(6):
-            index = page * 6 + i
-            if index >= 24:
-                break
-            col = i % 3
-            row = i // 3
-            x = MARGIN + col * (CARD_WIDTH + CARD_SPACING)
-            y = PAGE_HEIGHT - MARGIN - (row + 1) * (CARD_HEIGHT + CARD_SPACING)
-            draw_card(c, x, y, "Enemy Action", enemy_actions[index % len(enemy_actions)], accent_color=dark_red)
-        draw_common_footer(c)
-        c.showPage()
 
-    # ===== Virtue Question Cards (2 pages, 6 per page) =====
-    for page in range(2):
-        for i in range(6):
-            index = page * 6 + i
-            if index >= len(PRINT_VIRTUE_QUESTIONS):
-                break
-            col = i % 3
-            row = i // 3
-            x = MARGIN + col * (CARD_WIDTH + CARD_SPACING)
-            y = PAGE_HEIGHT - MARGIN - (row + 1) * (CARD_HEIGHT + CARD_SPACING)
-            header, question, answers, correct, explanation = PRINT_VIRTUE_QUESTIONS[index]
-            draw_virtue_question_card(c, x, y, header, question, answers, correct, explanation)
-        draw_common_footer(c)
-        c.showPage()
+def impose_deck(c, deck, records, draw, back_label, accent_color=None, frame=None):
+    """Lay out a deck of card records on as many sheets as needed.
+
+    draw(c, x, y, record) draws a card's own content; frame(c, x, y) draws
+    what every card of the deck shares (default: the border). Frames and
+    card backs go into shared per-sheet forms keyed by back_label.
+    """
+    options = deck.get("imposition") or {}
+    frame = frame or (lambda c, x, y: draw_card_frame(c, x, y, accent_color))
+    back_frame = None
+    if options.get("card_backs"):
+        back_frame = (("card_back", back_label, accent_color),
+                      lambda c, x, y: draw_card_back(c, x, y, back_label, accent_color))
+    impose_all(c, records, draw, card_layout(options), page_template=draw_common_footer,
+               frame=(("card_front", back_label, accent_color), frame), back_frame=back_frame)
+
+
+SAINT_SHIP_TEXT = "Player Ship\nHealth: [ ] [ ] [ ]\nCharge: [ ] [ ] [ ] (Dmg: 1/2/3)"
+ENEMY_SHIP_TEXT = "Health: [ ] [ ]"
+
+
+# Sections printed as card decks, in document order
+CARD_SECTIONS = ("saint_ships", "enemy_ships", "catholic_actions", "enemy_actions",
+                 "virtue_questions", "moral_choices")
+
+
+def card_deck(name, deck):
+    """A card section's impose_deck arguments: (records, draw, back_label, accent_color, frame)."""
+    autofit = deck["autofit"]
+    if name == "saint_ships":
+        return (deck["saints"], lambda c, x, y, saint: draw_card_title(c, x, y, tr(saint)), "Saint Ship", None,
+                lambda c, x, y: (draw_card_frame(c, x, y), draw_card_text(c, x, y, SAINT_SHIP_TEXT, autofit)))
+    if name == "enemy_ships":
+        return (range(1, ENEMY_SHIP_COUNT + 1),
+                lambda c, x, y, n: draw_card_title(c, x, y, tr("Enemy Ship {number}", number=n), dark_red),
+                "Enemy Ship", dark_red,
+                lambda c, x, y: (draw_card_frame(c, x, y, dark_red),
+                                 draw_card_text(c, x, y, ENEMY_SHIP_TEXT, autofit)))
+    if name == "catholic_actions":
+        return (CATHOLIC_ACTIONS * ACTION_CARD_COPIES, lambda c, x, y, text: draw_card_text(c, x, y, text, autofit),
+                "Catholic Action", None,
+                lambda c, x, y: (draw_card_frame(c, x, y), draw_card_title(c, x, y, tr("Catholic Action"))))
+    if name == "enemy_actions":
+        return (ENEMY_ACTIONS * ACTION_CARD_COPIES, lambda c, x, y, text: draw_card_text(c, x, y, text, autofit),
+                "Enemy Action", dark_red,
+                lambda c, x, y: (draw_card_frame(c, x, y, dark_red),
+                                 draw_card_title(c, x, y, tr("Enemy Action"), dark_red)))
+    if name == "virtue_questions":
+        return (deck["virtue_questions"],
+                lambda c, x, y, q: draw_virtue_question_card(c, x, y, *q, autofit=autofit),
+                "Virtue Question", None, None)
+    if name == "moral_choices":
+        return (deck["moral_choices"],
+                lambda c, x, y, m: draw_moral_choice_card(c, x, y, *m, autofit=autofit),
+                "Moral Choice", moral_purple, draw_moral_choice_frame)
+    raise ValueError(f"{name} is not a card section")
+
+
+def draw_saint_ships(c, deck):
+    """Draw the 12 saint ship cards."""
+    impose_deck(c, deck, *card_deck("saint_ships", deck))
+
+
+def draw_enemy_ships(c, deck):
+    """Draw the 24 enemy ship cards."""
+    impose_deck(c, deck, *card_deck("enemy_ships", deck))
+
+
+def draw_catholic_action_cards(c, deck):
+    """Draw the Catholic Action cards (ACTION_CARD_COPIES of each)."""
+    impose_deck(c, deck, *card_deck("catholic_actions", deck))
+
+
+def draw_enemy_action_cards(c, deck):
+    """Draw the Enemy Action cards (ACTION_CARD_COPIES of each)."""
+    impose_deck(c, deck, *card_deck("enemy_actions", deck))
+
+
+def draw_virtue_question_cards(c, deck):
+    """Draw the virtue question deck."""
+    impose_deck(c, deck, *card_deck("virtue_questions", deck))
+
+
+def draw_moral_choice_cards(c, deck):
+    """Draw the moral choice deck."""
+    impose_deck(c, deck, *card_deck("moral_choices", deck))
+
+
+def fit_report(deck):
+    """Cards whose text had to shrink or be cut, as (section, card number, label, scale, lines dropped)."""
+    entries = []
+
+    def check(section, number, label, blocks, caps, box):
+        scale, _, dropped = layout_card_text(blocks, caps, box, deck["autofit"])
+        if scale < 1 or dropped:
+            entries.append((section, number, label, scale, dropped))
+
+    use_fonts()
+    localization.use_language(deck["variant"]["language"])
+    for section, texts in (("saint_ships", [SAINT_SHIP_TEXT]), ("enemy_ships", [ENEMY_SHIP_TEXT]),
+                           ("catholic_actions", CATHOLIC_ACTIONS), ("enemy_actions", ENEMY_ACTIONS)):
+        for number, text in enumerate(texts, 1):
+            check(section, number, text, *card_text_blocks(text), CARD_TEXT_BOX)
+    for number, record in enumerate(deck["virtue_questions"], 1):
+        check("virtue_questions", number, record[0], *question_blocks(question_card_text(*record)),
+              QUESTION_TEXT_BOX)
+    for number, record in enumerate(deck["moral_choices"], 1):
+        check("moral_choices", number, record[3], *moral_choice_blocks(moral_choice_text(*record)),
+              MORAL_TEXT_BOX)
+    return entries
 
-    # ===== Moral Choice Cards (2 pages, 6 per page) =====
-    for page in range(2):
-        for i in range(6):
-            index = page * 6 + i
-            if index >= len(PRINT_MORAL_CHOICES):
-                break
-            col = i % 3
-            row = i // 3
-            x = MARGIN + col * (CARD_WIDTH + CARD_SPACING)
-            y = PAGE_HEIGHT - MARGIN - (row + 1) * (CARD_HEIGHT + CARD_SPACING)
-            scenario, lesser, greater, virtue = PRINT_MORAL_CHOICES[index]
-            draw_moral_choice_card(c, x, y, scenario, lesser, greater, virtue)
-        draw_common_footer(c)
-        c.showPage()
 
-    # ===== Tokens (1 page) =====
-    token_types = ["Health", "Charge", "Virtue"]
+def format_fit_report(entries, deck):
+    """Console table for fit_report entries, ending with a one-line summary."""
+    rows = [f"{'section':<18}{'card':>6}  {'size':>5}{'cut':>5}  label"]
+    for section, number, label, scale, dropped in entries:
+        rows.append(f"{section:<18}{number:>6}  {scale:>5.0%}{dropped:>5}  {label[:40]}")
+    cards = len(deck["virtue_questions"]) + len(deck["moral_choices"])
+    shrunk = sum(1 for entry in entries if entry[3] < 1)
+    cut = sum(1 for entry in entries if entry[4])
+    mode = "auto-fit" if deck["autofit"] else "fixed sizes"
+    rows.append(f"Text fit ({mode}): {shrunk} cards shrunk, {cut} cut short, "
+                f"{cards} question and moral choice cards checked")
+    return "\n".join(rows)
+
+
+def draw_tokens_page(c, deck):
+    """Draw the token sheet (1 page)."""
     c.setFont(FONT_NAME, 16)
     c.setFillColor(royal_turquoise)
-    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, "Tokens")
-    for token_type in token_types:
-        for i in range(20):
+    draw_centred_string(c, PAGE_WIDTH / 2, PAGE_HEIGHT - MARGIN, tr("Tokens"))
+    for token_type in TOKEN_TYPES:
+        for i in range(TOKENS_PER_TYPE):
             col = i % 5
             row = i // 5
             x = MARGIN + col * (TOKEN_SIZE + 0.25 * inch)
-            y = PAGE_HEIGHT - MARGIN - 1.5 * inch - (token_types.index(token_type) * 4 * (TOKEN_SIZE + 0.25 * inch)) - row * (TOKEN_SIZE + 0.25 * inch)
+            y = PAGE_HEIGHT - MARGIN - 1.5 * inch - (TOKEN_TYPES.index(token_type) * 4 * (TOKEN_SIZE + 0.25 * inch)) - row * (TOKEN_SIZE + 0.25 * inch)
             draw_token(c, x, y, token_type)
     draw_common_footer(c)
     c.showPage()
 
+
+# (name, draw function, deck keys the section reads). The keys feed the
+# section's cache hash, so editing one deck only re-renders that deck.
+SECTIONS = [
+    ("cover", draw_cover_page, ("variant",)),
+    ("instructions", draw_instructions_page, ("variant", "board")),
+    ("turn_actions", draw_turn_actions_page, ()),
+    ("taxonomy", draw_taxonomy_page, ("cardinal_virtues",)),
+    ("gifts_fruits", draw_gifts_fruits_page, ("gifts", "fruits")),
+    ("board", lambda c, deck: draw_game_board(c, BoardModel.from_dict(deck["board"])), ("board",)),
+    ("saint_ships", draw_saint_ships, ("saints", "imposition", "autofit")),
+    ("enemy_ships", draw_enemy_ships, ("imposition", "autofit")),
+    ("catholic_actions", draw_catholic_action_cards, ("imposition", "autofit")),
+    ("enemy_actions", draw_enemy_action_cards, ("imposition", "autofit")),
+    ("virtue_questions", draw_virtue_question_cards, ("virtue_questions", "imposition", "autofit")),
+    ("moral_choices", draw_moral_choice_cards, ("moral_choices", "imposition", "autofit")),
+    ("tokens", draw_tokens_page, ()),
+]
+SECTION_FUNCS = {name: func for name, func, _ in SECTIONS}
+
+# Source files whose changes invalidate every cached section
+DRAWING_SOURCES = [
+    os.path.abspath(__file__),
+    os.path.join(virtue_data.HERE, "text_layout.py"),
+    os.path.join(virtue_data.HERE, "imposition.py"),
+    os.path.join(virtue_data.HERE, "page_templates.py"),
+    os.path.join(virtue_data.HERE, "font_resolver.py"),
+    os.path.join(virtue_data.HERE, "board_model.py"),
+    os.path.join(virtue_data.HERE, "card_store.py"),
+    os.path.join(virtue_data.HERE, "localization.py"),
+] + localization.catalog_files()
+
+PDF_METADATA = {
+    "title": "Stellar Virtue: A Cooperative Board Game",
+    "author": "Zoseco",
+    "subject": f"Version {VERSION}",
+    "creator": "Zoseco Team",
+    "keywords": "Stellar Virtue, board game, cooperative, Catholic, AI, spaceship, virtues",
+}
+
+
+def use_fonts(report=False):
+    """Resolve and register the body font once per process; returns FONT_NAME.
+
+    With report=True, a fallback to Helvetica is printed.
+    """
+    global FONT_NAME
+    FONT_NAME = font_resolver.resolve_font(BODY_FONT, report)
+    return FONT_NAME
+
+
+def set_metadata(c, metadata=PDF_METADATA):
+    """Set the PDF document metadata."""
+    c.setTitle(metadata["title"])
+    c.setAuthor(metadata["author"])
+    c.setSubject(metadata["subject"])
+    c.setCreator(metadata["creator"])
+    c.setKeywords(metadata["keywords"])
+
+
+def variant_metadata(deck):
+    """PDF_METADATA with the variant's school added to the title."""
+    metadata = dict(PDF_METADATA)
+    if deck["variant"]["school"]:
+        metadata["title"] = f"{PDF_METADATA['title']} - {deck['variant']['school']}"
+    return metadata
+
+
+def render_section(name, deck, profile=False):
+    """Render one section to a standalone PDF and return its bytes.
+
+    With profile=True returns (bytes, record) instead; see render_profile.
+    """
+    use_fonts()
+    localization.use_language(deck["variant"]["language"])
+    buf = io.BytesIO()
+    if profile:
+        timer = SectionTimer(name)
+        c = CountingCanvas(buf, pagesize=letter)
+    else:
+        c = canvas.Canvas(buf, pagesize=letter)
+    set_metadata(c)
+    SECTION_FUNCS[name](c, deck)
+    if profile:
+        timer.drawn()
     c.save()
+    if profile:
+        return buf.getvalue(), timer.finish(c, buf.getvalue())
+    return buf.getvalue()
+
+
+# Card decks that streaming mode may split into chunks: section -> deck key of its records
+CHUNKED_SECTIONS = {"virtue_questions": "virtue_questions", "moral_choices": "moral_choices"}
+STREAM_CHUNK_CARDS = 60
+
+
+def section_units(deck, names=None, chunk_cards=None):
+    """Yield (name, deck, key) for each unit to render, in document order.
+
+    A unit is a whole section, or with chunk_cards a run of about that many
+    cards (whole sheets) from a deck in CHUNKED_SECTIONS; key is its
+    content hash.
+    """
+    fingerprint = code_fingerprint(DRAWING_SOURCES)
+    font = font_resolver.font_signature(use_fonts())
+    # Every section prints translated text, possibly in fallback fonts
+    text = [font, deck["variant"]["language"], font_resolver.fallback_signature(), PDF_METADATA]
+    inputs = {name: keys for name, _, keys in SECTIONS}
+    for name in names or [name for name, _, _ in SECTIONS]:
+        records = deck[CHUNKED_SECTIONS[name]] if name in CHUNKED_SECTIONS else None
+        if not chunk_cards or not records or len(records) <= chunk_cards:
+            yield name, deck, section_key(name, text + [deck[k] for k in inputs[name]],
+                                          fingerprint)
+            continue
+        per_sheet = card_layout(deck["imposition"]).per_sheet
+        size = max(per_sheet, chunk_cards // per_sheet * per_sheet)
+        for start in range(0, len(records), size):
+            part = dict(deck, **{CHUNKED_SECTIONS[name]: records[start:start + size]})
+            yield name, part, section_key(f"{name}[{start}]", text +
+                                          [part[k] for k in inputs[name]], fingerprint)
+
+
+def section_keys(deck, names=None):
+    """Content hash of each named section (default: all), in document order."""
+    return [key for _, _, key in section_units(deck, names)]
+
+
+def is_path(output):
+    return isinstance(output, (str, os.PathLike))
+
+
+def stream_units(units, pool=None, cache=None, rendered=None, profile=None, output=None):
+    """Yield (name, bytes, was_drawn) per unit in order, rendering at most a few units ahead.
+
+    profile (a RenderProfile) receives a record per unit, filed under output.
+    """
+    window = (os.cpu_count() or 1) if pool is not None else 1
+    pending = deque()
+
+    def finish(name, key, data, drawn):
+        data = data.result() if isinstance(data, Future) else data
+        if profile is not None:
+            if drawn:
+                data, record = data
+                profile.add_section(output, record)
+            else:
+                profile.add_section(output, name=name, size=len(data))
+        if drawn and cache is not None:
+            cache.put(key, data)
+        return name, data, drawn
+
+    for name, deck, key in units:
+        data = rendered.get(key) if rendered is not None else None
+        if data is None and cache is not None:
+            data = cache.get(key)
+        if data is not None:
+            pending.append((name, key, data, False))
+        elif pool is not None:
+            pending.append((name, key, pool.submit(render_section, name, deck, profile is not None), True))
+        else:
+            pending.append((name, key, render_section(name, deck, profile is not None), True))
+        while len(pending) > window or (pending and not isinstance(pending[0][2], Future)):
+            yield finish(*pending.popleft())
+    for unit in pending:
+        yield finish(*unit)
+
+
+def write_pdf(deck, filename, sections=None, pool=None, cache=None, rendered=None,
+              stream=False, chunk_cards=STREAM_CHUNK_CARDS, profile=None):
+    """Render the named sections of deck (default: all) into filename.
+
+    filename is a path or a writable binary file object. Sections come from
+    the in-process dict rendered (key -> bytes), then from cache (a
+    SectionCache, or None to skip the disk cache); anything still missing
+    is drawn, in pool if one is given. rendered is updated, so sections
+    shared by several variants are drawn once per process.
+
+    With stream=True each section (large decks in chunks of about
+    chunk_cards cards) is written to filename as soon as it is ready, so
+    memory stays bounded by one chunk per worker instead of the whole
+    document; this mode needs no pypdf and leaves rendered untouched.
+    profile (a RenderProfile) collects per-section timings and counts.
+    Returns the number of sections drawn.
+    """
+    names = sections or [name for name, _, _ in SECTIONS]
+    metadata = variant_metadata(deck)
+    output = os.path.basename(filename) if is_path(filename) else "stream"
+    span = profile.span if profile is not None else lambda *stack: nullcontext()
+    if not stream and not pdf_merge.available():
+        with span(output, "render"):
+            use_fonts()
+            localization.use_language(deck["variant"]["language"])
+            c = canvas.Canvas(filename, pagesize=letter)
+            set_metadata(c, metadata)
+            for name in names:
+                SECTION_FUNCS[name](c, deck)
+            c.save()
+        return len(names)
+
+    units = list(section_units(deck, names, chunk_cards if stream else None))
+    build_keys = [key for _, _, key in units] + [section_key("metadata", metadata, "")]
+    if cache is not None and is_path(filename) and cache.is_current(filename, build_keys):
+        return 0
+
+    drawn = set()
+    if stream:
+        writer = pdf_merge.PdfStreamWriter(filename, metadata)
+        for name, data, was_drawn in stream_units(units, pool, cache, rendered, profile, output):
+            with span(output, "write"):
+                writer.add(data)
+            if was_drawn:
+                drawn.add(name)
+        with span(output, "write"):
+            writer.close()
+    else:
+        rendered = {} if rendered is None else rendered
+        parts = []
+        for name, data, was_drawn in stream_units(units, pool, cache, rendered, profile, output):
+            parts.append(data)
+            if was_drawn:
+                drawn.add(name)
+        rendered.update((key, data) for (_, _, key), data in zip(units, parts))
+        with span(output, "merge"):
+            pdf_merge.merge_pdfs(parts, filename, metadata)
+    if cache is not None and is_path(filename):
+        cache.record_build(filename, build_keys)
+    return len(drawn)
+
+
+def create_pdf(deck_source="full", jobs=1, filename="stellar_virtue.pdf",
+               bleed=0, crop_marks=False, card_backs=False, grid=None, use_cache=True, stream=False,
+               profile=None, autofit=True):
+    """Generate the Stellar Virtue board game PDF.
+
+    Sections are rendered separately, cached on disk by content hash and
+    merged in document order (requires pypdf), so a rebuild only re-renders
+    sections whose data or drawing code changed. With jobs > 1 the changed
+    sections render in worker processes. bleed (points), crop_marks,
+    card_backs and grid ((cols, rows)) control card sheet imposition.
+    filename may also be a binary file object (e.g. BytesIO or a socket
+    file); stream=True writes sections to it as they finish (see write_pdf).
+    profile is an optional RenderProfile to record timings into.
+    autofit=False prints card text at fixed sizes, cut to fixed line counts.
+    Returns the number of sections rendered.
+    """
+    variant = normalize_variant({"deck": deck_source, "autofit": autofit})
+    use_fonts(report=True)
+    with profile.span("load_deck") if profile is not None else nullcontext():
+        deck = build_deck(variant, imposition_options(bleed, crop_marks, card_backs, grid))
+    if not stream and not pdf_merge.available() and (jobs > 1 or use_cache):
+        print("pypdf is not installed; rendering sections serially without the section cache.")
+    cache = SectionCache() if use_cache else None
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            count = write_pdf(deck, filename, pool=pool, cache=cache, stream=stream, profile=profile)
+    else:
+        count = write_pdf(deck, filename, cache=cache, stream=stream, profile=profile)
+    if cache is not None:
+        cache.prune()
+    return count
+
+
+def create_batch(variants, out_dir=".", jobs=1, bleed=0, crop_marks=False, card_backs=False,
+                 grid=None, use_cache=True, stream=False, profile=None):
+    """Generate one PDF per variant in a single process.
+
+    The registered font, parsed virtues.js data, text layout caches, worker
+    pool and every rendered section are shared across variants, so a static
+    section such as the board is drawn once for the whole batch. Variants
+    are validated up front (ValueError). stream and profile are as for
+    write_pdf.
+    Returns a list of
+    (filename, sections rendered) in manifest order.
+    """
+    variants = [normalize_variant(v) for v in variants]
+    filenames = [os.path.join(out_dir, variant_filename(v, i)) for i, v in enumerate(variants)]
+    if len(set(filenames)) != len(filenames):
+        raise ValueError("variants must have distinct output filenames")
+    if not stream and not pdf_merge.available() and (jobs > 1 or use_cache):
+        print("pypdf is not installed; rendering sections serially without the section cache.")
+    use_fonts(report=True)
+    os.makedirs(out_dir, exist_ok=True)
+    imposition = imposition_options(bleed, crop_marks, card_backs, grid)
+    cache = SectionCache() if use_cache else None
+    rendered = {}
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    results = []
+    try:
+        for variant, filename in zip(variants, filenames):
+            with profile.span("load_deck") if profile is not None else nullcontext():
+                deck = build_deck(variant, imposition)
+            names = [name for name, _, _ in SECTIONS
+                     if not variant["sections"] or name in variant["sections"]]
+            count = write_pdf(deck, filename, names, pool=pool, cache=cache, rendered=rendered,
+                              stream=stream, profile=profile)
+            results.append((filename, count))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if cache is not None:
+        cache.prune()
+    return results
+
+
+def load_manifest(path):
+    """Read a batch manifest: a JSON list of variants, or {"defaults": {...}, "variants": [...]}."""
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        return manifest
+    defaults = manifest.get("defaults", {})
+    return [dict(defaults, **variant) for variant in manifest["variants"]]
 
 if __name__ == "__main__":
-    create_pdf()
-    print("PDF created as 'stellar_virtue.pdf'!")
+    parser = argparse.ArgumentParser(description="Generate the Stellar Virtue print-and-play PDF.")
+    parser.add_argument("--deck", choices=["full", "curated"], default="full",
+                        help="print the full question bank from virtues.js (default) or the curated 12-card decks")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="render sections in N worker processes and merge them (requires pypdf)")
+    parser.add_argument("--bleed", type=float, default=0,
+                        help="bleed around each card, in inches (e.g. 0.125)")
+    parser.add_argument("--crop-marks", action="store_true", help="draw crop marks on card sheets")
+    parser.add_argument("--card-backs", action="store_true",
+                        help="follow each card sheet with a mirrored sheet of card backs for duplex printing")
+    parser.add_argument("--grid", type=lambda v: tuple(int(n) for n in v.split("x")), default=None,
+                        metavar="COLSxROWS", help="cards per sheet, e.g. 3x2")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-render every section instead of reusing unchanged ones from .cache/")
+    parser.add_argument("--batch", metavar="MANIFEST",
+                        help="generate one PDF per variant in a JSON manifest (see VARIANT_DEFAULTS)")
+    parser.add_argument("--out-dir", default=".", help="directory for --batch output")
+    parser.add_argument("--output", default="stellar_virtue.pdf", help="output PDF path")
+    parser.add_argument("--stream", action="store_true",
+                        help="write each section to the output as soon as it is rendered, keeping memory bounded")
+    parser.add_argument("--profile", nargs="?", const="stellar_virtue-profile", metavar="PREFIX",
+                        help="time every section and write PREFIX.json and PREFIX.folded (collapsed stacks for flame graphs)")
+    parser.add_argument("--no-autofit", action="store_true",
+                        help="print card text at fixed sizes, cutting long text instead of shrinking it")
+    parser.add_argument("--fit-report", action="store_true",
+                        help="list every card whose text was shrunk or cut to fit")
+    parser.add_argument("--check-bank", action="store_true",
+                        help="list problems in the question and moral choice bank (bad answers, duplicates, gaps)")
+    parser.add_argument("--export-cards", nargs="?", const="cards", metavar="DIR",
+                        help="instead of the PDF, write each card as PNG/SVG to DIR (default cards/) with a manifest for sw.js")
+    parser.add_argument("--card-formats", nargs="+", choices=["png", "svg"], default=["png", "svg"],
+                        help="file formats for --export-cards")
+    parser.add_argument("--dpi", type=int, default=150, help="PNG resolution for --export-cards")
+    args = parser.parse_args()
+    if args.export_cards:
+        import card_export
+        deck = build_deck(normalize_variant({"deck": args.deck, "autofit": not args.no_autofit}))
+        use_fonts(report=True)
+        exported = card_export.export_cards(deck, args.export_cards, args.card_formats, args.dpi, args.jobs)
+        if exported:
+            print(f"{exported[0]} cards in {os.path.join(args.export_cards, 'manifest.json')} ({exported[1]} drawn)")
+        raise SystemExit(0 if exported else 1)
+    profile = RenderProfile() if args.profile else None
+    if args.batch:
+        variants = load_manifest(args.batch)
+        if args.no_autofit:
+            variants = [dict({"autofit": False}, **variant) for variant in variants]
+    else:
+        variants = [{"deck": args.deck, "autofit": not args.no_autofit}]
+    if args.batch:
+        results = create_batch(variants, out_dir=args.out_dir, jobs=args.jobs,
+                               bleed=args.bleed * inch, crop_marks=args.crop_marks,
+                               card_backs=args.card_backs, grid=args.grid, use_cache=not args.no_cache,
+                               stream=args.stream, profile=profile)
+        for filename, rendered in results:
+            print(f"{filename}: {rendered} sections rendered" if rendered else f"{filename} is up to date.")
+        print(f"{len(results)} PDFs, {sum(r for _, r in results)} sections rendered.")
+    else:
+        rendered = create_pdf(deck_source=args.deck, jobs=args.jobs, bleed=args.bleed * inch,
+                              crop_marks=args.crop_marks, card_backs=args.card_backs, grid=args.grid,
+                              use_cache=not args.no_cache, filename=args.output, stream=args.stream,
+                              profile=profile, autofit=not args.no_autofit)
+        if rendered:
+            print(f"PDF created as '{args.output}'! ({rendered} of {len(SECTIONS)} sections rendered)")
+        else:
+            print(f"{args.output} is up to date.")
+        if rendered and args.jobs <= 1:
+            print(format_layout_stats())
+    if args.fit_report:
+        # Laying out every card again costs as much as a no-op rebuild, so only on request
+        for variant in variants:
+            deck = build_deck(normalize_variant(variant))
+            print(format_fit_report(fit_report(deck), deck))
+    elif _fit_stats["cut"]:
+        print(f"{_fit_stats['cut']} cards drawn with text cut short; run with --fit-report for the list.")
+    if any(variant.get("deck", VARIANT_DEFAULTS["deck"]) == "full" for variant in variants):
+        try:
+            problems = deck_optimizer.check_bank(card_store.open_store())
+        except (OSError, ValueError):
+            problems = []
+        if args.check_bank:
+            print(deck_optimizer.format_bank_report(problems))
+        elif any(kind == "error" for kind, _, _ in problems):
+            print(f"{deck_optimizer.bank_summary(problems)}; run with --check-bank for the list.")
+    if profile is not None:
+        print(profile.format_summary())
+        profile.write_json(args.profile + ".json")
+        profile.write_collapsed(args.profile + ".folded")
+        print(f"Profile written to {args.profile}.json and {args.profile}.folded")
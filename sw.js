@@ -1,15 +1,54 @@
-const CACHE_NAME = 'stellar-virtue-v1';
+const CACHE_NAME = 'stellar-virtue-v3';
+// Card images (see card_export.py) live in their own cache: their file names
+// change with their content, so only new names are fetched on update.
+const CARD_CACHE = 'stellar-virtue-cards';
+const CARD_MANIFEST = './cards/manifest.json';
 const ASSETS = [
   './',
   './index.html',
   './style.css',
   './game.js',
+  './board.json',
   './manifest.json'
 ];
 
+const CARD_MANIFEST_URL = new URL(CARD_MANIFEST, self.location).href;
+
+async function fetchCardManifest() {
+  try {
+    const response = await fetch(CARD_MANIFEST, { cache: 'no-cache' });
+    return response.ok ? await response.json() : null;
+  } catch (e) {
+    return null; // offline, or no exported cards
+  }
+}
+
+// Bring the card cache in line with a manifest: fetch new names, drop stale ones.
+async function syncCards(manifest) {
+  if (!manifest) return;
+  const cache = await caches.open(CARD_CACHE);
+  const wanted = new Set();
+  manifest.cards.forEach((card) => {
+    ['png', 'svg'].forEach((fmt) => {
+      if (card[fmt]) wanted.add(new URL('./cards/' + card[fmt], self.location).href);
+    });
+  });
+  const cached = new Set((await cache.keys()).map((request) => request.url));
+  const missing = [...wanted].filter((url) => !cached.has(url));
+  await cache.addAll(missing);
+  await Promise.all([...cached].filter((url) => !wanted.has(url)).map((url) => cache.delete(url)));
+}
+
+function precacheCards() {
+  return fetchCardManifest().then(syncCards).catch(() => {});
+}
+
 self.addEventListener('install', (event) => {
   event.waitUntil(
-    caches.open(CACHE_NAME).then((cache) => cache.addAll(ASSETS))
+    Promise.all([
+      caches.open(CACHE_NAME).then((cache) => cache.addAll(ASSETS)),
+      precacheCards()
+    ])
   );
   self.skipWaiting();
 });
@@ -17,13 +56,28 @@ self.addEventListener('install', (event) => {
 self.addEventListener('activate', (event) => {
   event.waitUntil(
     caches.keys().then((keys) =>
-      Promise.all(keys.filter((k) => k !== CACHE_NAME).map((k) => caches.delete(k)))
-    )
+      Promise.all(keys.filter((k) => k !== CACHE_NAME && k !== CARD_CACHE).map((k) => caches.delete(k)))
+    ).then(precacheCards)
   );
   self.clients.claim();
 });
 
+// sw.js itself only changes on a code update, so the card cache is re-synced
+// from the manifest on every page load (and whenever the manifest is
+// requested, which always goes to the network first). Only changed cards are
+// fetched, because their file names change with their content.
 self.addEventListener('fetch', (event) => {
+  const url = new URL(event.request.url);
+  if (url.origin + url.pathname === CARD_MANIFEST_URL) {
+    const network = fetch(event.request, { cache: 'no-cache' });
+    event.waitUntil(network.then((response) => (response.ok ? response.clone().json().then(syncCards) : null))
+      .catch(() => {}));
+    event.respondWith(network.catch(() => Response.error()));
+    return;
+  }
+  if (event.request.mode === 'navigate') {
+    event.waitUntil(precacheCards());
+  }
   event.respondWith(
     caches.match(event.request).then((cached) => cached || fetch(event.request))
   );
@@ -0,0 +1,229 @@
+# text_layout.py
+# Cached text measurement and line wrapping for the print generator.
+# Word widths are memoized per (font, size) and wrapped results are kept in an
+# LRU keyed by (text, width, font, size), so card text that repeats across a
+# deck is only measured and laid out once. Every cache is bounded, so
+# long-running processes (render_service.py, print_shop.py) stay flat.
+#
+# Auto-fit (fit_text) shrinks a card's text until it fits its box. Glyph
+# widths scale linearly with font size, so each text is measured once at 1pt
+# and wrapping at size s against width w is wrapping those widths against
+# w / s: line counts come from bisecting prefix sums of word widths, and the
+# size from a binary search over candidate scales, without re-wrapping.
+#
+# Text is measured and drawn as font runs: stretches of one font, switching
+# to a fallback font (font_resolver.fallback_font) where the body font has no
+# glyph. Runs are memoized per (text, font), and measuring and drawing use
+# the same runs, so glyph coverage is resolved once per string in a process
+# however many language editions print it. ASCII skips the lookup.
+
+from bisect import bisect_right
+from functools import lru_cache
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from font_resolver import fallback_font
+
+WRAP_CACHE_SIZE = 4096
+RUN_CACHE_SIZE = 16384
+WIDTH_TABLE_SIZE = 8192  # strings per (font, size) table
+FIT_STEPS = 24          # candidate scales between min_scale and max_scale
+MIN_FIT_SCALE = 0.6
+
+# (font, font_size) -> {string: width in points}, least recently used first
+_width_tables = {}
+_width_stats = {"hits": 0, "misses": 0}
+
+
+def _width_table(font, font_size):
+    key = (font, font_size)
+    table = _width_tables.get(key)
+    if table is None:
+        table = _width_tables[key] = {}
+    return table
+
+
+def _cached_width(table, text, font, font_size):
+    """Width of text from a width table, measuring on a miss and evicting the least recently used."""
+    width = table.pop(text, None)
+    if width is None:
+        _width_stats["misses"] += 1
+        width = _measure(text, font, font_size)
+        if len(table) >= WIDTH_TABLE_SIZE:
+            del table[next(iter(table))]
+    else:
+        _width_stats["hits"] += 1
+    table[text] = width  # (re)inserted last: dicts keep insertion order
+    return width
+
+
+@lru_cache(maxsize=RUN_CACHE_SIZE)
+def font_runs(text, font):
+    """text as ((run, font), ...): runs of one font, with fallback fonts for missing glyphs."""
+    if text.isascii():
+        return ((text, font),)
+    runs = []
+    for char in text:
+        run_font = fallback_font(char, font)
+        if runs and runs[-1][1] == run_font:
+            runs[-1][0].append(char)
+        else:
+            runs.append(([char], run_font))
+    return tuple(("".join(chars), run_font) for chars, run_font in runs)
+
+
+def _measure(text, font, font_size):
+    runs = font_runs(text, font)
+    if len(runs) == 1:
+        return stringWidth(text, runs[0][1], font_size)
+    return sum(stringWidth(run, run_font, font_size) for run, run_font in runs)
+
+
+def string_width(text, font, font_size):
+    """Return the width of text in points, measuring recently used strings only once."""
+    return _cached_width(_width_table(font, font_size), text, font, font_size)
+
+
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def wrap_lines(text, width, font, font_size):
+    """Wrap text to fit within width. Returns a tuple of lines."""
+    table = _width_table(font, font_size)
+    lines = []
+    current_line = []
+    current_width = 0
+    for word in text.split():
+        word_width = _cached_width(table, word + " ", font, font_size)
+        if current_width + word_width <= width:
+            current_line.append(word)
+            current_width += word_width
+        else:
+            lines.append(" ".join(current_line))
+            current_line = [word]
+            current_width = word_width
+    if current_line:
+        lines.append(" ".join(current_line))
+    return tuple(lines)
+
+
+# ===== Auto-fit =====
+
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def word_prefix_widths(text, font):
+    """Prefix sums of the 1pt widths of text's words (each with its trailing space)."""
+    table = _width_table(font, 1)
+    prefix = [0.0]
+    for word in text.split():
+        word_width = _cached_width(table, word + " ", font, 1)
+        prefix.append(prefix[-1] + word_width)
+    return tuple(prefix)
+
+
+def count_lines(text, width, font, font_size):
+    """Number of lines wrap_lines would produce, found from prefix sums without building them."""
+    prefix = word_prefix_widths(text, font)
+    limit = width / font_size
+    words = len(prefix) - 1
+    lines = i = 0
+    while i < words:
+        # Last word j whose line from word i still fits; an over-long word gets a line to itself
+        i = max(bisect_right(prefix, prefix[i] + limit, i + 1) - 1, i + 1)
+        lines += 1
+    return lines
+
+
+def text_depth(blocks, line_counts, scale):
+    """Distance from the first baseline down to the last one for blocks with these line counts."""
+    offset = last = 0
+    for (_, _, leading, space_before), lines in zip(blocks, line_counts):
+        offset += space_before * scale
+        if lines:
+            last = offset + (lines - 1) * leading * scale
+            offset += lines * leading * scale
+    return last
+
+
+def fit_text(blocks, width, font, height, min_scale=MIN_FIT_SCALE, max_scale=1.0, steps=FIT_STEPS):
+    """Scale blocks of text down until they fit a box.
+
+    blocks are (text, font_size, leading, space_before) tuples set one after
+    another, each wrapped to width; sizes, leadings and spacing all scale
+    together. Picks the largest of steps + 1 evenly spaced scales in
+    [min_scale, max_scale] at which the last baseline is at most height
+    below the first. Returns (scale, lines per block, fits); if even
+    min_scale is too big, scale is min_scale and fits is False.
+    """
+    scales = [min_scale + (max_scale - min_scale) * i / steps for i in range(steps + 1)]
+
+    def fits(i):
+        counts = [count_lines(text, width, font, size * scales[i]) for text, size, _, _ in blocks]
+        return text_depth(blocks, counts, scales[i]) <= height
+
+    # Most cards fit at full size, so try that before bisecting
+    lo, hi = (steps, steps + 1) if fits(steps) else (-1, steps)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid
+    # Confirm with the real wrap (rounding can differ at a line's edge)
+    i = max(lo, 0)
+    while True:
+        lines = [wrap_lines(text, width, font, size * scales[i]) for text, size, _, _ in blocks]
+        ok = text_depth(blocks, [len(l) for l in lines], scales[i]) <= height
+        if ok or i == 0:
+            return scales[i], lines, ok
+        i -= 1
+
+
+def _rate(hits, misses):
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+def layout_stats():
+    """Return hit/miss counts and hit rates for the width, wrap and font run caches."""
+    wrap = wrap_lines.cache_info()
+    runs = font_runs.cache_info()
+    return {
+        "wrap": {
+            "hits": wrap.hits,
+            "misses": wrap.misses,
+            "size": wrap.currsize,
+            "max_size": wrap.maxsize,
+            "hit_rate": _rate(wrap.hits, wrap.misses),
+        },
+        "width": {
+            "hits": _width_stats["hits"],
+            "misses": _width_stats["misses"],
+            "tables": len(_width_tables),
+            "size": sum(len(table) for table in _width_tables.values()),
+            "max_table_size": WIDTH_TABLE_SIZE,
+            "hit_rate": _rate(_width_stats["hits"], _width_stats["misses"]),
+        },
+        "runs": {
+            "hits": runs.hits,
+            "misses": runs.misses,
+            "size": runs.currsize,
+            "hit_rate": _rate(runs.hits, runs.misses),
+        },
+    }
+
+
+def format_layout_stats():
+    """One-line summary of cache hit rates, for build logs."""
+    stats = layout_stats()
+    return "Text layout cache: wrap {:.0%} hit ({} entries), width {:.0%} hit ({} font sizes)".format(
+        stats["wrap"]["hit_rate"], stats["wrap"]["size"],
+        stats["width"]["hit_rate"], stats["width"]["tables"],
+    )
+
+
+def clear_layout_caches():
+    """Drop all cached widths and wrapped lines (e.g. after re-registering a font)."""
+    wrap_lines.cache_clear()
+    word_prefix_widths.cache_clear()
+    font_runs.cache_clear()
+    _width_tables.clear()
+    _width_stats["hits"] = 0
+    _width_stats["misses"] = 0
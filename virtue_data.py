@@ -0,0 +1,375 @@
+# virtue_data.py
+# Loads the VIRTUE_DATA object literal from virtues.js so the print generator
+# works from the same question bank as the web app.
+#
+# The JS source is tokenized lazily and each array element is turned into a
+# compact __slots__ record as soon as it is parsed. The parsed result is
+# pickled to a cache file keyed by the SHA-256 of virtues.js, so repeated
+# builds (e.g. a watch loop) skip parsing entirely until the file changes.
+
+import hashlib
+import os
+import pickle
+import re
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+VIRTUES_JS = os.path.join(HERE, "virtues.js")
+CACHE_DIR = os.environ.get("STELLAR_VIRTUE_CACHE", os.path.join(HERE, ".cache"))
+
+# Bump when the parser or record layout changes so stale caches are ignored.
+PARSER_VERSION = 1
+
+
+# ===== Records =====
+
+class Record:
+    """Base for compact data records: fields are listed in __slots__."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+class CardinalVirtue(Record):
+    __slots__ = ("id", "name", "sub_virtues", "sub_names", "bonus", "bonus_short")
+
+
+class TheologicalVirtue(Record):
+    __slots__ = ("id", "name", "description", "bonus", "bonus_short")
+
+
+class Gift(Record):
+    __slots__ = ("id", "name", "perfects", "description")
+
+
+class Fruit(Record):
+    __slots__ = ("id", "name", "unlock_condition", "description")
+
+
+class Reflection(Record):
+    __slots__ = ("title", "text")
+
+
+class Question(Record):
+    # category is 'cardinal', 'gift' or 'fruit'; subtopic is only set for cardinal questions
+    __slots__ = ("category", "topic", "subtopic", "level", "q", "answers", "correct", "explanation")
+
+
+class MoralChoice(Record):
+    __slots__ = ("scenario", "lesser_good", "greater_good", "virtue", "sub", "explanation")
+
+
+class VirtueData(Record):
+    __slots__ = ("cardinal_virtues", "theological_virtues", "gifts", "fruits",
+                 "sunday_reflections", "virtue_questions", "gift_questions",
+                 "fruit_questions", "moral_choices")
+
+
+# ===== JS literal tokenizer / parser =====
+
+_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<str>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\]|\\.)*`)
+  | (?P<num>\d+(?:\.\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>\.\.\.|.)
+""", re.S | re.X)
+
+_ESCAPE_RE = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+_KEYWORDS = {"true": True, "false": False, "null": None, "undefined": None}
+
+
+def _unescape(body):
+    def replace(match):
+        esc = match.group(1)
+        if esc[0] in "ux" and len(esc) > 1:
+            return chr(int(esc[1:], 16))
+        return _ESCAPES.get(esc, esc)
+    return _ESCAPE_RE.sub(replace, body)
+
+
+def _tokens(text):
+    for match in _TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind != "skip":
+            yield kind, match.group(kind)
+
+
+class _Parser:
+    """Recursive-descent parser for the JS literal subset used in virtues.js."""
+
+    def __init__(self, text):
+        self._tokens = _tokens(text)
+        self._peeked = None
+
+    def peek(self):
+        if self._peeked is None:
+            self._peeked = next(self._tokens, (None, None))
+        return self._peeked
+
+    def take(self):
+        token = self.peek()
+        self._peeked = None
+        return token
+
+    def expect(self, value):
+        kind, got = self.take()
+        if got != value:
+            raise ValueError(f"virtues.js: expected {value!r}, got {got!r}")
+
+    def value(self):
+        kind, tok = self.take()
+        if kind == "str":
+            return _unescape(tok[1:-1])
+        if kind == "num":
+            return float(tok) if "." in tok else int(tok)
+        if kind == "name" and tok in _KEYWORDS:
+            return _KEYWORDS[tok]
+        if tok == "{":
+            return self._object()
+        if tok == "[":
+            return list(self.elements())
+        if tok == "-" and self.peek()[0] == "num":
+            return -self.value()
+        raise ValueError(f"virtues.js: unsupported literal token {tok!r}")
+
+    def _object(self):
+        obj = {}
+        while self.peek()[1] != "}":
+            kind, key = self.take()
+            if kind == "str":
+                key = _unescape(key[1:-1])
+            self.expect(":")
+            obj[key] = self.value()
+            if self.peek()[1] == ",":
+                self.take()
+        self.take()
+        return obj
+
+    def elements(self):
+        """Yield array elements one at a time (the opening '[' is already consumed)."""
+        while self.peek()[1] != "]":
+            yield self.value()
+            if self.peek()[1] == ",":
+                self.take()
+        self.take()
+
+    def constants(self, names):
+        """Yield (name, parser) at each `const NAME =` for the wanted names.
+
+        The caller must consume the value (via value() or elements()) before
+        advancing the generator.
+        """
+        while True:
+            kind, tok = self.take()
+            if kind is None:
+                return
+            if tok == "const" and self.peek()[1] in names:
+                name = self.take()[1]
+                self.expect("=")
+                yield name, self
+
+
+# ===== Record conversion =====
+
+def _cardinal(vid, v):
+    return CardinalVirtue(vid, v["name"], tuple(v["subVirtues"]), dict(v["subNames"]),
+                          v.get("bonus", ""), v.get("bonusShort", ""))
+
+
+def _theological(vid, v):
+    return TheologicalVirtue(vid, v["name"], v.get("description", ""),
+                             v.get("bonus", ""), v.get("bonusShort", ""))
+
+
+def _question(q):
+    if "virtue" in q:
+        category, topic, subtopic = "cardinal", q["virtue"], q.get("sub")
+    else:
+        category, topic, subtopic = q["category"], q["topic"], q.get("subtopic")
+    return Question(category, topic, subtopic, q.get("level", 1), q["q"],
+                    tuple(q["answers"]), q["correct"], q.get("explanation", ""))
+
+
+def _moral_choice(m):
+    return MoralChoice(m["scenario"], m["lesserGood"], m["greaterGood"],
+                       m["virtue"], m.get("sub", ""), m.get("explanation", ""))
+
+
+_OBJECT_CONVERTERS = {
+    "CARDINAL_VIRTUES": ("cardinal_virtues", _cardinal),
+    "THEOLOGICAL_VIRTUES": ("theological_virtues", _theological),
+}
+
+_ARRAY_CONVERTERS = {
+    "GIFTS_OF_SPIRIT": ("gifts", lambda g: Gift(g["id"], g["name"], g["perfects"], g["description"])),
+    "FRUITS_OF_SPIRIT": ("fruits", lambda f: Fruit(f["id"], f["name"], f["unlockCondition"], f["description"])),
+    "SUNDAY_REFLECTIONS": ("sunday_reflections", lambda r: Reflection(r["title"], r["text"])),
+    "VIRTUE_QUESTIONS": ("virtue_questions", _question),
+    "GIFT_QUESTIONS": ("gift_questions", _question),
+    "FRUIT_QUESTIONS": ("fruit_questions", _question),
+    "MORAL_CHOICES": ("moral_choices", _moral_choice),
+}
+
+
+def iter_records(text, const_name):
+    """Stream records for one array constant (e.g. 'VIRTUE_QUESTIONS') from JS source text."""
+    _, convert = _ARRAY_CONVERTERS[const_name]
+    for _, parser in _Parser(text).constants({const_name}):
+        parser.expect("[")
+        for item in parser.elements():
+            yield convert(item)
+        return
+
+
+def parse_virtue_data(text):
+    """Parse every VIRTUE_DATA constant from virtues.js source in a single pass."""
+    fields = {}
+    wanted = set(_OBJECT_CONVERTERS) | set(_ARRAY_CONVERTERS)
+    for name, parser in _Parser(text).constants(wanted):
+        if name in _OBJECT_CONVERTERS:
+            field, convert = _OBJECT_CONVERTERS[name]
+            fields[field] = {key: convert(key, v) for key, v in parser.value().items()}
+        else:
+            field, convert = _ARRAY_CONVERTERS[name]
+            parser.expect("[")
+            fields[field] = tuple(convert(item) for item in parser.elements())
+    missing = [f for f in VirtueData.__slots__ if f not in fields]
+    if missing:
+        raise ValueError(f"virtues.js: missing {', '.join(missing)}")
+    return VirtueData(*(fields[f] for f in VirtueData.__slots__))
+
+
+# ===== Cached loading =====
+
+_loaded = {}
+
+
+def _cache_path(digest):
+    return os.path.join(CACHE_DIR, f"virtue_data-v{PARSER_VERSION}-{digest[:16]}.pickle")
+
+
+def load_virtue_data(path=VIRTUES_JS, use_cache=True):
+    """Return VirtueData for virtues.js, reusing the in-process or on-disk cache when the file is unchanged."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest in _loaded:
+        return _loaded[digest]
+
+    cache_file = _cache_path(digest)
+    data = None
+    if use_cache:
+        try:
+            with open(cache_file, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            data = None
+
+    if data is None:
+        data = parse_virtue_data(raw.decode("utf-8"))
+        if use_cache:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, cache_file)
+            except OSError:
+                pass
+
+    _loaded[digest] = data
+    return data
+
+
+# ===== Print adapters =====
+# These produce the same tuple shapes as the hand-curated PRINT_* lists in
+# stellar_virtue_boardgame.py.
+
+LETTERS = "ABCDEFGH"
+
+
+def topic_label(data, question):
+    """Card header for a question, e.g. 'Prudence - Memory' or 'Gift - Wisdom'."""
+    if question.category == "cardinal":
+        virtue = data.cardinal_virtues.get(question.topic)
+        if virtue is None:
+            return question.topic.title()
+        sub = virtue.sub_names.get(question.subtopic, (question.subtopic or "").title())
+        return f"{virtue.name} - {sub}" if sub else virtue.name
+    names = {g.id: g.name for g in data.gifts} if question.category == "gift" else {f.id: f.name for f in data.fruits}
+    return f"{question.category.title()} - {names.get(question.topic, question.topic.title())}"
+
+
+def sub_virtue_label(data, virtue_id, sub_id):
+    """'Justice - Clemency' style label for a (virtue, sub) pair."""
+    virtue = data.cardinal_virtues.get(virtue_id)
+    name = virtue.name if virtue else virtue_id.title()
+    candidates = ([virtue] if virtue else []) + list(data.cardinal_virtues.values())
+    sub = next((v.sub_names[sub_id] for v in candidates if sub_id in v.sub_names), None)
+    return f"{name} - {sub or sub_id.title()}"
+
+
+def question_card(data, question, rotation=0):
+    """Return (header, question, answers, correct_letter, explanation) for a question.
+
+    virtues.js lists the correct answer first; rotation shifts the answer
+    order so printed decks don't always have 'A' as the answer.
+    """
+    answers = list(question.answers)
+    shift = rotation % len(answers)
+    order = list(range(shift, len(answers))) + list(range(shift))
+    lines = "\n".join(f"{LETTERS[i]}) {answers[j]}" for i, j in enumerate(order))
+    correct = LETTERS[order.index(question.correct)]
+    return (topic_label(data, question), question.q, lines, correct, question.explanation)
+
+
+QUESTION_CATEGORIES = ("cardinal", "gift", "fruit")
+
+
+def iter_question_cards(data, categories=QUESTION_CATEGORIES, max_level=None):
+    """Yield print tuples for every question in the requested categories, up to max_level if given."""
+    banks = {"cardinal": data.virtue_questions, "gift": data.gift_questions, "fruit": data.fruit_questions}
+    n = 0
+    for category in categories:
+        for question in banks[category]:
+            if max_level is not None and question.level > max_level:
+                continue
+            yield question_card(data, question, rotation=n)
+            n += 1
+
+
+def iter_moral_choice_cards(data):
+    """Yield (scenario, lesser, greater, virtue_label) for every moral choice."""
+    for m in data.moral_choices:
+        yield (m.scenario, m.lesser_good, m.greater_good, sub_virtue_label(data, m.virtue, m.sub))
+
+
+def cardinal_virtue_names(data):
+    """{'Prudence': ['Memory', ...], ...} for the taxonomy page."""
+    return {v.name: [v.sub_names[s] for s in v.sub_virtues] for v in data.cardinal_virtues.values()}
+
+
+def gift_rows(data):
+    """(name, 'Perfects X', description) rows for the reference page."""
+    return [(g.name, f"Perfects {g.perfects.title()}", g.description) for g in data.gifts]
+
+
+def fruit_rows(data):
+    """(name, description) rows for the reference page."""
+    return [(f.name, f.description) for f in data.fruits]
@@ -0,0 +1,254 @@
+# visual_regression.py
+# Checks the printed kit for layout changes without looking at every page.
+#
+# Each page is reduced to a hash of what it draws: its decoded content
+# stream and, followed through every reference, its resources (fonts, forms,
+# images), with object numbers replaced by the hashes of the objects they
+# point to, dictionary keys sorted and the /Parent back-links and stream
+# encodings dropped. Creation dates, document IDs, metadata, object
+# numbering and the tool that assembled the PDF do not affect it, so an
+# unchanged page hashes the same in every build. The hashes are compared with the golden manifest,
+# visual_baseline.json, and only pages whose hash changed are rasterized:
+# the old page (from the baseline PDF kept in .cache/visual/), the new page
+# and their difference (black where the pixels agree) are written as PNGs.
+#
+# The kit is rendered section by section through the section cache, so
+# pages are named by section and unchanged sections are not even redrawn.
+# Hashing and rasterizing need PyMuPDF (pip install pymupdf); without it
+# the check prints a message and does nothing.
+#
+# Usage: python visual_regression.py [--save-baseline] [--pdf kit.pdf] [--out-dir visual-diff] [--dpi 72]
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import stellar_virtue_boardgame as svb
+from render_cache import SectionCache
+from virtue_data import CACHE_DIR, HERE
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+BASELINE = os.path.join(HERE, "visual_baseline.json")
+BASELINE_PDF = os.path.join(CACHE_DIR, "visual", "baseline.pdf")
+OUT_DIR = "visual-diff"
+DIFF_DPI = 72
+MANIFEST_VERSION = 1
+TOKEN = re.compile(rb"\s*(<<|>>|\[|\]|/[^\s/<>\[\]()]*|\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|[^\s/<>\[\]()]+)")
+# Keys that describe how an object is stored or linked back, not what it draws
+IGNORED_KEYS = {b"/Parent", b"/Length", b"/Filter", b"/DecodeParms"}
+
+
+def available():
+    """True if PyMuPDF is installed."""
+    return pymupdf is not None
+
+
+# ===== Page hashes =====
+
+def _canonical(tokens, resolve):
+    """Canonical bytes of the PDF value at the front of tokens (a reversed list).
+
+    Dictionary keys are sorted, empty dictionaries and IGNORED_KEYS are
+    dropped, and references "n g R" become resolve(n).
+    """
+    token = tokens.pop()
+    if token == b"<<":
+        entries = []
+        while tokens[-1] != b">>":
+            key = tokens.pop()
+            value = _canonical(tokens, resolve)
+            if key not in IGNORED_KEYS and value != b"<<>>":
+                entries.append(key + b" " + value)
+        tokens.pop()
+        return b"<<" + b" ".join(sorted(entries)) + b">>"
+    if token == b"[":
+        items = []
+        while tokens[-1] != b"]":
+            items.append(_canonical(tokens, resolve))
+        tokens.pop()
+        return b"[" + b" ".join(items) + b"]"
+    if token.isdigit() and len(tokens) >= 2 and tokens[-1].isdigit() and tokens[-2] == b"R":
+        tokens.pop()
+        tokens.pop()
+        return b"#" + resolve(int(token))
+    return token
+
+
+def _object_hash(doc, xref, memo, active):
+    """Hash of an object and, recursively, of every object it refers to."""
+    digest = memo.get(xref)
+    if digest is not None:
+        return digest
+    if xref in active:
+        return b"cycle"
+    active.add(xref)
+    source = doc.xref_object(xref, compressed=True).encode("latin-1", "replace")
+    tokens = TOKEN.findall(source)
+    tokens.reverse()
+    h = hashlib.sha256(_canonical(tokens, lambda n: _object_hash(doc, n, memo, active)) if tokens else b"")
+    if doc.xref_is_stream(xref):
+        h.update(doc.xref_stream(xref))
+    active.discard(xref)
+    digest = memo[xref] = h.hexdigest()[:32].encode("ascii")
+    return digest
+
+
+def page_hashes(doc):
+    """Normalized hash of every page of an open PyMuPDF document."""
+    memo = {}
+    return [_object_hash(doc, page.xref, memo, set()).decode("ascii") for page in doc]
+
+
+def kit_pages(use_cache=True, jobs=1):
+    """(PyMuPDF document of the default kit, [(section, page in section)]), rendered by section."""
+    font = svb.use_fonts(report=True)
+    deck = svb.build_deck()
+    kit = pymupdf.open()
+    labels = []
+    cache = SectionCache() if use_cache else None
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        counts = {}
+        for name, data, _ in svb.stream_units(svb.section_units(deck), pool, cache):
+            with pymupdf.open("pdf", data) as part:
+                kit.insert_pdf(part)
+                for _ in range(len(part)):
+                    counts[name] = counts.get(name, 0) + 1
+                    labels.append((name, counts[name]))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if cache is not None:
+        cache.prune()
+    return kit, labels, font
+
+
+# ===== Comparison =====
+
+def load_baseline(path=BASELINE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return baseline if baseline.get("version") == MANIFEST_VERSION else None
+
+
+def save_baseline(doc, labels, font, path=BASELINE):
+    pages = [{"section": section, "page": page, "hash": digest}
+             for (section, page), digest in zip(labels, page_hashes(doc))]
+    manifest = {"version": MANIFEST_VERSION, "font": font, "pages": pages}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
+    os.makedirs(os.path.dirname(BASELINE_PDF), exist_ok=True)
+    doc.save(BASELINE_PDF + ".tmp", garbage=1, deflate=True)
+    os.replace(BASELINE_PDF + ".tmp", BASELINE_PDF)
+    return manifest
+
+
+def compare(doc, labels, baseline):
+    """[(kind, page index, label)] for pages that changed, were added or were removed."""
+    old = baseline["pages"]
+    new = page_hashes(doc)
+    changes = []
+    for i in range(max(len(old), len(new))):
+        if i >= len(new):
+            changes.append(("removed", i, f"{old[i]['section']} p{old[i]['page']}"))
+        elif i >= len(old):
+            changes.append(("added", i, f"{labels[i][0]} p{labels[i][1]}"))
+        elif old[i]["hash"] != new[i]:
+            changes.append(("changed", i, f"{labels[i][0]} p{labels[i][1]}"))
+    return changes
+
+
+def _pixels(page, dpi):
+    return page.get_pixmap(dpi=dpi, alpha=False)
+
+
+def write_diffs(doc, changes, out_dir=OUT_DIR, dpi=DIFF_DPI, baseline=None):
+    """Rasterize changed pages to out_dir; returns [(page index, share of pixels that differ or None)]."""
+    old_doc = None
+    if os.path.exists(BASELINE_PDF):
+        old_doc = pymupdf.open(BASELINE_PDF)
+        # A baseline PDF from another manifest would show the wrong "before".
+        if baseline is None or page_hashes(old_doc) != [p["hash"] for p in baseline["pages"]]:
+            old_doc.close()
+            old_doc = None
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    results = []
+    for kind, i, label in changes:
+        stem = os.path.join(out_dir, f"page-{i + 1:03d}")
+        new = _pixels(doc[i], dpi) if kind != "removed" else None
+        old = _pixels(old_doc[i], dpi) if old_doc is not None and kind != "added" else None
+        if new is not None:
+            new.save(stem + "-new.png")
+        if old is not None:
+            old.save(stem + "-old.png")
+        share = None
+        if new is not None and old is not None and (new.width, new.height) == (old.width, old.height):
+            a, b = new.samples, old.samples
+            xor = (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
+            pymupdf.Pixmap(pymupdf.csRGB, new.width, new.height, xor, False).save(stem + "-diff.png")
+            share = (len(xor) - xor.count(0)) / len(xor)
+        results.append((i, share))
+    if old_doc is not None:
+        old_doc.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the kit's pages with the golden page hashes.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="record the current pages as the golden manifest (visual_baseline.json)")
+    parser.add_argument("--pdf", help="check this PDF instead of rendering the default kit")
+    parser.add_argument("--out-dir", default=OUT_DIR, help=f"where diff images go (default {OUT_DIR}/)")
+    parser.add_argument("--dpi", type=int, default=DIFF_DPI, help="resolution of the diff images")
+    parser.add_argument("--no-cache", action="store_true", help="redraw every section")
+    parser.add_argument("--jobs", type=int, default=1, help="render sections in N worker processes")
+    args = parser.parse_args()
+    if not available():
+        print("PyMuPDF is not installed (pip install pymupdf); cannot check pages.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.pdf:
+        doc = pymupdf.open(args.pdf)
+        labels, font = [(os.path.basename(args.pdf), n + 1) for n in range(len(doc))], None
+    else:
+        doc, labels, font = kit_pages(not args.no_cache, args.jobs)
+    if args.save_baseline:
+        save_baseline(doc, labels, font)
+        print(f"Baseline saved: {len(doc)} pages in {os.path.relpath(BASELINE)}")
+        sys.exit(0)
+    baseline = load_baseline()
+    if baseline is None:
+        print("No baseline yet; run with --save-baseline first.")
+        sys.exit(1)
+    if font is not None and baseline["font"] != font:
+        print(f"Baseline was drawn with {baseline['font']} and this build uses {font}; "
+              "every text page will differ.")
+    changes = compare(doc, labels, baseline)
+    elapsed = time.perf_counter() - start
+    if not changes:
+        print(f"{len(doc)} pages match the baseline ({elapsed:.1f}s).")
+        sys.exit(0)
+    for (kind, i, label), (_, share) in zip(changes, write_diffs(doc, changes, args.out_dir, args.dpi, baseline)):
+        detail = f", {share:.2%} of pixel values differ" if share is not None else ""
+        print(f"page {i + 1:>3} {kind:<8} {label}{detail}")
+    print(f"{len(changes)} of {max(len(doc), len(baseline['pages']))} pages differ from the baseline ({elapsed:.1f}s); "
+          f"images in {args.out_dir}/")
+    sys.exit(1)